@@ -0,0 +1,27 @@
+-- Migration 001: index the time at which a crawler run counts as completed
+-- MySQL 5.7+ / MariaDB 10.2+
+--
+-- A run counts as completed by a given time of day when it finished by then,
+-- or when it has a final status (success/error) and started by then. The
+-- earliest of these times is stored in completed_time (NULL while the run is
+-- neither finished nor in a final status), so that "completed by 09:30"
+-- becomes a range predicate on an indexed column instead of TIME() calls:
+--
+--   WHERE planned_for = ? AND retailer = ? AND completed_time <= '09:30:00'
+--
+-- The index covers the progress queries of IncidentRepository (no table
+-- lookup). Adding a STORED column rebuilds the table: on a large
+-- crawler_runs, run it during a quiet period or with an online schema change
+-- tool (pt-online-schema-change, gh-ost).
+
+ALTER TABLE crawler_runs
+  ADD COLUMN completed_time TIME
+    GENERATED ALWAYS AS (
+      CASE
+        WHEN finished_at IS NOT NULL AND status IN ('success', 'error')
+          THEN LEAST(TIME(finished_at), TIME(started_at))
+        WHEN finished_at IS NOT NULL THEN TIME(finished_at)
+        WHEN status IN ('success', 'error') THEN TIME(started_at)
+      END
+    ) STORED,
+  ADD KEY idx_runs_completed (planned_for, retailer, completed_time);
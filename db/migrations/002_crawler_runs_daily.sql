@@ -0,0 +1,42 @@
+-- Migration 002: daily rollup of crawler_runs, maintained incrementally
+-- MySQL 5.7+ / MariaDB 10.2+
+--
+-- crawler_runs_daily holds one row per retailer and day. It is filled by
+-- `dealer-report refresh_rollup` (cli/repository/CrawlerRunsRollup.py),
+-- which only aggregates the runs with id > rollup_watermarks.last_processed_id
+-- and then moves the watermark forward in the same transaction.
+--
+-- The watermark never passes a run that is still queued or running: a run is
+-- rolled up once its status is final (success/error), and final runs are
+-- assumed not to change afterwards. A run pending for more than
+-- ROLLUP_STALE_HOURS is rolled up as it is, so a stuck run does not hold the
+-- watermark back forever. The watermark also stays below the runs started in
+-- the last ROLLUP_SETTLE_MINUTES: an insert committed after a higher id is
+-- visible before the watermark passes it. Range reports read the rollup for the
+-- runs up to the watermark and crawler_runs (primary key range scan) for the
+-- few runs after it, so they touch O(days x retailers) rows and stay exact.
+--
+-- After this migration, run `dealer-report refresh_rollup` once to build the
+-- rollup from the existing runs, then schedule it (e.g. every 15 minutes).
+
+CREATE TABLE IF NOT EXISTS crawler_runs_daily (
+  day           DATE NOT NULL,
+  retailer      VARCHAR(128) NOT NULL,
+  runs          INT NOT NULL,
+  success_runs  INT NOT NULL,
+  total_items   BIGINT NOT NULL DEFAULT 0,
+  ok_items      BIGINT NOT NULL DEFAULT 0,
+  ko_items      BIGINT NOT NULL DEFAULT 0,
+  first_finish  DATETIME NULL,
+  last_finish   DATETIME NULL,
+  PRIMARY KEY (day, retailer),
+  KEY idx_daily_retailer (retailer, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  name               VARCHAR(64) PRIMARY KEY,
+  last_processed_id  BIGINT NOT NULL,
+  updated_at         DATETIME NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO rollup_watermarks (name, last_processed_id) VALUES ('crawler_runs_daily', 0);
@@ -0,0 +1,16 @@
+-- Migration 003: item-weighted rules
+-- MySQL 5.7+ / MariaDB 10.2+
+--
+-- crawler_runs records total_items, ok_items and ko_items for each run. These
+-- thresholds compare the item sums over the report period, so a run that was
+-- 60% KO weighs as such instead of counting as one successful run:
+--
+--   min_item_success_rate   SUM(ok_items) / SUM(total_items) >= threshold
+--   max_ko_rate             SUM(ko_items) / SUM(total_items) <= threshold
+--
+-- Both are fractions like min_success_rate (0.90 = 90%), NULL to disable.
+-- The sums come from crawler_runs_daily (migration 002) when it exists.
+
+ALTER TABLE retailer_rules
+  ADD COLUMN min_item_success_rate FLOAT NULL,
+  ADD COLUMN max_ko_rate FLOAT NULL;
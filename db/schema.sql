@@ -6,7 +6,9 @@ CREATE TABLE IF NOT EXISTS retailer_rules (
   retailer           VARCHAR(128) PRIMARY KEY,
   min_success_rate   FLOAT NULL,   -- e.g. 0.95 for 95%
   min_progress_0930  FLOAT NULL,   -- e.g. 0.10 for 10%
-  include_successes  TINYINT(1) DEFAULT 0
+  include_successes  TINYINT(1) DEFAULT 0,
+  min_item_success_rate FLOAT NULL,  -- e.g. 0.90: ok_items / total_items (migration 003)
+  max_ko_rate        FLOAT NULL    -- e.g. 0.05: ko_items / total_items (migration 003)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- One row per crawler execution
@@ -20,9 +22,19 @@ CREATE TABLE IF NOT EXISTS crawler_runs (
   total_items  INT NULL,
   ok_items     INT NULL,
   ko_items     INT NULL,
+  -- time of day at which the run counts as completed (see db/migrations/001_crawler_runs_completed_time.sql)
+  completed_time TIME GENERATED ALWAYS AS (
+    CASE
+      WHEN finished_at IS NOT NULL AND status IN ('success', 'error')
+        THEN LEAST(TIME(finished_at), TIME(started_at))
+      WHEN finished_at IS NOT NULL THEN TIME(finished_at)
+      WHEN status IN ('success', 'error') THEN TIME(started_at)
+    END
+  ) STORED,
   KEY idx_runs_by_retailer_date (retailer, planned_for),
   KEY idx_runs_started (planned_for, started_at),
-  KEY idx_runs_status (status)
+  KEY idx_runs_status (status),
+  KEY idx_runs_completed (planned_for, retailer, completed_time)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Optional planning table (if you know the expected total per day per retailer)
@@ -32,3 +44,28 @@ CREATE TABLE IF NOT EXISTS runs_plan (
   expected_total INT NOT NULL,
   PRIMARY KEY (plan_date, retailer)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Daily rollup of crawler_runs, maintained by `dealer-report refresh_rollup`
+-- (see db/migrations/002_crawler_runs_daily.sql)
+CREATE TABLE IF NOT EXISTS crawler_runs_daily (
+  day           DATE NOT NULL,
+  retailer      VARCHAR(128) NOT NULL,
+  runs          INT NOT NULL,
+  success_runs  INT NOT NULL,
+  total_items   BIGINT NOT NULL DEFAULT 0,
+  ok_items      BIGINT NOT NULL DEFAULT 0,
+  ko_items      BIGINT NOT NULL DEFAULT 0,
+  first_finish  DATETIME NULL,
+  last_finish   DATETIME NULL,
+  PRIMARY KEY (day, retailer),
+  KEY idx_daily_retailer (retailer, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Last crawler_runs.id aggregated by each incremental job
+CREATE TABLE IF NOT EXISTS rollup_watermarks (
+  name               VARCHAR(64) PRIMARY KEY,
+  last_processed_id  BIGINT NOT NULL,
+  updated_at         DATETIME NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+INSERT IGNORE INTO rollup_watermarks (name, last_processed_id) VALUES ('crawler_runs_daily', 0);
@@ -14,8 +14,8 @@ if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-# Ajouter le dossier parent au path pour importer depuis src
-sys.path.insert(0, str(Path(__file__).parent.parent))
+# Ajouter src/ au path : le package cli s'importe comme depuis le CLI (``cli.services...``)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
 
 def update_env_token(new_token):
     """Met à jour le token JWT dans le fichier .env"""
@@ -58,11 +58,10 @@ def generate_new_jwt_token():
     print("🔑 Génération d'un nouveau token JWT...")
     print("=" * 80)
     
+    email = password = api_base = None
     try:
-        # Importer depuis le module src
-        from src.cli.services.auth import SpiderVisionAuth
+        from cli.services.auth import SpiderVisionAuth
         from dotenv import load_dotenv
-        import os
         
         # Charger et afficher les variables (masquées)
         load_dotenv()
@@ -70,7 +69,7 @@ def generate_new_jwt_token():
         password = os.getenv('SPIDER_VISION_PASSWORD')
         api_base = os.getenv('SPIDER_VISION_API_BASE')
         
-        print(f"📧 Email utilisé: {email[:3]}***{email[-10:] if email else 'NON DÉFINI'}")
+        print(f"📧 Email utilisé: {f'{email[:3]}***{email[-10:]}' if email else 'NON DÉFINI'}")
         print(f"🔐 Password: {'*' * (len(password) if password else 0)} ({len(password) if password else 0} caractères)")
         print(f"🌐 API Base: {api_base}")
         print("=" * 80)
@@ -78,15 +77,28 @@ def generate_new_jwt_token():
         print("🔄 Connexion à l'API SpiderVision...")
         
         auth = SpiderVisionAuth()
+        # Tokens déjà disponibles : login() les réutilise tant qu'ils sont valides
+        known_tokens = {os.getenv('SPIDER_VISION_JWT_TOKEN'), auth.token_cache.load(auth.email)} - {None}
         token = auth.login()
+        if not token:
+            raise RuntimeError("Aucun token obtenu (token pré-configuré absent et credentials manquants)")
         
         print("✅ Authentification réussie !")
         print("=" * 80)
-        print("\n🎉 NOUVEAU TOKEN JWT GÉNÉRÉ :\n")
+        if token in known_tokens:
+            print("\n♻️ TOKEN JWT EXISTANT ENCORE VALIDE, RÉUTILISÉ :\n")
+        else:
+            print("\n🎉 NOUVEAU TOKEN JWT GÉNÉRÉ :\n")
         print("=" * 80)
         print(token[:50] + "..." + token[-20:])  # Afficher partiellement pour sécurité
         print("=" * 80)
         
+        # Token encore valide (en .env ou en cache) : inutile de réécrire le .env
+        if token == os.getenv('SPIDER_VISION_JWT_TOKEN'):
+            print("\n✅ Le token du fichier .env est encore valide, aucune mise à jour nécessaire.")
+            print("=" * 80)
+            return token
+        
         # Mise à jour automatique du fichier .env
         print("\n🔄 Mise à jour automatique du fichier .env...")
         if update_env_token(token):
@@ -276,5 +288,5 @@ Votre rapport sera généré automatiquement tous les jours à 09:30 (heure de P
     print("\nConsultez le fichier GITHUB_ACTIONS_SETUP.md pour les instructions.")
 
 if __name__ == "__main__":
-    # Par défaut, générer un nouveau token JWT
-    generate_new_jwt_token()
+    # Par défaut, générer un nouveau token JWT (code de sortie non nul en cas d'échec)
+    sys.exit(0 if generate_new_jwt_token() else 1)
@@ -5,11 +5,20 @@ from pathlib import Path
 from typing import Optional
 
 import click
-from cli.ioc import get_container
 
 logger = logging.getLogger(__name__)
 
 
+def get_container():
+    """Build the dependency injection container.
+    
+    The container module is imported on demand so that ``--help`` and the
+    subcommands that do not need it start without loading its dependencies.
+    """
+    from cli.ioc import get_container as build_container
+    return build_container()
+
+
 @click.group()
 @click.version_option(version="0.1.0")
 def cli():
@@ -25,8 +34,12 @@ def cli():
 @click.option('--dealer', type=str, help='Filter by specific retailer name.')
 @click.option('--fmt', type=click.Choice(['csv', 'html', 'both']), default='both',
               help='Output format. Default: both')
+@click.option('--workers', type=click.IntRange(min=1),
+              help='Number of retailers evaluated concurrently (uses REPORT_MAX_WORKERS if not specified).')
+@click.option('--no-cache', is_flag=True,
+              help='Bypass the on-disk response cache and always query the API (REPORT_REPOSITORY=web).')
 def generate_dealer_report(date_from: Optional[datetime], date_to: Optional[datetime], 
-                          dealer: Optional[str], fmt: str):
+                          dealer: Optional[str], fmt: str, workers: Optional[int], no_cache: bool):
     """Generate dealer anomaly report from MySQL data.
     
     Produces CSV and/or HTML reports based on retailer rules for success rate
@@ -43,10 +56,25 @@ def generate_dealer_report(date_from: Optional[datetime], date_to: Optional[date
         
         # Generate HTML report for specific retailer
         dealer-report generate_dealer_report --dealer Carrefour --fmt html
+        
+        # Evaluate retailers sequentially
+        dealer-report generate_dealer_report --workers 1
+        
+        # Ignore the cached API responses
+        dealer-report generate_dealer_report --no-cache
     """
     try:
         container = get_container()
+        if no_cache:
+            # Only the Spider Vision repository caches its responses
+            if container.report_repository_kind() == 'web':
+                container.web_data_repository.add_kwargs(use_cache=False)
+            else:
+                click.echo("Warning: --no-cache has no effect unless REPORT_REPOSITORY=web "
+                           "(MySQL data is not cached).", err=True)
         report_service = container.report_service()
+        if workers:
+            report_service.max_workers = workers
         
         # Convert datetime to date
         date_from_val = date_from.date() if date_from else None
@@ -116,6 +144,62 @@ def publish_report(path: Path, bucket: Optional[str], dst: Optional[str]):
         raise click.ClickException(f"Report publishing failed: {e}")
 
 
+@cli.command()
+@click.option('--source', type=str, required=True,
+              help='Directory or glob pattern of the files to upload (e.g. "reports/*.html").')
+@click.option('--bucket', type=str, help='GCS bucket name (uses default if not specified).')
+@click.option('--prefix', type=str, help='Destination prefix in GCS. Defaults to reports/YYYY/MM/DD.')
+@click.option('--workers', type=click.IntRange(min=1),
+              help='Number of concurrent uploads (uses GCS_UPLOAD_WORKERS if not specified).')
+@click.option('--force', is_flag=True, help='Upload files even when the remote checksum matches.')
+def publish_batch(source: str, bucket: Optional[str], prefix: Optional[str], workers: Optional[int], force: bool):
+    """Upload many reports to Google Cloud Storage concurrently.
+    
+    Publishes every HTML, CSV and history archive of a directory (or the
+    files matching a glob). Files already present in GCS with the same
+    checksum are skipped, so an interrupted batch can be run again.
+    
+    Examples:
+    
+        # Upload the whole reports directory
+        dealer-report publish_batch --source ./reports
+        
+        # Upload the HTML reports of a month under a custom prefix
+        dealer-report publish_batch --source "reports/*202401*.html" --prefix reports/archive/2024-01
+    """
+    try:
+        container = get_container()
+        gcs_publisher = container.gcs_publisher()
+        
+        # Generate destination prefix if not provided
+        if prefix is None:
+            now = datetime.utcnow()
+            prefix = f"reports/{now.year:04d}/{now.month:02d}/{now.day:02d}"
+        
+        results = gcs_publisher.publish_batch(source, prefix, bucket, skip_unchanged=not force,
+                                              max_workers=workers)
+        if not results:
+            raise click.ClickException(f"No files to publish in {source}")
+        
+        counts = {}
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+            if result.status == 'failed':
+                click.echo(f"Failed: {result.src_path} ({result.error})", err=True)
+        
+        click.echo("Published {} file(s): {}".format(
+            len(results), ', '.join(f"{count} {status}" for status, count in sorted(counts.items()))))
+        
+        if counts.get('failed'):
+            raise click.ClickException(f"{counts['failed']} file(s) failed to upload")
+        
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to publish reports: {e}")
+        raise click.ClickException(f"Batch publishing failed: {e}")
+
+
 @cli.command()
 @click.option('--url', type=str, required=True,
               help='URL to include in the Teams message (typically the GCS report URL).')
@@ -169,7 +253,9 @@ def push_notification_on_teams(url: str, message: Optional[str], channel_webhook
 @click.option('--format', type=click.Choice(['csv', 'excel', 'html']), default='csv',
               help='Output format. Default: csv')
 @click.option('--output', type=str, help='Output filename (auto-generated if not specified).')
-def fetch_overview(email: Optional[str], password: Optional[str], format: str, output: Optional[str]):
+@click.option('--no-cache', is_flag=True, help='Bypass the on-disk response cache and always query the API.')
+def fetch_overview(email: Optional[str], password: Optional[str], format: str, output: Optional[str],
+                   no_cache: bool):
     """Fetch overview data from SpiderVision API and export to CSV/Excel.
     
     Authenticates with SpiderVision API using JWT, retrieves overview data,
@@ -185,6 +271,9 @@ def fetch_overview(email: Optional[str], password: Optional[str], format: str, o
         
         # Use custom credentials and output file
         dealer-report fetch_overview --email user@example.com --password secret --output my_data.csv
+        
+        # Ignore the cached overview
+        dealer-report fetch_overview --no-cache
     """
     try:
         from cli.services.auth import SpiderVisionAuth
@@ -193,7 +282,7 @@ def fetch_overview(email: Optional[str], password: Optional[str], format: str, o
         
         # Initialize services
         auth = SpiderVisionAuth()
-        data_service = SpiderVisionData()
+        data_service = SpiderVisionData(auth=auth, use_cache=False if no_cache else None)
         exporter = DataExporter()
         
         # Override credentials if provided
@@ -238,5 +327,140 @@ def fetch_overview(email: Optional[str], password: Optional[str], format: str, o
         raise click.ClickException(f"Overview fetch failed: {e}")
 
 
+@cli.command()
+@click.option('--store-id', 'store_ids', type=str, multiple=True,
+              help='Store ID to fetch (repeatable).')
+@click.option('--ids-file', type=click.Path(exists=True, path_type=Path),
+              help='File with one store ID per line.')
+@click.option('--concurrency', type=click.IntRange(min=1),
+              help='Maximum concurrent requests (default: SPIDER_VISION_ASYNC_CONCURRENCY or 20).')
+@click.option('--deadline', type=click.FloatRange(min=0),
+              help='Overall time budget in seconds; unfinished requests are cancelled.')
+@click.option('--output', type=click.Path(path_type=Path), required=True,
+              help='JSON file receiving the history of each store.')
+def fetch_store_histories(store_ids: tuple, ids_file: Optional[Path], concurrency: Optional[int],
+                          deadline: Optional[float], output: Path):
+    """Fetch the store history of many stores concurrently (requires aiohttp).
+    
+    Stores that fail or do not answer before the deadline are left out of
+    the output and reported in the summary line.
+    
+    Examples:
+    
+        # Fetch two stores
+        dealer-report fetch_store_histories --store-id 123 --store-id 456 --output histories.json
+        
+        # Fetch every store listed in a file within 10 minutes
+        dealer-report fetch_store_histories --ids-file stores.txt --deadline 600 --output histories.json
+    """
+    try:
+        import json
+        from cli.services.auth import SpiderVisionAuth
+        from cli.services.async_data import fetch_store_histories as fetch_histories
+        
+        ids = list(store_ids)
+        if ids_file:
+            ids.extend(line.strip() for line in ids_file.read_text(encoding='utf-8').splitlines() if line.strip())
+        if not ids:
+            raise click.BadParameter("Provide at least one --store-id or an --ids-file")
+        
+        auth = SpiderVisionAuth()
+        token = auth.login()
+        
+        histories = fetch_histories(token, ids, deadline=deadline, auth=auth, max_concurrency=concurrency)
+        
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(histories, ensure_ascii=False), encoding='utf-8')
+        
+        click.echo(f"Fetched {len(histories)}/{len(set(ids))} store histories -> {output}")
+        
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to fetch store histories: {e}")
+        raise click.ClickException(f"Store history fetch failed: {e}")
+
+
+@cli.command()
+@click.option('--dealer', type=str, help='Dealer name (lists the latest metrics of every dealer if omitted).')
+@click.option('--days', type=click.IntRange(min=1), default=90, show_default=True,
+              help='Number of days of history to show.')
+@click.option('--daily', is_flag=True, help='Show one averaged line per day instead of every run.')
+@click.option('--db', 'db_path', type=click.Path(path_type=Path),
+              help='Metrics database (uses DEALER_REPORT_METRICS_DB if not specified).')
+def metrics_history(dealer: Optional[str], days: int, daily: bool, db_path: Optional[Path]):
+    """Show the metrics recorded by previous report runs.
+    
+    Every run of generate_new_report.py appends the progress, success and
+    store counters of each dealer to a local SQLite database.
+    
+    Examples:
+    
+        # Latest recorded metrics of every dealer
+        dealer-report metrics_history
+        
+        # Daily trend of one dealer over six months
+        dealer-report metrics_history --dealer Carrefour --days 180 --daily
+    """
+    try:
+        from datetime import timedelta
+        from cli.repository.MetricsStore import MetricsStore
+        
+        with MetricsStore(str(db_path) if db_path else None) as store:
+            if not dealer:
+                for row in store.latest():
+                    click.echo(f"{row['run_at']}  {row['dealer']:<40} progress {row['progress']:6.1f}%  "
+                               f"success {row['success']:6.1f}%")
+                return
+            
+            since = datetime.now() - timedelta(days=days)
+            rows = store.daily_averages(dealer, since) if daily else store.history(dealer, since)
+            if not rows:
+                raise click.ClickException(f"No metrics recorded for {dealer} in the last {days} day(s)")
+            for row in rows:
+                click.echo(f"{row['day'] if daily else row['run_at']}  progress {row['progress']:6.1f}%  "
+                           f"success {row['success']:6.1f}%")
+        
+    except click.ClickException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to read metrics history: {e}")
+        raise click.ClickException(f"Metrics history failed: {e}")
+
+
+@cli.command()
+@click.option('--full', is_flag=True, help='Empty the rollup and rebuild it from every run.')
+def refresh_rollup(full: bool):
+    """Update the crawler_runs_daily rollup used by date range reports.
+    
+    Only the runs added since the previous refresh are aggregated (runs
+    still queued or running are picked up by a later refresh). Schedule it
+    every few minutes, before generate_dealer_report.
+    
+    Examples:
+    
+        # Roll up the new runs
+        dealer-report refresh_rollup
+        
+        # Rebuild the rollup after correcting past runs
+        dealer-report refresh_rollup --full
+    """
+    container = None
+    try:
+        container = get_container()
+        rollup = container.crawler_runs_rollup()
+        
+        run_count = rollup.rebuild() if full else rollup.refresh()
+        click.echo(f"Rolled up {run_count} run(s), watermark at id {rollup.watermark()}")
+        
+    except Exception as e:
+        logger.error(f"Failed to refresh the rollup: {e}")
+        raise click.ClickException(f"Rollup refresh failed: {e}")
+    finally:
+        # Close the pooled connections, also after a failed batch
+        if container is not None:
+            container.shutdown_resources()
+
+
 if __name__ == '__main__':
     cli()
@@ -1,6 +1,10 @@
-"""Database connection factory using PyMySQL."""
+"""Database connection factory and connection pool using PyMySQL."""
 import logging
-from typing import Any, Dict
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Tuple
 import pymysql
 from pymysql.cursors import DictCursor
 
@@ -43,3 +47,167 @@ class DatabaseConnection:
         except pymysql.Error as e:
             logger.error(f"Failed to connect to database: {e}")
             raise
+
+
+class ConnectionPool:
+    """Thread-safe pool of connections created by a DatabaseConnection.
+    
+    Connections are checked out with ``connection()`` and returned to the
+    pool instead of being closed, so concurrent report workers reuse warm
+    connections rather than paying connect, auth and TLS for every query.
+    A connection is pinged (reconnecting if needed) on checkout, and idle
+    connections above ``min_size`` are closed after ``max_idle_seconds``.
+    
+    The pool also exposes ``cursor()``, so repositories written against a
+    single connection (``with self.connection.cursor() as cursor``) can be
+    given the pool instead: each block then runs on its own connection.
+    """
+    
+    def __init__(self, factory: DatabaseConnection, min_size: int = 1, max_size: int = 8,
+                 max_idle_seconds: float = 300.0, timeout: float = 30.0):
+        """Initialize the pool and open ``min_size`` connections.
+        
+        Args:
+            factory: Factory opening new connections
+            min_size: Connections kept open even when idle
+            max_size: Maximum number of open connections
+            max_idle_seconds: Idle time after which a connection above min_size is closed
+            timeout: Seconds to wait for a free connection when max_size is reached
+        """
+        if max_size < 1 or not 0 <= min_size <= max_size:
+            raise ValueError(f"Invalid pool size: min_size={min_size}, max_size={max_size}")
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        self._condition = threading.Condition()
+        # Idle connections with the time they were returned, most recent last
+        self._idle: Deque[Tuple[pymysql.Connection, float]] = deque()
+        # Open connections, idle or checked out
+        self._size = 0
+        self._closed = False
+        
+        for _ in range(min_size):
+            self._idle.append((self.factory.create_connection(), time.monotonic()))
+            self._size += 1
+    
+    @property
+    def size(self) -> int:
+        """Number of open connections (idle or checked out)."""
+        return self._size
+    
+    @property
+    def idle(self) -> int:
+        """Number of idle connections."""
+        return len(self._idle)
+    
+    def _evict_idle(self) -> List[pymysql.Connection]:
+        """Remove the connections idle for too long (called with the lock held)."""
+        expired = []
+        now = time.monotonic()
+        while (self._idle and self._size > self.min_size
+               and now - self._idle[0][1] > self.max_idle_seconds):
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+    
+    def _acquire(self) -> pymysql.Connection:
+        """Take an idle connection, or open one if the pool is below max_size."""
+        deadline = time.monotonic() + self.timeout
+        connection = None
+        expired = []
+        try:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+                    expired += self._evict_idle()
+                    if self._idle:
+                        connection = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No database connection available after {self.timeout}s "
+                                           f"({self.max_size} in use)")
+                    self._condition.wait(remaining)
+        finally:
+            for stale in expired:
+                _close_quietly(stale)
+        
+        if connection is not None:
+            try:
+                connection.ping(reconnect=True)
+                return connection
+            except pymysql.Error as e:
+                logger.warning(f"Discarding broken database connection: {e}")
+                _close_quietly(connection)
+        try:
+            return self.factory.create_connection()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+    
+    def _release(self, connection: pymysql.Connection):
+        """Return a connection to the pool (closed if the pool is closed or the connection is)."""
+        with self._condition:
+            keep = not self._closed and getattr(connection, 'open', True)
+            if keep:
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+            self._condition.notify()
+        if not keep:
+            _close_quietly(connection)
+    
+    @contextmanager
+    def connection(self) -> Iterator[pymysql.Connection]:
+        """Check out a connection for the duration of the ``with`` block.
+        
+        Raises:
+            TimeoutError: If no connection frees up within ``timeout`` seconds
+            pymysql.Error: If a new connection cannot be opened
+        """
+        connection = self._acquire()
+        try:
+            yield connection
+        finally:
+            self._release(connection)
+    
+    @contextmanager
+    def cursor(self) -> Iterator[DictCursor]:
+        """Cursor of a checked-out connection, used like ``connection.cursor()``."""
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                yield cursor
+    
+    def close(self):
+        """Close the idle connections; checked-out ones are closed when returned."""
+        with self._condition:
+            self._closed = True
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection in idle:
+            _close_quietly(connection)
+        logger.info("Database connection pool closed")
+    
+    def __enter__(self) -> "ConnectionPool":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _close_quietly(connection: pymysql.Connection):
+    """Close a connection, ignoring errors on an already broken socket."""
+    try:
+        connection.close()
+    except Exception:
+        pass
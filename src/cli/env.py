@@ -0,0 +1,14 @@
+"""Environment loading shared by the CLI, the container and the services."""
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=None)
+def load_env() -> bool:
+    """Load the .env file once per process; later calls are no-ops.
+    
+    Returns:
+        True if a .env file was found and loaded
+    """
+    return load_dotenv()
@@ -1,21 +1,48 @@
 """Dependency injection container for the dealer-report application."""
+import importlib
 import logging
 import os
+from typing import Callable
+
 from dependency_injector import containers, providers
-from dotenv import load_dotenv
 
-from cli.repository.MockDataRepository import MockDataRepository
-from cli.repository.WebDataRepository import WebDataRepository
-from cli.services.ReportService import ReportService
-from cli.services.GcsPublisher import GcsPublisher
-from cli.services.TeamsNotifier import TeamsNotifier
+from cli.env import load_env
 
 # Load environment variables
-load_dotenv()
+load_env()
 
 logger = logging.getLogger(__name__)
 
 
+def _lazy(path: str) -> Callable:
+    """Return a factory that imports ``module.attribute`` on first call.
+    
+    Providers are declared with lazy factories so that importing the container
+    does not import GCS, BeautifulSoup or the report renderers: each
+    subcommand only pays for the services it actually resolves.
+    
+    Args:
+        path: Dotted path of the class or function to call
+    """
+    module_name, _, attribute = path.rpartition('.')
+    
+    def factory(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), attribute)(*args, **kwargs)
+    
+    factory.__name__ = factory.__qualname__ = attribute
+    factory.__doc__ = f"Lazily import and call {path}."
+    return factory
+
+
+def _connection_pool(**kwargs):
+    """Open the shared database connection pool, closed by ``shutdown_resources()``."""
+    pool = _lazy('cli.db.connection.ConnectionPool')(**kwargs)
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+
 class Container(containers.DeclarativeContainer):
     """Dependency injection container."""
     
@@ -27,6 +54,14 @@ class Container(containers.DeclarativeContainer):
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     
+    # Shared HTTP session (connection pooling, keep-alive, retries with backoff)
+    http_session = providers.Singleton(
+        _lazy('cli.services.http_session.create_session'),
+        pool_size=int(os.getenv('HTTP_POOL_SIZE', '10')),
+        max_retries=int(os.getenv('HTTP_MAX_RETRIES', '3')),
+        backoff_factor=float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+    )
+    
     # Spider Vision configuration
     spider_vision_url = providers.Object(
         os.getenv('SPIDER_VISION_URL', 'https://spider-vision.data-solutions.com/')
@@ -42,15 +77,63 @@ class Container(containers.DeclarativeContainer):
     
     # Repository for retrieving data (using mock data for now)
     mock_data_repository = providers.Singleton(
-        MockDataRepository
+        _lazy('cli.repository.MockDataRepository.MockDataRepository')
+    )
+    
+    # Persistent cache of the Spider Vision endpoints discovered by probing
+    endpoint_cache = providers.Singleton(
+        _lazy('cli.repository.EndpointDiscoveryCache.EndpointDiscoveryCache'),
+        path=os.getenv('SPIDER_VISION_ENDPOINT_CACHE'),
+        ttl_seconds=int(os.getenv('SPIDER_VISION_ENDPOINT_CACHE_TTL', '86400'))
     )
     
     # Repository for retrieving real data from Spider Vision
     web_data_repository = providers.Singleton(
-        WebDataRepository,
+        _lazy('cli.repository.WebDataRepository.WebDataRepository'),
         base_url=spider_vision_url,
         username=spider_vision_username,
-        password=spider_vision_password
+        password=spider_vision_password,
+        endpoint_cache=endpoint_cache,
+        session=http_session
+    )
+    
+    # MySQL configuration
+    db_config = providers.Object({
+        'DB_HOST': os.getenv('DB_HOST', 'localhost'),
+        'DB_PORT': os.getenv('DB_PORT', '3306'),
+        'DB_USER': os.getenv('DB_USER', ''),
+        'DB_PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'DB_NAME': os.getenv('DB_NAME', '')
+    })
+    
+    database_connection = providers.Singleton(
+        _lazy('cli.db.connection.DatabaseConnection'),
+        config=db_config
+    )
+    
+    # Connections shared by the report workers (pinged on checkout, idle ones evicted)
+    db_pool = providers.Resource(
+        _connection_pool,
+        factory=database_connection,
+        min_size=int(os.getenv('DB_POOL_MIN_SIZE', '1')),
+        max_size=int(os.getenv('DB_POOL_MAX_SIZE', '8')),
+        max_idle_seconds=float(os.getenv('DB_POOL_MAX_IDLE', '300')),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    )
+    
+    # Repository for the MySQL retailer rules and crawler runs
+    incident_repository = providers.Singleton(
+        _lazy('cli.repository.IncidentRepository.IncidentRepository'),
+        connection=db_pool
+    )
+    
+    # Incremental daily rollup of crawler_runs (refresh_rollup command)
+    crawler_runs_rollup = providers.Singleton(
+        _lazy('cli.repository.CrawlerRunsRollup.CrawlerRunsRollup'),
+        connection=db_pool,
+        batch_size=int(os.getenv('ROLLUP_BATCH_SIZE', '50000')),
+        settle_minutes=int(os.getenv('ROLLUP_SETTLE_MINUTES', '10')),
+        stale_hours=int(os.getenv('ROLLUP_STALE_HOURS', '24'))
     )
     
     # GCP configuration
@@ -88,6 +171,34 @@ class Container(containers.DeclarativeContainer):
         os.getenv('INCLUDE_SUCCESSES', 'false').lower() == 'true'
     )
     
+    report_max_workers = providers.Object(
+        int(os.getenv('REPORT_MAX_WORKERS', '8'))
+    )
+    
+    gcs_backend = providers.Object(
+        os.getenv('GCS_BACKEND', 'gcs')
+    )
+    
+    gcs_local_root = providers.Object(
+        os.getenv('GCS_LOCAL_ROOT')
+    )
+    
+    gcs_upload_workers = providers.Object(
+        int(os.getenv('GCS_UPLOAD_WORKERS', '8'))
+    )
+    
+    gcs_upload_chunk_size = providers.Object(
+        int(os.getenv('GCS_UPLOAD_CHUNK_SIZE', str(8 * 1024 * 1024)))
+    )
+    
+    gcs_cache_control = providers.Object(
+        os.getenv('GCS_CACHE_CONTROL', 'public, max-age=3600')
+    )
+    
+    gcs_latest_cache_control = providers.Object(
+        os.getenv('GCS_LATEST_CACHE_CONTROL', 'no-cache')
+    )
+    
     gcs_latest_html_path = providers.Object(
         os.getenv('GCS_LATEST_HTML_PATH', 'reports/daily/dealer-report-latest.html')
     )
@@ -100,25 +211,51 @@ class Container(containers.DeclarativeContainer):
         INCLUDE_SUCCESSES=include_successes
     )
     
+    # Repository read by generate_dealer_report: 'mysql' (retailer_rules and
+    # crawler_runs, every rule type) or 'web' (Spider Vision API)
+    report_repository_kind = providers.Object(
+        os.getenv('REPORT_REPOSITORY', 'mysql')
+    )
+    
+    report_repository = providers.Selector(
+        report_repository_kind,
+        mysql=incident_repository,
+        web=web_data_repository
+    )
+    
     # Services
     report_service = providers.Singleton(
-        ReportService,
-        repository=web_data_repository,  # Utiliser les vraies données Spider Vision
+        _lazy('cli.services.ReportService.ReportService'),
+        repository=report_repository,
         output_dir=reports_dir,
         tz=timezone,
-        include_successes=include_successes
+        include_successes=include_successes,
+        max_workers=report_max_workers
+    )
+    
+    storage_backend = providers.Singleton(
+        _lazy('cli.services.StorageBackend.create_backend'),
+        kind=gcs_backend,
+        project=gcp_project,
+        local_root=gcs_local_root
     )
     
     gcs_publisher = providers.Singleton(
-        GcsPublisher,
+        _lazy('cli.services.GcsPublisher.GcsPublisher'),
         default_bucket=gcs_bucket,
-        gcp_project=gcp_project
+        gcp_project=gcp_project,
+        max_workers=gcs_upload_workers,
+        chunk_size=gcs_upload_chunk_size,
+        backend=storage_backend,
+        cache_control=gcs_cache_control,
+        latest_cache_control=gcs_latest_cache_control
     )
     
     teams_notifier = providers.Singleton(
-        TeamsNotifier,
+        _lazy('cli.services.TeamsNotifier.TeamsNotifier'),
         webhook_url=teams_webhook_url,
-        default_message=teams_default_message
+        default_message=teams_default_message,
+        session=http_session
     )
 
 
@@ -0,0 +1,197 @@
+"""Incremental daily rollup of crawler_runs (crawler_runs_daily)."""
+import logging
+from contextlib import contextmanager, nullcontext
+from typing import Optional
+
+from cli.db.connection import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_NAME = 'crawler_runs_daily'
+
+# Last crawler_runs.id included in the rollup (0 when the watermark row is missing)
+ROLLUP_WATERMARK = (
+    f"COALESCE((SELECT last_processed_id FROM rollup_watermarks WHERE name = '{ROLLUP_NAME}'), 0)"
+)
+
+# Statuses a run can still leave: the watermark stops before such runs
+PENDING_STATUSES = ('running', 'queued')
+
+
+class CrawlerRunsRollup:
+    """Maintains crawler_runs_daily from the runs added since the last refresh.
+
+    Each batch aggregates the runs with ``last_processed_id < id <= upper``
+    per retailer and day, adds them to the existing rollup rows and moves the
+    watermark to ``upper``, in one transaction.
+
+    ``upper`` is bounded twice:
+
+    - it is the highest id of a run started at least ``settle_minutes`` ago,
+      so a run whose insert commits after a higher id (out-of-order commit)
+      is visible before the watermark passes it;
+    - it never passes a run that is still queued or running, so a run is
+      rolled up once, with its final status. A run pending for more than
+      ``stale_hours`` is considered dead and rolled up as it is, so that it
+      does not hold the watermark back forever (``rebuild`` corrects the
+      rollup if such a run finishes after all).
+
+    Runs with a final status are assumed not to change.
+    """
+
+    def __init__(self, connection, batch_size: int = 50000, settle_minutes: int = 10, stale_hours: int = 24):
+        """Initialize with a database connection or a ConnectionPool.
+
+        Args:
+            connection: PyMySQL connection or ConnectionPool
+            batch_size: Maximum number of run ids aggregated per transaction
+            settle_minutes: Minimum age of the runs a batch includes (commit lag)
+            stale_hours: Age after which a queued or running run no longer holds the watermark
+        """
+        self.connection = connection
+        self.batch_size = batch_size
+        self.settle_minutes = settle_minutes
+        self.stale_hours = stale_hours
+
+    @contextmanager
+    def _transaction(self):
+        """Cursor of a transaction on a single connection."""
+        checkout = self.connection.connection() if isinstance(self.connection, ConnectionPool) \
+            else nullcontext(self.connection)
+        with checkout as connection:
+            connection.begin()
+            try:
+                with connection.cursor() as cursor:
+                    yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+    def watermark(self) -> int:
+        """Return the last crawler_runs.id included in the rollup."""
+        with self._transaction() as cursor:
+            cursor.execute(f"SELECT {ROLLUP_WATERMARK} as last_processed_id")
+            return int(cursor.fetchone()['last_processed_id'])
+
+    def _refresh_batch(self) -> Optional[int]:
+        """Roll up the next batch of runs.
+
+        Returns:
+            Number of runs rolled up, or None when the rollup is up to date
+        """
+        with self._transaction() as cursor:
+            # Lock the watermark: concurrent refreshes run one after the other
+            cursor.execute(
+                "SELECT last_processed_id FROM rollup_watermarks WHERE name = %s FOR UPDATE",
+                (ROLLUP_NAME,)
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(
+                    "INSERT INTO rollup_watermarks (name, last_processed_id) VALUES (%s, 0)",
+                    (ROLLUP_NAME,)
+                )
+                watermark = 0
+            else:
+                watermark = int(row['last_processed_id'])
+
+            # Settled runs only (their lower ids are committed), and live pending runs
+            cursor.execute(
+                """
+                    SELECT
+                        MAX(CASE WHEN started_at <= NOW() - INTERVAL %s MINUTE THEN id END) as max_id,
+                        MIN(CASE WHEN status IN %s AND started_at > NOW() - INTERVAL %s HOUR
+                            THEN id END) as first_pending_id
+                    FROM crawler_runs
+                    WHERE id > %s
+                """,
+                (self.settle_minutes, PENDING_STATUSES, self.stale_hours, watermark)
+            )
+            bounds = cursor.fetchone()
+            if not bounds or bounds['max_id'] is None:
+                return None
+            upper = min(int(bounds['max_id']), watermark + self.batch_size)
+            if bounds['first_pending_id'] is not None:
+                upper = min(upper, int(bounds['first_pending_id']) - 1)
+            if upper <= watermark:
+                return None
+
+            cursor.execute(
+                """
+                    INSERT INTO crawler_runs_daily
+                        (day, retailer, runs, success_runs, total_items, ok_items, ko_items,
+                         first_finish, last_finish)
+                    SELECT
+                        planned_for,
+                        retailer,
+                        COUNT(*),
+                        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END),
+                        COALESCE(SUM(total_items), 0),
+                        COALESCE(SUM(ok_items), 0),
+                        COALESCE(SUM(ko_items), 0),
+                        MIN(finished_at),
+                        MAX(finished_at)
+                    FROM crawler_runs
+                    WHERE id > %s AND id <= %s
+                    GROUP BY planned_for, retailer
+                    ON DUPLICATE KEY UPDATE
+                        runs = runs + VALUES(runs),
+                        success_runs = success_runs + VALUES(success_runs),
+                        total_items = total_items + VALUES(total_items),
+                        ok_items = ok_items + VALUES(ok_items),
+                        ko_items = ko_items + VALUES(ko_items),
+                        first_finish = COALESCE(LEAST(first_finish, VALUES(first_finish)),
+                                                first_finish, VALUES(first_finish)),
+                        last_finish = COALESCE(GREATEST(last_finish, VALUES(last_finish)),
+                                               last_finish, VALUES(last_finish))
+                """,
+                (watermark, upper)
+            )
+            cursor.execute(
+                "SELECT COUNT(*) as run_count FROM crawler_runs WHERE id > %s AND id <= %s",
+                (watermark, upper)
+            )
+            run_count = int(cursor.fetchone()['run_count'])
+            cursor.execute(
+                "UPDATE rollup_watermarks SET last_processed_id = %s, updated_at = NOW() WHERE name = %s",
+                (upper, ROLLUP_NAME)
+            )
+            logger.info(f"Rolled up {run_count} run(s) (ids {watermark + 1}-{upper})")
+            return run_count
+
+    def refresh(self) -> int:
+        """Roll up every run added since the last refresh.
+
+        Returns:
+            Number of runs rolled up
+
+        Raises:
+            pymysql.Error: If a batch fails (previous batches stay committed)
+        """
+        total = 0
+        while True:
+            run_count = self._refresh_batch()
+            if run_count is None:
+                return total
+            total += run_count
+
+    def rebuild(self) -> int:
+        """Empty the rollup and build it again from every run.
+
+        Returns:
+            Number of runs rolled up
+        """
+        with self._transaction() as cursor:
+            # Reset the watermark first: its row lock keeps a concurrent refresh out
+            cursor.execute(
+                """
+                    INSERT INTO rollup_watermarks (name, last_processed_id, updated_at)
+                    VALUES (%s, 0, NOW())
+                    ON DUPLICATE KEY UPDATE last_processed_id = 0, updated_at = NOW()
+                """,
+                (ROLLUP_NAME,)
+            )
+            cursor.execute("DELETE FROM crawler_runs_daily")
+        logger.info("Rollup emptied, rebuilding from every run")
+        return self.refresh()
@@ -0,0 +1,101 @@
+"""Cache persistant des endpoints Spider Vision découverts par sondage."""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointDiscoveryCache:
+    """Mémorise sur disque quel endpoint répond pour chaque type de données.
+
+    Deux informations sont conservées, chacune avec un horodatage et une TTL :
+    - ``endpoints`` : type de données -> modèle d'endpoint qui a répondu 200
+    - ``missing`` : endpoints qui ont répondu 404
+
+    Les modèles contiennent ``{retailer}`` à la place du nom du retailer afin
+    qu'une découverte faite pour un retailer profite à tous les autres. Les 404
+    d'un modèle avec ``{retailer}`` sont enregistrés par URL formatée : ils ne
+    concernent que le retailer interrogé.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        cache_dir = os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')
+        self.path = Path(path or os.getenv('SPIDER_VISION_ENDPOINT_CACHE',
+                                           os.path.join(cache_dir, 'endpoint_discovery.json')))
+        self.ttl_seconds = int(ttl_seconds if ttl_seconds is not None
+                               else os.getenv('SPIDER_VISION_ENDPOINT_CACHE_TTL', '86400'))
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, dict]]:
+        """Charger le cache depuis le disque (cache vide si absent ou illisible)"""
+        data = {'endpoints': {}, 'missing': {}}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            if isinstance(stored, dict):
+                data['endpoints'].update(stored.get('endpoints', {}))
+                data['missing'].update(stored.get('missing', {}))
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache des endpoints illisible ({self.path}), il sera reconstruit: {e}")
+        return data
+
+    def _save(self):
+        """Écrire le cache de manière atomique (appelé sous verrou)"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache des endpoints ({self.path}): {e}")
+
+    def _is_fresh(self, entry: Optional[dict]) -> bool:
+        return bool(entry) and (time.time() - entry.get('ts', 0)) < self.ttl_seconds
+
+    def get(self, kind: str) -> Optional[str]:
+        """Retourner le modèle d'endpoint connu pour ce type de données, s'il est encore valide"""
+        with self._lock:
+            entry = self._data['endpoints'].get(kind)
+            return entry['endpoint'] if self._is_fresh(entry) else None
+
+    def remember(self, kind: str, endpoint: str):
+        """Enregistrer l'endpoint qui a répondu pour ce type de données"""
+        with self._lock:
+            entry = self._data['endpoints'].get(kind)
+            if self._is_fresh(entry) and entry['endpoint'] == endpoint:
+                return
+            self._data['endpoints'][kind] = {'endpoint': endpoint, 'ts': time.time()}
+            self._data['missing'].pop(endpoint, None)
+            self._save()
+
+    def forget(self, kind: str):
+        """Oublier l'endpoint d'un type de données (il a échoué), pour forcer un nouveau sondage"""
+        with self._lock:
+            if self._data['endpoints'].pop(kind, None) is not None:
+                self._save()
+
+    def is_missing(self, endpoint: str) -> bool:
+        """Vrai si cet endpoint (modèle global ou URL d'un retailer) a répondu 404 récemment"""
+        with self._lock:
+            return self._is_fresh(self._data['missing'].get(endpoint))
+
+    def mark_missing(self, endpoint: str):
+        """Enregistrer qu'un endpoint (modèle global ou URL d'un retailer) a répondu 404"""
+        with self._lock:
+            self._data['missing'][endpoint] = {'ts': time.time()}
+            self._save()
+
+    def clear(self):
+        """Vider le cache (mémoire et disque)"""
+        with self._lock:
+            self._data = {'endpoints': {}, 'missing': {}}
+            self._save()
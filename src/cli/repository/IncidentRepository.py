@@ -2,11 +2,118 @@
 import logging
 from dataclasses import dataclass
 from datetime import date, datetime, time
-from typing import List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 import pymysql
+from pymysql.constants import ER
+
+from cli.repository.CrawlerRunsRollup import ROLLUP_WATERMARK
 
 logger = logging.getLogger(__name__)
 
+# A run counts as completed by a given time when it finished by then, or when it
+# has a final status and started by then (finished_at is not always recorded).
+# crawler_runs.completed_time stores the earliest of these times and is indexed
+# (db/migrations/001_crawler_runs_completed_time.sql), so the condition is a range scan
+COMPLETED_BY_TIME = "completed_time <= %s"
+
+# Same condition without the generated column (database not migrated yet)
+LEGACY_COMPLETED_BY_TIME = """(
+    (finished_at IS NOT NULL AND TIME(finished_at) <= %s)
+    OR
+    (status IN ('success', 'error') AND TIME(started_at) <= %s)
+)"""
+
+# Success and run counts per retailer between two days: crawler_runs_daily for the
+# runs up to the rollup watermark, crawler_runs (primary key range) for the newer
+# ones (db/migrations/002_crawler_runs_daily.sql)
+ROLLUP_SUCCESS_COUNTERS = f"""
+    SELECT
+        retailer,
+        SUM(success_count) as success_count,
+        SUM(total_count) as total_count
+    FROM (
+        SELECT retailer, success_runs as success_count, runs as total_count
+        FROM crawler_runs_daily
+        WHERE day >= %s AND day <= %s{{condition}}
+        UNION ALL
+        SELECT retailer, CASE WHEN status = 'success' THEN 1 ELSE 0 END, 1
+        FROM crawler_runs
+        WHERE id > {ROLLUP_WATERMARK}
+        AND planned_for >= %s AND planned_for <= %s{{condition}}
+    ) counters
+    GROUP BY retailer
+"""
+
+# Same counters aggregated from the raw runs (rollup tables not created yet)
+RAW_SUCCESS_COUNTERS = """
+    SELECT 
+        retailer,
+        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success_count,
+        COUNT(*) as total_count
+    FROM crawler_runs 
+    WHERE planned_for >= %s 
+    AND planned_for <= %s{condition}
+    GROUP BY retailer
+"""
+
+# Item counters per retailer between two days (rollup up to the watermark, then raw runs)
+ROLLUP_ITEM_COUNTERS = f"""
+    SELECT
+        retailer,
+        SUM(total_items) as total_items,
+        SUM(ok_items) as ok_items,
+        SUM(ko_items) as ko_items,
+        SUM(run_count) as run_count
+    FROM (
+        SELECT retailer, total_items, ok_items, ko_items, runs as run_count
+        FROM crawler_runs_daily
+        WHERE day >= %s AND day <= %s{{condition}}
+        UNION ALL
+        SELECT retailer, COALESCE(total_items, 0), COALESCE(ok_items, 0), COALESCE(ko_items, 0), 1
+        FROM crawler_runs
+        WHERE id > {ROLLUP_WATERMARK}
+        AND planned_for >= %s AND planned_for <= %s{{condition}}
+    ) items
+    GROUP BY retailer
+"""
+
+RAW_ITEM_COUNTERS = """
+    SELECT
+        retailer,
+        COALESCE(SUM(total_items), 0) as total_items,
+        COALESCE(SUM(ok_items), 0) as ok_items,
+        COALESCE(SUM(ko_items), 0) as ko_items,
+        COUNT(*) as run_count
+    FROM crawler_runs
+    WHERE planned_for >= %s
+    AND planned_for <= %s{condition}
+    GROUP BY retailer
+"""
+
+ITEM_COUNTER_KEYS = ('total_items', 'ok_items', 'ko_items', 'run_count')
+
+# Rule columns added by db/migrations/003_retailer_rules_item_rates.sql
+ITEM_RULE_COLUMNS = ", min_item_success_rate, max_ko_rate"
+
+
+def _with_defaults(counters: Dict[str, Any], retailers: Optional[Iterable[str]],
+                   default: Callable[[], Any]) -> Dict[str, Any]:
+    """Add ``default()`` for every requested retailer missing from a bulk result."""
+    for retailer in retailers or ():
+        if retailer not in counters:
+            counters[retailer] = default()
+    return counters
+
+
+def _retailer_filter(column: str, retailers: Optional[Iterable[str]]) -> Tuple[str, tuple]:
+    """SQL condition (and parameters) restricting ``column`` to ``retailers`` (no condition if None)."""
+    if retailers is None:
+        return '', ()
+    retailers = tuple(retailers)
+    if not retailers:
+        return ' AND FALSE', ()
+    return f" AND {column} IN ({', '.join(['%s'] * len(retailers))})", retailers
+
 
 @dataclass
 class RetailerRule:
@@ -15,6 +122,27 @@ class RetailerRule:
     min_success_rate: Optional[float]
     min_progress_0930: Optional[float]
     include_successes: bool
+    min_item_success_rate: Optional[float] = None  # e.g. 0.90: ok_items / total_items
+    max_ko_rate: Optional[float] = None  # e.g. 0.05: ko_items / total_items
+    
+    def to_rule(self) -> Dict[str, Any]:
+        """Return the rule in the dict shape evaluated by ReportService.
+        
+        retailer_rules stores rates as fractions (0.90) while ReportService
+        compares percentages (90.0): this is the only place where the scale
+        is converted. Rounding drops the FLOAT column noise (0.8999999762).
+        """
+        def percentage(value: Optional[float]) -> Optional[float]:
+            return None if value is None else round(float(value) * 100, 4)
+        
+        return {
+            'retailer_name': self.retailer,
+            'include_successes': self.include_successes,
+            'min_success_rate': percentage(self.min_success_rate),
+            'min_progress_0930': percentage(self.min_progress_0930),
+            'min_item_success_rate': percentage(self.min_item_success_rate),
+            'max_ko_rate': percentage(self.max_ko_rate),
+        }
 
 
 class IncidentRepository:
@@ -27,7 +155,68 @@ class IncidentRepository:
             connection: PyMySQL connection object
         """
         self.connection = connection
+        # Cleared when crawler_runs has no completed_time column (migration 001 not applied)
+        self.use_completed_time = True
+        # Cleared when crawler_runs_daily does not exist (migration 002 not applied)
+        self.use_rollup = True
+        # Cleared when retailer_rules has no item rate columns (migration 003 not applied)
+        self.use_item_rules = True
         
+    def _completed_by(self, at_time: time) -> Tuple[str, tuple]:
+        """SQL condition (and parameters) selecting the runs completed by ``at_time``."""
+        if self.use_completed_time:
+            return COMPLETED_BY_TIME, (at_time,)
+        return LEGACY_COMPLETED_BY_TIME, (at_time, at_time)
+    
+    def _range_counters(self, rollup_sql: str, raw_sql: str, date_from: date, date_to: date,
+                        condition: str, params: tuple) -> Tuple[str, tuple]:
+        """Counters query (and parameters) over a date range, from the rollup when it exists.
+        
+        Args:
+            rollup_sql: Query reading crawler_runs_daily and the runs after the watermark
+            raw_sql: Same query on crawler_runs only
+            date_from: Start date (inclusive)
+            date_to: End date (inclusive)
+            condition: Retailer condition appended to each WHERE clause
+            params: Parameters of ``condition``
+        """
+        if self.use_rollup:
+            return (rollup_sql.format(condition=condition),
+                    (date_from, date_to) + params + (date_from, date_to) + params)
+        return raw_sql.format(condition=condition), (date_from, date_to) + params
+    
+    def _execute_with_fallback(self, cursor, build_query: Callable[[], Tuple[str, tuple]],
+                               flag: str, error_code: int, migration: str):
+        """Execute a query built from an optional schema feature, without it if it is missing.
+        
+        Args:
+            cursor: Cursor to execute the query with
+            build_query: Returns (sql, params) according to the current flags
+            flag: Attribute enabling the feature (use_completed_time, use_rollup)
+            error_code: MySQL error raised when the feature is missing
+            migration: Migration creating the feature, named in the warning
+        """
+        sql, params = build_query()
+        try:
+            cursor.execute(sql, params)
+        except pymysql.MySQLError as e:
+            if not getattr(self, flag) or not e.args or e.args[0] != error_code:
+                raise
+            logger.warning(f"{migration} is not applied, falling back to the previous schema")
+            setattr(self, flag, False)
+            sql, params = build_query()
+            cursor.execute(sql, params)
+    
+    def _execute_completed_query(self, cursor, build_query: Callable[[], Tuple[str, tuple]]):
+        """Execute a query built with _completed_by, without the generated column if it is missing."""
+        self._execute_with_fallback(cursor, build_query, 'use_completed_time', ER.BAD_FIELD_ERROR,
+                                    'db/migrations/001_crawler_runs_completed_time.sql')
+    
+    def _execute_counters_query(self, cursor, build_query: Callable[[], Tuple[str, tuple]]):
+        """Execute a query built with _range_counters, without the rollup if it is missing."""
+        self._execute_with_fallback(cursor, build_query, 'use_rollup', ER.NO_SUCH_TABLE,
+                                    'db/migrations/002_crawler_runs_daily.sql')
+    
     def get_rules(self, retailer_filter: Optional[str] = None) -> List[RetailerRule]:
         """Get retailer rules, optionally filtered by retailer name.
         
@@ -37,22 +226,26 @@ class IncidentRepository:
         Returns:
             List of RetailerRule objects
         """
+        def rules_query():
+            columns = ITEM_RULE_COLUMNS if self.use_item_rules else ''
+            if retailer_filter:
+                sql = f"""
+                    SELECT retailer, min_success_rate, min_progress_0930, include_successes{columns}
+                    FROM retailer_rules 
+                    WHERE retailer = %s
+                """
+                return sql, (retailer_filter,)
+            sql = f"""
+                SELECT retailer, min_success_rate, min_progress_0930, include_successes{columns}
+                FROM retailer_rules
+                ORDER BY retailer
+            """
+            return sql, None
+        
         try:
             with self.connection.cursor() as cursor:
-                if retailer_filter:
-                    sql = """
-                        SELECT retailer, min_success_rate, min_progress_0930, include_successes
-                        FROM retailer_rules 
-                        WHERE retailer = %s
-                    """
-                    cursor.execute(sql, (retailer_filter,))
-                else:
-                    sql = """
-                        SELECT retailer, min_success_rate, min_progress_0930, include_successes
-                        FROM retailer_rules
-                        ORDER BY retailer
-                    """
-                    cursor.execute(sql)
+                self._execute_with_fallback(cursor, rules_query, 'use_item_rules', ER.BAD_FIELD_ERROR,
+                                            'db/migrations/003_retailer_rules_item_rates.sql')
                 
                 results = cursor.fetchall()
                 return [
@@ -60,7 +253,9 @@ class IncidentRepository:
                         retailer=row['retailer'],
                         min_success_rate=row['min_success_rate'],
                         min_progress_0930=row['min_progress_0930'],
-                        include_successes=bool(row['include_successes'])
+                        include_successes=bool(row['include_successes']),
+                        min_item_success_rate=row.get('min_item_success_rate'),
+                        max_ko_rate=row.get('max_ko_rate')
                     )
                     for row in results
                 ]
@@ -81,16 +276,10 @@ class IncidentRepository:
         """
         try:
             with self.connection.cursor() as cursor:
-                sql = """
-                    SELECT 
-                        SUM(CASE WHEN status = 'success' THEN 1 ELSE 0 END) as success_count,
-                        COUNT(*) as total_count
-                    FROM crawler_runs 
-                    WHERE retailer = %s 
-                    AND planned_for >= %s 
-                    AND planned_for <= %s
-                """
-                cursor.execute(sql, (retailer, date_from, date_to))
+                self._execute_counters_query(
+                    cursor, lambda: self._range_counters(ROLLUP_SUCCESS_COUNTERS, RAW_SUCCESS_COUNTERS, date_from, date_to,
+                                                  ' AND retailer = %s', (retailer,))
+                )
                 result = cursor.fetchone()
                 
                 if result:
@@ -141,19 +330,19 @@ class IncidentRepository:
                     if fallback_result and fallback_result['total_count'] > 0:
                         expected_total = int(fallback_result['total_count'])
                 
-                # Count completed runs by the specified time
-                completed_sql = """
-                    SELECT COUNT(*) as completed_count
-                    FROM crawler_runs 
-                    WHERE retailer = %s 
-                    AND planned_for = %s
-                    AND (
-                        (finished_at IS NOT NULL AND TIME(finished_at) <= %s)
-                        OR 
-                        (status IN ('success', 'error') AND TIME(started_at) <= %s)
-                    )
-                """
-                cursor.execute(completed_sql, (retailer, the_date, at_time, at_time))
+                # Count completed runs by the specified time (range scan of idx_runs_completed)
+                def completed_query():
+                    condition, condition_params = self._completed_by(at_time)
+                    completed_sql = f"""
+                        SELECT COUNT(*) as completed_count
+                        FROM crawler_runs 
+                        WHERE retailer = %s 
+                        AND planned_for = %s
+                        AND {condition}
+                    """
+                    return completed_sql, (retailer, the_date) + condition_params
+                
+                self._execute_completed_query(cursor, completed_query)
                 completed_result = cursor.fetchone()
                 
                 completed_by_time = int(completed_result['completed_count'] or 0) if completed_result else 0
@@ -163,3 +352,145 @@ class IncidentRepository:
         except pymysql.Error as e:
             logger.error(f"Failed to get progress for {retailer} at {at_time}: {e}")
             return (0, None)
+
+    def get_success_counters_bulk(self, date_from: date, date_to: date,
+                                  retailers: Optional[Iterable[str]] = None) -> Dict[str, Tuple[int, int]]:
+        """Get success and total counts of every retailer in a date range with one query.
+        
+        Args:
+            date_from: Start date (inclusive)
+            date_to: End date (inclusive)
+            retailers: Optional retailer names to restrict the query to
+            
+        Returns:
+            Dict of retailer -> (success_count, total_count); a requested
+            retailer without runs gets (0, 0), as from get_success_counters
+        """
+        retailers = tuple(retailers) if retailers is not None else None
+        condition, params = _retailer_filter('retailer', retailers)
+        try:
+            with self.connection.cursor() as cursor:
+                self._execute_counters_query(
+                    cursor, lambda: self._range_counters(ROLLUP_SUCCESS_COUNTERS, RAW_SUCCESS_COUNTERS, date_from, date_to,
+                                                  condition, params)
+                )
+                return _with_defaults({
+                    row['retailer']: (int(row['success_count'] or 0), int(row['total_count'] or 0))
+                    for row in cursor.fetchall()
+                }, retailers, lambda: (0, 0))
+        except pymysql.Error as e:
+            logger.error(f"Failed to get success counters from {date_from} to {date_to}: {e}")
+            return {}
+    
+    def get_item_counters(self, retailer: str, date_from: date, date_to: date) -> Dict[str, int]:
+        """Get item counters for a retailer in a date range.
+        
+        Args:
+            retailer: Retailer name
+            date_from: Start date (inclusive)
+            date_to: End date (inclusive)
+            
+        Returns:
+            Dict with total_items, ok_items, ko_items and run_count (zeros without runs)
+        """
+        counters = self.get_item_counters_bulk(date_from, date_to, [retailer])
+        return counters.get(retailer, dict.fromkeys(ITEM_COUNTER_KEYS, 0))
+    
+    def get_item_counters_bulk(self, date_from: date, date_to: date,
+                               retailers: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Get item counters of every retailer in a date range with one query.
+        
+        Items are summed over the runs, so a run with many KO items weighs
+        more than its status alone: ok_items / total_items and
+        ko_items / total_items are the item-weighted success and KO rates.
+        
+        Args:
+            date_from: Start date (inclusive)
+            date_to: End date (inclusive)
+            retailers: Optional retailer names to restrict the query to
+            
+        Returns:
+            Dict of retailer -> {total_items, ok_items, ko_items, run_count};
+            a requested retailer without runs gets zeros
+        """
+        retailers = tuple(retailers) if retailers is not None else None
+        condition, params = _retailer_filter('retailer', retailers)
+        try:
+            with self.connection.cursor() as cursor:
+                self._execute_counters_query(
+                    cursor, lambda: self._range_counters(ROLLUP_ITEM_COUNTERS, RAW_ITEM_COUNTERS, date_from, date_to,
+                                                          condition, params)
+                )
+                return _with_defaults({
+                    row['retailer']: {key: int(row[key] or 0) for key in ITEM_COUNTER_KEYS}
+                    for row in cursor.fetchall()
+                }, retailers, lambda: dict.fromkeys(ITEM_COUNTER_KEYS, 0))
+        except pymysql.Error as e:
+            logger.error(f"Failed to get item counters from {date_from} to {date_to}: {e}")
+            return {}
+    
+    def get_progress_at_bulk(self, the_date: date, at_time: time,
+                             retailers: Optional[Iterable[str]] = None) -> Dict[str, Tuple[int, Optional[int]]]:
+        """Get progress counts of every retailer at a specific time with one query.
+        
+        Runs are aggregated per retailer and joined to runs_plan: the expected
+        total is the planned one, or the number of runs of the day when the
+        retailer has no plan (None without runs), as in get_progress_at.
+        
+        Args:
+            the_date: The date to check
+            at_time: The time to check (e.g., 09:30)
+            retailers: Optional retailer names to restrict the query to
+            
+        Returns:
+            Dict of retailer -> (completed_by_time, expected_total) for every
+            retailer with a plan or runs on that date; a requested retailer
+            with neither gets (0, None), as from get_progress_at
+        """
+        retailers = tuple(retailers) if retailers is not None else None
+        runs_condition, runs_params = _retailer_filter('retailer', retailers)
+        plan_condition, plan_params = _retailer_filter('retailer', retailers)
+        try:
+            with self.connection.cursor() as cursor:
+                def progress_query():
+                    condition, condition_params = self._completed_by(at_time)
+                    sql = f"""
+                        SELECT
+                            k.retailer,
+                            p.expected_total,
+                            COALESCE(r.total_count, 0) as total_count,
+                            COALESCE(r.completed_count, 0) as completed_count
+                        FROM (
+                            SELECT retailer FROM runs_plan WHERE plan_date = %s{plan_condition}
+                            UNION
+                            SELECT retailer FROM crawler_runs WHERE planned_for = %s{runs_condition}
+                        ) k
+                        LEFT JOIN runs_plan p
+                            ON p.plan_date = %s AND p.retailer = k.retailer
+                        LEFT JOIN (
+                            SELECT
+                                retailer,
+                                COUNT(*) as total_count,
+                                SUM(CASE WHEN {condition} THEN 1 ELSE 0 END) as completed_count
+                            FROM crawler_runs
+                            WHERE planned_for = %s{runs_condition}
+                            GROUP BY retailer
+                        ) r ON r.retailer = k.retailer
+                    """
+                    return sql, (
+                        (the_date,) + plan_params + (the_date,) + runs_params + (the_date,)
+                        + condition_params + (the_date,) + runs_params
+                    )
+                
+                self._execute_completed_query(cursor, progress_query)
+                progress = {}
+                for row in cursor.fetchall():
+                    if row['expected_total'] is not None:
+                        expected_total = int(row['expected_total'])
+                    else:
+                        expected_total = int(row['total_count']) if row['total_count'] else None
+                    progress[row['retailer']] = (int(row['completed_count'] or 0), expected_total)
+                return _with_defaults(progress, retailers, lambda: (0, None))
+        except pymysql.Error as e:
+            logger.error(f"Failed to get progress at {at_time} on {the_date}: {e}")
+            return {}
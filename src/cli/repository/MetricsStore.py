@@ -0,0 +1,174 @@
+"""Historique local des métriques de chaque dealer (SQLite), alimenté à chaque rapport."""
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Colonnes enregistrées pour chaque dealer (clés des lignes produites par iter_retailers)
+METRIC_COLUMNS = ('progress', 'success', 'store_count', 'success_count', 'failed_count',
+                  'in_delta_count', 'to_crawl_count')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_at TEXT NOT NULL PRIMARY KEY,
+    source TEXT,
+    dealer_count INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dealer_metrics (
+    dealer TEXT NOT NULL,
+    run_at TEXT NOT NULL,
+    progress REAL,
+    success REAL,
+    store_count INTEGER,
+    success_count INTEGER,
+    failed_count INTEGER,
+    in_delta_count INTEGER,
+    to_crawl_count INTEGER,
+    PRIMARY KEY (dealer, run_at)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_dealer_metrics_run_at ON dealer_metrics (run_at);
+"""
+
+
+def _timestamp(value: Union[str, datetime]) -> str:
+    """Horodatage ISO 8601 à la seconde (l'ordre lexical est l'ordre chronologique)."""
+    if isinstance(value, datetime):
+        return value.replace(microsecond=0).isoformat()
+    return value
+
+
+class MetricsStore:
+    """Métriques de chaque dealer pour chaque exécution, en ajout seul.
+
+    Les lignes sont rangées par clé primaire ``(dealer, run_at)`` dans une
+    table ``WITHOUT ROWID`` : l'historique d'un dealer est contigu sur disque
+    et une requête de tendance sur plusieurs mois se limite à un parcours
+    d'intervalle de l'index. Une exécution déjà enregistrée n'est jamais
+    modifiée (les doublons sont ignorés).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path: Fichier SQLite (par défaut ``DEALER_REPORT_METRICS_DB``,
+                sinon ``$DEALER_REPORT_CACHE_DIR/metrics.sqlite``)
+        """
+        cache_dir = os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')
+        self.path = Path(path or os.getenv('DEALER_REPORT_METRICS_DB',
+                                           os.path.join(cache_dir, 'metrics.sqlite')))
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvrir la base au premier accès et créer le schéma si nécessaire"""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def record_run(self, run_at: Union[str, datetime], retailers: Iterable[Mapping[str, Any]],
+                   source: Optional[str] = None) -> int:
+        """
+        Enregistrer les métriques de tous les dealers d'une exécution (une transaction).
+
+        Args:
+            run_at: Date de l'exécution
+            retailers: Lignes avec ``name`` et les colonnes de ``METRIC_COLUMNS``
+            source: Origine des données (``API``, ``CSV``...)
+
+        Returns:
+            int: Nombre de lignes ajoutées
+        """
+        run_at = _timestamp(run_at)
+        rows = [
+            (retailer['name'], run_at, *(retailer.get(column) for column in METRIC_COLUMNS))
+            for retailer in retailers
+        ]
+        placeholders = ', '.join('?' * (len(METRIC_COLUMNS) + 2))
+        with self._lock:
+            connection = self._connect()
+            with connection:
+                before = connection.total_changes
+                connection.executemany(
+                    f"INSERT OR IGNORE INTO dealer_metrics (dealer, run_at, {', '.join(METRIC_COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    rows
+                )
+                added = connection.total_changes - before
+                connection.execute(
+                    "INSERT OR IGNORE INTO runs (run_at, source, dealer_count) VALUES (?, ?, ?)",
+                    (run_at, source, len(rows))
+                )
+        logger.info(f"{added} métrique(s) enregistrée(s) pour l'exécution du {run_at} ({self.path})")
+        return added
+
+    def _query(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(row) for row in self._connect().execute(sql, params)]
+
+    def history(self, dealer: str, since: Union[str, datetime, None] = None,
+                until: Union[str, datetime, None] = None) -> List[Dict[str, Any]]:
+        """
+        Métriques d'un dealer par exécution, de la plus ancienne à la plus récente.
+
+        Args:
+            dealer: Nom du dealer
+            since: Début de la période (incluse)
+            until: Fin de la période (exclue)
+        """
+        conditions, params = ['dealer = ?'], [dealer]
+        if since:
+            conditions.append('run_at >= ?')
+            params.append(_timestamp(since))
+        if until:
+            conditions.append('run_at < ?')
+            params.append(_timestamp(until))
+        return self._query(
+            f"SELECT run_at, {', '.join(METRIC_COLUMNS)} FROM dealer_metrics "
+            f"WHERE {' AND '.join(conditions)} ORDER BY run_at",
+            tuple(params)
+        )
+
+    def daily_averages(self, dealer: str, since: Union[str, datetime, None] = None) -> List[Dict[str, Any]]:
+        """Moyenne journalière de progress et success d'un dealer (tendance sur plusieurs mois)."""
+        return self._query(
+            "SELECT substr(run_at, 1, 10) AS day, AVG(progress) AS progress, AVG(success) AS success, "
+            "COUNT(*) AS runs FROM dealer_metrics WHERE dealer = ? AND run_at >= ? "
+            "GROUP BY day ORDER BY day",
+            (dealer, _timestamp(since) if since else '')
+        )
+
+    def latest(self) -> List[Dict[str, Any]]:
+        """Dernières métriques enregistrées de chaque dealer."""
+        return self._query(
+            f"SELECT dealer, MAX(run_at) AS run_at, {', '.join(METRIC_COLUMNS)} "
+            "FROM dealer_metrics GROUP BY dealer ORDER BY dealer"
+        )
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Exécutions enregistrées, de la plus ancienne à la plus récente."""
+        return self._query("SELECT run_at, source, dealer_count FROM runs ORDER BY run_at")
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> "MetricsStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
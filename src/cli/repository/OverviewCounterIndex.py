@@ -0,0 +1,113 @@
+"""Index des compteurs par retailer construit à partir de l'overview Spider Vision."""
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Clés pouvant contenir la liste des dealers d'un payload overview, par ordre de priorité
+OVERVIEW_LIST_KEYS = ('retailers', 'data', 'items', 'stores')
+
+
+class OverviewCounterIndex:
+    """Compteurs de tous les retailers à partir d'un seul appel à /store-history/overview.
+
+    Le payload overview contient déjà ``storeCount``, ``storeInDeltaCount``,
+    ``successCount``, ``storeFailedCount``... pour chaque dealer. L'overview est
+    récupéré une seule fois (au premier accès après ``invalidate``) puis indexé par
+    nom de retailer, ce qui permet de répondre aux compteurs en O(1).
+    """
+
+    def __init__(self, fetch_overview: Callable[[], Any]):
+        """
+        Args:
+            fetch_overview: Fonction sans argument qui retourne le payload overview
+        """
+        self._fetch_overview = fetch_overview
+        self._lock = threading.Lock()
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._index: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return (name or '').strip().lower()
+
+    @staticmethod
+    def _extract_records(data: Any) -> List[Dict[str, Any]]:
+        """Extraire la liste des dealers du payload overview"""
+        if isinstance(data, dict):
+            data = next((data[key] for key in OVERVIEW_LIST_KEYS if key in data), [])
+        if not isinstance(data, list):
+            return []
+        return [item for item in data if isinstance(item, dict)]
+
+    def _ensure_loaded(self):
+        if self._records is not None:
+            return
+        with self._lock:
+            if self._records is not None:
+                return
+            try:
+                records = self._extract_records(self._fetch_overview())
+            except Exception as e:
+                logger.error(f"Impossible de récupérer l'overview pour l'index des compteurs: {e}")
+                records = []
+            self._index = {}
+            for item in records:
+                key = self._key(item.get('domainDealerName', item.get('name', '')))
+                if key:
+                    self._index[key] = item
+            self._records = records
+            logger.info(f"Index overview construit ({len(self._index)} retailers)")
+
+    def invalidate(self):
+        """Oublier l'overview chargé (le prochain accès déclenchera un nouvel appel)"""
+        with self._lock:
+            self._records = None
+            self._index = {}
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Retourner toutes les lignes du payload overview"""
+        self._ensure_loaded()
+        return self._records
+
+    def get(self, retailer_name: str) -> Optional[Dict[str, Any]]:
+        """Retourner la ligne overview brute d'un retailer (None si inconnu)"""
+        self._ensure_loaded()
+        return self._index.get(self._key(retailer_name))
+
+    @staticmethod
+    def _int(item: Dict[str, Any], key: str) -> int:
+        return int(item.get(key, 0) or 0)
+
+    def crawling_counters(self, retailer_name: str) -> Optional[Dict[str, int]]:
+        """Magasins crawlés (storeInDeltaCount) sur le total de magasins (storeCount)"""
+        item = self.get(retailer_name)
+        if item is None:
+            return None
+        return {'crawling_count': self._int(item, 'storeInDeltaCount'),
+                'total_count': self._int(item, 'storeCount')}
+
+    def content_counters(self, retailer_name: str) -> Optional[Dict[str, int]]:
+        """Magasins avec contenu (successCount) sur les magasins crawlés (storeInDeltaCount)"""
+        item = self.get(retailer_name)
+        if item is None:
+            return None
+        return {'content_count': self._int(item, 'successCount'),
+                'total_count': self._int(item, 'storeInDeltaCount')}
+
+    def success_counters(self, retailer_name: str) -> Optional[Dict[str, int]]:
+        """Crawls réussis (successCount) sur les crawls terminés (successCount + storeFailedCount)"""
+        item = self.get(retailer_name)
+        if item is None:
+            return None
+        success_count = self._int(item, 'successCount')
+        return {'success_count': success_count,
+                'total_count': success_count + self._int(item, 'storeFailedCount')}
+
+    def progress(self, retailer_name: str) -> Optional[float]:
+        """Progression du crawl (crawlProgress) en pourcentage"""
+        item = self.get(retailer_name)
+        if item is None:
+            return None
+        return float(item.get('crawlProgress', 0) or 0)
@@ -1,26 +1,39 @@
 import logging
 import requests
-from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timedelta, date, time
+from typing import Any, Callable, Dict, Iterable, List, Optional
 import json
 from urllib.parse import urljoin
-import time
-from bs4 import BeautifulSoup
 import re
+import threading
+from cli.repository.EndpointDiscoveryCache import EndpointDiscoveryCache
+from cli.repository.OverviewCounterIndex import OVERVIEW_LIST_KEYS, OverviewCounterIndex
 from cli.services.auth import SpiderVisionAuth
 from cli.services.data import SpiderVisionData
+from cli.services.http_session import get_shared_session
 
 logger = logging.getLogger(__name__)
 
 class WebDataRepository:
     """Repository pour récupérer les données depuis Spider Vision via l'API JWT"""
     
-    def __init__(self, base_url: str = None, username: str = None, password: str = None):
+    def __init__(self, base_url: str = None, username: str = None, password: str = None,
+                 endpoint_cache: Optional[EndpointDiscoveryCache] = None,
+                 session: Optional[requests.Session] = None, use_cache: Optional[bool] = None):
         # Maintenir la compatibilité avec l'ancien constructeur
-        self.auth = SpiderVisionAuth()
-        self.data_service = SpiderVisionData()
+        self.session = session or get_shared_session()
+        self.auth = SpiderVisionAuth(session=self.session)
+        # use_cache=False : toujours interroger l'API (option --no-cache)
+        self.data_service = SpiderVisionData(session=self.session, auth=self.auth, use_cache=use_cache)
+        self.base_url = (base_url or self.data_service.api_base).rstrip('/')
+        # Endpoints déjà découverts (évite de resonder toute la liste à chaque appel)
+        self.endpoint_cache = endpoint_cache or EndpointDiscoveryCache()
+        # Compteurs de tous les retailers issus d'un seul appel overview
+        self.overview_index = OverviewCounterIndex(self._fetch_overview)
         self._token = None
         self._authenticated = False
+        # Les règles peuvent être évaluées en parallèle (ReportService.max_workers)
+        self._auth_lock = threading.Lock()
         
         # Si des paramètres sont fournis, les utiliser
         if username:
@@ -30,32 +43,46 @@ class WebDataRepository:
         
     def _authenticate(self) -> bool:
         """Authentification via l'API JWT Spider Vision"""
-        if self._authenticated and self._token:
+        if self._authenticated and self.auth.is_token_fresh(self._token):
             return True
-            
-        try:
-            logger.info("Tentative d'authentification via API JWT")
-            self._token = self.auth.login()
-            self._authenticated = True
-            logger.info("Authentification JWT réussie")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Échec d'authentification JWT: {e}")
-            self._authenticated = False
-            self._token = None
-            return False
+        
+        with self._auth_lock:
+            if self._authenticated and self.auth.is_token_fresh(self._token):
+                return True
+            
+            try:
+                logger.info("Tentative d'authentification via API JWT")
+                self._token = self.auth.login()
+                self._authenticated = True
+                logger.info("Authentification JWT réussie")
+                return True
+                
+            except Exception as e:
+                logger.error(f"Échec d'authentification JWT: {e}")
+                self._authenticated = False
+                self._token = None
+                return False
     
-    def get_dashboard_data(self) -> List[Dict[str, Any]]:
-        """Récupérer les données du tableau dashboard Spider Vision via l'API JWT"""
+    def _fetch_overview(self) -> Any:
+        """Récupérer le payload overview brut (utilisé par l'index des compteurs)"""
         if not self._authenticate():
-            logger.error("Impossible de s'authentifier pour récupérer les données")
-            return []
+            raise RuntimeError("Impossible de s'authentifier pour récupérer les données")
         
+        logger.info("Récupération des données overview via API JWT")
+        return self.data_service.get_overview(self._token)
+    
+    def refresh_overview(self):
+        """Invalider l'overview en mémoire : il sera récupéré une fois pour le prochain rapport"""
+        self.overview_index.invalidate()
+    
+    def _overview_covers(self, start_date, end_date) -> bool:
+        """L'overview décrit la journée en cours : il ne répond que pour cette seule journée"""
+        return start_date == end_date == date.today()
+    
+    def get_dashboard_data(self) -> List[Dict[str, Any]]:
+        """Récupérer les données du tableau dashboard Spider Vision via l'API JWT"""
         try:
-            logger.info("Récupération des données overview via API JWT")
-            overview_data = self.data_service.get_overview(self._token)
-            return self._parse_overview_data(overview_data)
+            return self._parse_overview_data(self.overview_index.records())
             
         except Exception as e:
             logger.error(f"Erreur lors de la récupération des données: {e}")
@@ -70,7 +97,7 @@ class WebDataRepository:
             items = data
         # Si c'est un dict avec une clé contenant les retailers
         elif isinstance(data, dict):
-            items = data.get('retailers', data.get('data', data.get('items', data.get('stores', [data]))))
+            items = next((data[key] for key in OVERVIEW_LIST_KEYS if key in data), [data])
         else:
             return []
         
@@ -91,6 +118,9 @@ class WebDataRepository:
     
     def _parse_html_dashboard(self, html_content: str) -> List[Dict[str, Any]]:
         """Parser le tableau HTML du dashboard"""
+        # Import différé : BeautifulSoup n'est utile que pour ce fallback
+        from bs4 import BeautifulSoup
+        
         soup = BeautifulSoup(html_content, 'html.parser')
         retailers = []
         
@@ -221,14 +251,42 @@ class WebDataRepository:
         match = re.search(r'([0-9.]+)%', text)
         return float(match.group(1)) if match else 0.0
     
-    def _make_request(self, endpoint: str, method: str = 'GET', return_json: bool = True, **kwargs):
-        """Faire une requête authentifiée"""
+    def _request(self, endpoint: str, method: str = 'GET', **kwargs) -> Optional[requests.Response]:
+        """Faire une requête authentifiée et retourner la réponse brute (None si erreur réseau)"""
         if not self._authenticate():
             return None
             
         try:
             url = urljoin(f"{self.base_url}/", endpoint.lstrip('/'))
-            response = self.session.request(method, url, **kwargs)
+            headers = {
+                "Authorization": f"Bearer {self._token}",
+                "Accept": "application/json",
+                **kwargs.pop('headers', {})
+            }
+            kwargs.setdefault('timeout', 30)
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            
+            if response.status_code == 401:
+                # Token expiré ou révoqué : rafraîchir une fois puis rejouer
+                logger.info("Token refusé (401), rafraîchissement du token")
+                with self._auth_lock:
+                    if headers["Authorization"] == f"Bearer {self._token}":
+                        self._token = self.auth.refresh(self._token)
+                headers["Authorization"] = f"Bearer {self._token}"
+                response = self.session.request(method, url, headers=headers, **kwargs)
+            
+            return response
+        except Exception as e:
+            logger.error(f"Erreur requête {endpoint}: {e}")
+            return None
+    
+    def _make_request(self, endpoint: str, method: str = 'GET', return_json: bool = True, **kwargs):
+        """Faire une requête authentifiée"""
+        response = self._request(endpoint, method, **kwargs)
+        if response is None:
+            return None
+            
+        try:
             response.raise_for_status()
             
             if return_json:
@@ -244,6 +302,47 @@ class WebDataRepository:
             logger.error(f"Erreur requête {endpoint}: {e}")
             return None
     
+    def _probe_endpoints(self, kind: str, endpoints: List[str], retailer_name: str = '', **kwargs) -> Optional[Any]:
+        """Retourner le JSON du premier endpoint candidat qui répond 200.
+        
+        Les candidats sont des modèles pouvant contenir ``{retailer}``. L'endpoint
+        qui a répondu est mémorisé dans le cache de découverte : les appels suivants
+        l'interrogent directement et ne resondent la liste qu'après expiration de
+        l'entrée ou échec de l'endpoint. Les endpoints en 404 sont ignorés tant que
+        leur entrée n'a pas expiré : un modèle sans ``{retailer}`` pour tous les
+        retailers, un modèle avec ``{retailer}`` pour ce retailer seulement (un
+        404 peut signifier que le retailer est inconnu, pas que la route n'existe pas).
+        """
+        def missing_key(template: str) -> str:
+            return template.format(retailer=retailer_name) if '{retailer}' in template else template
+        
+        known = self.endpoint_cache.get(kind)
+        if known in endpoints:
+            candidates = [known] + [e for e in endpoints
+                                    if e != known and not self.endpoint_cache.is_missing(missing_key(e))]
+        else:
+            candidates = [e for e in endpoints if not self.endpoint_cache.is_missing(missing_key(e))]
+        
+        for template in candidates:
+            response = self._request(template.format(retailer=retailer_name), **kwargs)
+            
+            if response is not None and response.status_code == 200:
+                try:
+                    data = response.json()
+                except ValueError:
+                    data = None
+                if data is not None:
+                    self.endpoint_cache.remember(kind, template)
+                    return data
+            
+            if template == known:
+                logger.info(f"Endpoint {template} ({kind}) en échec, nouveau sondage")
+                self.endpoint_cache.forget(kind)
+            if response is not None and response.status_code == 404:
+                self.endpoint_cache.mark_missing(missing_key(template))
+        
+        return None
+    
     def get_retailer_rules(self) -> List[Dict[str, Any]]:
         """Récupérer les règles des retailers depuis Spider Vision"""
         try:
@@ -257,16 +356,10 @@ class WebDataRepository:
                 '/rules'
             ]
             
-            for endpoint in endpoints:
-                response = self._make_request(endpoint)
-                if response and response.status_code == 200:
-                    try:
-                        data = response.json()
-                        if isinstance(data, list) and len(data) > 0:
-                            logger.info(f"Données retailers trouvées via {endpoint}")
-                            return self._normalize_retailer_rules(data)
-                    except json.JSONDecodeError:
-                        continue
+            data = self._probe_endpoints('rules', endpoints)
+            if isinstance(data, list) and len(data) > 0:
+                logger.info("Données retailers trouvées via l'API")
+                return self._normalize_retailer_rules(data)
             
             # Si pas d'API, créer des règles par défaut basées sur les retailers communs
             logger.warning("Impossible de récupérer les règles via API, utilisation des règles par défaut")
@@ -276,6 +369,13 @@ class WebDataRepository:
             logger.error(f"Erreur lors de la récupération des règles: {e}")
             return self._get_default_retailer_rules()
     
+    def get_rules(self, dealer_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Règles des retailers au format de ReportService, filtrées sur le nom du retailer (ReportService)"""
+        rules = self.get_retailer_rules()
+        if dealer_filter:
+            rules = [rule for rule in rules if dealer_filter.lower() in rule['retailer_name'].lower()]
+        return rules
+    
     def _normalize_retailer_rules(self, data: List[Dict]) -> List[Dict[str, Any]]:
         """Normaliser les données des retailers au format attendu"""
         rules = []
@@ -346,12 +446,18 @@ class WebDataRepository:
             if hasattr(end_date, 'date'):
                 end_date = end_date.date()
             
+            # Réponse directe depuis l'overview (un seul appel HTTP pour tous les retailers)
+            if self._overview_covers(start_date, end_date):
+                counters = self.overview_index.success_counters(retailer_name)
+                if counters is not None:
+                    return counters
+            
             # Essayer différents endpoints pour les données de crawl
             endpoints = [
-                f'/api/crawler/stats/{retailer_name}',
-                f'/api/stats/{retailer_name}',
-                f'/api/crawler/runs/{retailer_name}',
-                f'/api/runs/{retailer_name}',
+                '/api/crawler/stats/{retailer}',
+                '/api/stats/{retailer}',
+                '/api/crawler/runs/{retailer}',
+                '/api/runs/{retailer}',
                 '/api/crawler/runs',
                 '/api/runs'
             ]
@@ -362,14 +468,9 @@ class WebDataRepository:
                 'retailer': retailer_name
             }
             
-            for endpoint in endpoints:
-                response = self._make_request(endpoint, params=params)
-                if response and response.status_code == 200:
-                    try:
-                        data = response.json()
-                        return self._parse_success_counters(data, retailer_name)
-                    except json.JSONDecodeError:
-                        continue
+            data = self._probe_endpoints('success', endpoints, retailer_name, params=params)
+            if data is not None:
+                return self._parse_success_counters(data, retailer_name)
             
             # Si pas de données, retourner des valeurs par défaut
             logger.warning(f"Impossible de récupérer les stats pour {retailer_name}, utilisation de valeurs par défaut")
@@ -425,8 +526,8 @@ class WebDataRepository:
             end_time = target_time + timedelta(minutes=30)
             
             endpoints = [
-                f'/api/crawler/progress/{retailer_name}',
-                f'/api/progress/{retailer_name}',
+                '/api/crawler/progress/{retailer}',
+                '/api/progress/{retailer}',
                 '/api/crawler/runs',
                 '/api/runs'
             ]
@@ -438,22 +539,16 @@ class WebDataRepository:
                 'date': target_date.strftime('%Y-%m-%d')
             }
             
-            for endpoint in endpoints:
-                response = self._make_request(endpoint, params=params)
-                if response and response.status_code == 200:
-                    try:
-                        data = response.json()
-                        progress = self._parse_progress_data(data, retailer_name, target_time)
-                        if progress is not None:
-                            return progress
-                    except json.JSONDecodeError:
-                        continue
+            data = self._probe_endpoints('progress', endpoints, retailer_name, params=params)
+            if data is not None:
+                progress = self._parse_progress_data(data, retailer_name, target_time)
+                if progress is not None:
+                    return progress
             
-            # Essayer de récupérer depuis le dashboard
-            dashboard_data = self.get_dashboard_data()
-            for retailer in dashboard_data:
-                if retailer['name'].lower() == retailer_name.lower():
-                    return retailer['progress_rate']
+            # Essayer de récupérer depuis l'overview déjà chargé
+            progress = self.overview_index.progress(retailer_name)
+            if progress is not None:
+                return progress
             
             # Valeur par défaut si pas de données
             logger.warning(f"Impossible de récupérer le progrès à 09:30 pour {retailer_name}")
@@ -465,11 +560,12 @@ class WebDataRepository:
     
     def get_progress_at(self, retailer_name: str, target_date: datetime, target_time) -> tuple:
         """Récupérer le progrès à une heure donnée (compatible avec ReportService)"""
-        # Convertir time en datetime pour la compatibilité
-        if hasattr(target_time, 'hour'):
-            target_datetime = target_date.replace(hour=target_time.hour, minute=target_time.minute, second=0, microsecond=0)
-        else:
-            target_datetime = target_date.replace(hour=9, minute=30, second=0, microsecond=0)
+        # Convertir date + time en datetime (ReportService passe une date)
+        if isinstance(target_date, datetime):
+            target_date = target_date.date()
+        if not hasattr(target_time, 'hour'):
+            target_time = time(9, 30)
+        target_datetime = datetime.combine(target_date, time(target_time.hour, target_time.minute))
         
         progress_percent = self.get_progress_at_0930(retailer_name, target_datetime)
         
@@ -479,6 +575,35 @@ class WebDataRepository:
         
         return completed_by_time, expected_total
     
+    def _counters_bulk(self, counters: Callable[[str], Optional[Dict[str, int]]], start_date, end_date,
+                       retailers: Optional[Iterable[str]]) -> Dict[str, Dict[str, int]]:
+        """Compteurs de plusieurs retailers lus dans l'overview (vide si la période n'est pas couverte)"""
+        if hasattr(start_date, 'date'):
+            start_date = start_date.date()
+        if hasattr(end_date, 'date'):
+            end_date = end_date.date()
+        if not self._overview_covers(start_date, end_date):
+            return {}
+        
+        if retailers is None:
+            retailers = [item.get('domainDealerName', item.get('name', '')) for item in self.overview_index.records()]
+        result = {}
+        for retailer_name in retailers:
+            retailer_counters = counters(retailer_name)
+            if retailer_counters is not None:
+                result[retailer_name] = retailer_counters
+        return result
+    
+    def get_crawling_counters_bulk(self, start_date, end_date,
+                                   retailers: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Compteurs de crawling de tous les retailers (un seul appel overview) ; les absents passent par get_crawling_counters"""
+        return self._counters_bulk(self.overview_index.crawling_counters, start_date, end_date, retailers)
+    
+    def get_content_counters_bulk(self, start_date, end_date,
+                                  retailers: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """Compteurs de contenu de tous les retailers (un seul appel overview) ; les absents passent par get_content_counters"""
+        return self._counters_bulk(self.overview_index.content_counters, start_date, end_date, retailers)
+    
     def get_crawling_counters(self, retailer_name: str, start_date, end_date) -> Dict[str, int]:
         """Récupérer les compteurs de magasins crawlés (règle 1)"""
         try:
@@ -488,12 +613,18 @@ class WebDataRepository:
             if hasattr(end_date, 'date'):
                 end_date = end_date.date()
             
+            # Réponse directe depuis l'overview (un seul appel HTTP pour tous les retailers)
+            if self._overview_covers(start_date, end_date):
+                counters = self.overview_index.crawling_counters(retailer_name)
+                if counters is not None:
+                    return counters
+            
             # Essayer différents endpoints pour les données de crawling
             endpoints = [
-                f'/api/crawler/crawling/{retailer_name}',
-                f'/api/crawling/{retailer_name}',
-                f'/api/crawler/stores/{retailer_name}',
-                f'/api/stores/{retailer_name}',
+                '/api/crawler/crawling/{retailer}',
+                '/api/crawling/{retailer}',
+                '/api/crawler/stores/{retailer}',
+                '/api/stores/{retailer}',
                 '/api/crawler/crawling',
                 '/api/crawling'
             ]
@@ -504,14 +635,9 @@ class WebDataRepository:
                 'retailer': retailer_name
             }
             
-            for endpoint in endpoints:
-                response = self._make_request(endpoint, params=params)
-                if response and response.status_code == 200:
-                    try:
-                        data = response.json()
-                        return self._parse_crawling_counters(data, retailer_name)
-                    except json.JSONDecodeError:
-                        continue
+            data = self._probe_endpoints('crawling', endpoints, retailer_name, params=params)
+            if data is not None:
+                return self._parse_crawling_counters(data, retailer_name)
             
             # Si pas de données, retourner des valeurs par défaut
             logger.warning(f"Impossible de récupérer les stats de crawling pour {retailer_name}, utilisation de valeurs par défaut")
@@ -567,12 +693,18 @@ class WebDataRepository:
             if hasattr(end_date, 'date'):
                 end_date = end_date.date()
             
+            # Réponse directe depuis l'overview (un seul appel HTTP pour tous les retailers)
+            if self._overview_covers(start_date, end_date):
+                counters = self.overview_index.content_counters(retailer_name)
+                if counters is not None:
+                    return counters
+            
             # Essayer différents endpoints pour les données de contenu
             endpoints = [
-                f'/api/crawler/content/{retailer_name}',
-                f'/api/content/{retailer_name}',
-                f'/api/crawler/products/{retailer_name}',
-                f'/api/products/{retailer_name}',
+                '/api/crawler/content/{retailer}',
+                '/api/content/{retailer}',
+                '/api/crawler/products/{retailer}',
+                '/api/products/{retailer}',
                 '/api/crawler/content',
                 '/api/content'
             ]
@@ -583,14 +715,9 @@ class WebDataRepository:
                 'retailer': retailer_name
             }
             
-            for endpoint in endpoints:
-                response = self._make_request(endpoint, params=params)
-                if response and response.status_code == 200:
-                    try:
-                        data = response.json()
-                        return self._parse_content_counters(data, retailer_name)
-                    except json.JSONDecodeError:
-                        continue
+            data = self._probe_endpoints('content', endpoints, retailer_name, params=params)
+            if data is not None:
+                return self._parse_content_counters(data, retailer_name)
             
             # Si pas de données, retourner des valeurs par défaut
             logger.warning(f"Impossible de récupérer les stats de contenu pour {retailer_name}, utilisation de valeurs par défaut")
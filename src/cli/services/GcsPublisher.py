@@ -1,51 +1,110 @@
 """Service for publishing files to Google Cloud Storage."""
+import base64
+import glob
+import hashlib
 import logging
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 
-from google.cloud import storage
-from google.auth.exceptions import DefaultCredentialsError
+from cli.services.assets import IMMUTABLE_CACHE_CONTROL, is_hashed_asset
+from cli.services.compression import fresh_variants, split_encoding
+from cli.services.StorageBackend import READ_BLOCK_SIZE, GcsBackend, StorageBackend, _crc32c
 
 logger = logging.getLogger(__name__)
 
+# Files picked up when publishing a directory: reports, their hashed assets, CSV exports and history archives
+DEFAULT_PUBLISH_PATTERNS = ('*.html', '*.html.gz', 'assets/*.css', 'assets/*.js', 'assets/*.png',
+                            '*.csv', '*.json', '*.json.gz', '*.zip', '*.tar.gz')
+
+# Resumable upload chunks must be a multiple of 256 KiB
+CHUNK_SIZE_MULTIPLE = 256 * 1024
+
+
+@dataclass
+class PublishResult:
+    """Outcome of publishing one file."""
+    src_path: str
+    gs_url: str
+    status: str  # 'uploaded', 'skipped', 'dry-run' or 'failed'
+    error: Optional[str] = None
+
 
 class GcsPublisher:
     """Service for uploading files to Google Cloud Storage."""
     
-    def __init__(self, default_bucket: str, gcp_project: str):
+    def __init__(self, default_bucket: str, gcp_project: str, max_workers: int = 8,
+                 chunk_size: int = 8 * 1024 * 1024, backend: Optional[StorageBackend] = None,
+                 cache_control: Optional[str] = 'public, max-age=3600',
+                 latest_cache_control: Optional[str] = 'no-cache'):
         """Initialize GCS publisher.
         
         Args:
             default_bucket: Default GCS bucket name
             gcp_project: GCP project ID
+            max_workers: Number of concurrent uploads in batch mode
+            chunk_size: Files larger than this are sent as resumable uploads in chunks of this size
+            backend: Storage backend (Google Cloud Storage if None)
+            cache_control: Cache-Control of uploaded objects (None to leave unset)
+            latest_cache_control: Cache-Control of the fixed latest path, which changes every day
         """
         self.default_bucket = default_bucket
         self.gcp_project = gcp_project
-        self._client = None
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(CHUNK_SIZE_MULTIPLE, chunk_size // CHUNK_SIZE_MULTIPLE * CHUNK_SIZE_MULTIPLE)
+        self.backend = backend or GcsBackend(gcp_project)
+        self.cache_control = cache_control
+        self.latest_cache_control = latest_cache_control
+        # None until the first bucket operation validates (or rejects) the credentials
         self._credentials_available = None
+    
+    def _disable(self, error: Exception):
+        """Switch to dry-run mode after a credential error."""
+        self._credentials_available = False
+        logger.warning(f"No usable GCS credentials ({error}), will perform dry-run uploads")
+    
+    def _get_bucket(self, bucket_name: str):
+        """Get the bucket object, or None in dry-run mode.
         
-    def _get_client(self) -> Optional[storage.Client]:
-        """Get GCS client, handling credential errors gracefully."""
-        if self._client is None and self._credentials_available is None:
-            try:
-                self._client = storage.Client(project=self.gcp_project)
-                # Test credentials by attempting to list buckets
-                list(self._client.list_buckets(max_results=1))
-                self._credentials_available = True
-                logger.info("GCS client initialized successfully")
-            except DefaultCredentialsError:
-                logger.warning("No GCS credentials available, will perform dry-run uploads")
-                self._credentials_available = False
-            except Exception as e:
-                logger.warning(f"GCS client initialization failed: {e}, will perform dry-run uploads")
-                self._credentials_available = False
-                
-        return self._client if self._credentials_available else None
+        No API call is made here: credentials are validated by the first
+        real operation (see ``_run``) instead of a list_buckets probe.
+        """
+        if self._credentials_available is False:
+            return None
+        try:
+            return self.backend.bucket(bucket_name)
+        except Exception as e:
+            # Creating the client fails when no default credentials are configured
+            self._disable(e)
+            return None
+    
+    def _run(self, operation: Callable[[], Any]) -> Tuple[bool, Any]:
+        """Run the first bucket operations, switching to dry-run on credential errors.
+        
+        Returns:
+            Tuple of (executed, result); executed is False in dry-run mode
+        """
+        try:
+            result = operation()
+        except Exception as e:
+            if self._credentials_available is None and _is_credentials_error(e):
+                self._disable(e)
+                return False, None
+            raise
+        self._credentials_available = True
+        return True, result
     
     def upload(self, src_path: str, dst_blob: str, bucket_name: Optional[str] = None) -> str:
         """Upload a file to GCS.
         
+        When the report pipeline left an up-to-date ``<file>.gz`` next to the
+        file, the gzip bytes are uploaded instead with ``Content-Encoding:
+        gzip`` (GCS transcodes them for clients that do not accept gzip). A
+        ``<file>.br`` variant is uploaded to ``<dst_blob>.br`` with
+        ``Content-Encoding: br``.
+        
         Args:
             src_path: Local file path to upload
             dst_blob: Destination blob name in GCS
@@ -55,36 +114,180 @@ class GcsPublisher:
             GCS URL (gs://bucket/blob)
         """
         bucket_name = bucket_name or self.default_bucket
-        gs_url = f"gs://{bucket_name}/{dst_blob}"
+        gs_url = self.backend.url(bucket_name, dst_blob)
         
-        client = self._get_client()
-        if not client:
+        bucket = self._get_bucket(bucket_name)
+        executed = False
+        if bucket is not None:
+            try:
+                src_file = Path(src_path)
+                if not src_file.exists():
+                    raise FileNotFoundError(f"Source file not found: {src_path}")
+                
+                # Pre-compressed variants of a plain file
+                variants = fresh_variants(src_file) if split_encoding(src_file)[1] is None else {}
+                
+                executed, _ = self._run(lambda: self._upload_file(bucket, variants.get('gzip', src_file), dst_blob))
+                if executed and 'br' in variants:
+                    self._upload_file(bucket, variants['br'], f"{dst_blob}.br")
+                
+            except Exception as e:
+                logger.error(f"Failed to upload {src_path} to GCS: {e}")
+                raise
+        
+        if not executed:
             # Dry-run mode
             logger.info(f"DRY-RUN: Would upload {src_path} to {gs_url}")
             return gs_url
         
-        try:
-            src_file = Path(src_path)
-            if not src_file.exists():
-                raise FileNotFoundError(f"Source file not found: {src_path}")
+        logger.info(f"Uploaded {src_path} to {gs_url}")
+        return gs_url
+    
+    def _upload_file(self, bucket, src_file: Path, dst_blob: str):
+        """Upload one file, using a chunked resumable upload for large files."""
+        # Small files go in a single request; larger ones are resumed chunk by chunk on failure
+        chunk_size = self.chunk_size if src_file.stat().st_size > self.chunk_size else None
+        blob = bucket.blob(dst_blob, chunk_size=chunk_size)
+        
+        # Pre-compressed text files (report.html.gz) keep the type of the original file
+        original, content_encoding = split_encoding(src_file)
+        blob.content_encoding = content_encoding
+        # Content-hashed assets never change under the same name
+        blob.cache_control = IMMUTABLE_CACHE_CONTROL if is_hashed_asset(original) else self.cache_control
+        
+        # Determine content type
+        content_type = self._get_content_type(original)
+        
+        with open(src_file, 'rb') as f:
+            blob.upload_from_file(f, content_type=content_type)
+    
+    def publish_batch(self, source: str, prefix: str, bucket_name: Optional[str] = None,
+                      patterns: Iterable[str] = DEFAULT_PUBLISH_PATTERNS,
+                      skip_unchanged: bool = True, max_workers: Optional[int] = None) -> List[PublishResult]:
+        """Upload every file of a directory or glob concurrently.
+        
+        Destination names keep the path relative to the source directory (or
+        to the fixed part of the glob) under ``prefix``. Objects whose MD5 or
+        CRC32C already matches the local file are skipped, so an interrupted
+        batch can simply be run again.
+        
+        Args:
+            source: Directory, glob pattern (``reports/**/*.html``) or single file
+            prefix: Destination prefix in the bucket
+            bucket_name: GCS bucket name (uses default if None)
+            patterns: File patterns collected when ``source`` is a directory
+            skip_unchanged: Skip files whose checksum matches the remote object
+            max_workers: Concurrent uploads (uses the publisher setting if None)
             
-            # Get bucket
-            bucket = client.bucket(bucket_name)
-            blob = bucket.blob(dst_blob)
+        Returns:
+            One result per file, in source order
+        """
+        bucket_name = bucket_name or self.default_bucket
+        files = self.collect_files(source, patterns)
+        prefix = prefix.strip('/')
+        targets = [(path, f"{prefix}/{name}" if prefix else name) for path, name in files]
+        
+        def publish(target: Tuple[Path, str]) -> PublishResult:
+            path, dst_blob = target
+            gs_url = self.backend.url(bucket_name, dst_blob)
             
-            # Determine content type
-            content_type = self._get_content_type(src_file)
+            def upload() -> str:
+                if skip_unchanged and self._is_unchanged(bucket, path, dst_blob):
+                    return 'skipped'
+                self._upload_file(bucket, path, dst_blob)
+                return 'uploaded'
             
-            # Upload file
-            with open(src_file, 'rb') as f:
-                blob.upload_from_file(f, content_type=content_type)
+            try:
+                executed, status = self._run(upload)
+            except Exception as e:
+                logger.error(f"Failed to upload {path} to GCS: {e}")
+                return PublishResult(str(path), gs_url, 'failed', str(e))
             
-            logger.info(f"Uploaded {src_path} to {gs_url}")
-            return gs_url
+            if not executed:
+                return self._dry_run_result(bucket_name, path, dst_blob)
+            logger.info(f"Uploaded {path} to {gs_url}" if status == 'uploaded' else f"Unchanged, skipped: {gs_url}")
+            return PublishResult(str(path), gs_url, status)
+        
+        bucket = self._get_bucket(bucket_name)
+        if bucket is None:
+            return [self._dry_run_result(bucket_name, path, dst_blob) for path, dst_blob in targets]
+        if not targets:
+            return []
+        
+        # The first file validates the credentials before the others are started
+        first = publish(targets[0])
+        if self._credentials_available is False:
+            return [first] + [self._dry_run_result(bucket_name, path, dst_blob) for path, dst_blob in targets[1:]]
+        
+        workers = min(max_workers or self.max_workers, len(targets))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return [first] + list(executor.map(publish, targets[1:]))
+    
+    def _dry_run_result(self, bucket_name: str, path: Path, dst_blob: str) -> PublishResult:
+        """Result of a file that is not uploaded in dry-run mode."""
+        gs_url = self.backend.url(bucket_name, dst_blob)
+        logger.info(f"DRY-RUN: Would upload {path} to {gs_url}")
+        return PublishResult(str(path), gs_url, 'dry-run')
+    
+    def collect_files(self, source: str, patterns: Iterable[str] = DEFAULT_PUBLISH_PATTERNS) -> List[Tuple[Path, str]]:
+        """List the files to publish with their name relative to the source.
+        
+        Args:
+            source: Directory, glob pattern or single file
+            patterns: File patterns collected when ``source`` is a directory
             
-        except Exception as e:
-            logger.error(f"Failed to upload {src_path} to GCS: {e}")
-            raise
+        Returns:
+            Sorted (path, relative name) pairs
+        """
+        source_path = Path(source)
+        if source_path.is_dir():
+            root = source_path
+            paths = {path for pattern in patterns for path in source_path.rglob(pattern)}
+        elif source_path.is_file():
+            root = source_path.parent
+            paths = {source_path}
+        else:
+            # Glob: names are relative to the part of the pattern before the first wildcard
+            root = self._glob_root(source)
+            paths = {Path(path) for path in glob.glob(source, recursive=True)}
+        
+        return sorted(
+            (path, path.relative_to(root).as_posix())
+            for path in paths if path.is_file()
+        )
+    
+    def _glob_root(self, pattern: str) -> Path:
+        """Directory made of the leading path components of ``pattern`` that contain no wildcard."""
+        parts = []
+        for part in Path(pattern).parts[:-1]:
+            if any(char in part for char in '*?['):
+                break
+            parts.append(part)
+        return Path(*parts) if parts else Path('.')
+    
+    def _is_unchanged(self, bucket, src_file: Path, dst_blob: str) -> bool:
+        """Whether the remote object already has the local file's MD5 (or CRC32C) checksum."""
+        remote = bucket.get_blob(dst_blob)
+        if remote is None:
+            return False
+        md5_hash, crc32c = self._file_checksums(src_file)
+        if remote.md5_hash:
+            return remote.md5_hash == md5_hash
+        # Composite objects have no MD5, only a CRC32C
+        return bool(remote.crc32c) and remote.crc32c == crc32c
+    
+    def _file_checksums(self, src_file: Path) -> Tuple[str, Optional[str]]:
+        """Base64 MD5 and CRC32C of a file, as reported by GCS object metadata."""
+        crc = _crc32c()
+        md5 = hashlib.md5()
+        with open(src_file, 'rb') as f:
+            for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+                md5.update(block)
+                if crc is not None:
+                    crc.update(block)
+        
+        crc32c = base64.b64encode(crc.digest()).decode('ascii') if crc is not None else None
+        return base64.b64encode(md5.digest()).decode('ascii'), crc32c
     
     def update_latest(self, src_blob: str, latest_path: str, bucket_name: Optional[str] = None) -> str:
         """Copy a blob to the fixed latest path.
@@ -98,27 +301,30 @@ class GcsPublisher:
             GCS URL of the latest path
         """
         bucket_name = bucket_name or self.default_bucket
-        latest_url = f"gs://{bucket_name}/{latest_path}"
+        latest_url = self.backend.url(bucket_name, latest_path)
+        
+        bucket = self._get_bucket(bucket_name)
+        executed = False
+        if bucket is not None:
+            try:
+                # Copy to latest path
+                executed, latest = self._run(lambda: bucket.copy_blob(bucket.blob(src_blob), bucket, latest_path))
+                
+                # The copy keeps the long cache lifetime of the dated report
+                if executed and self.latest_cache_control and latest.cache_control != self.latest_cache_control:
+                    latest.cache_control = self.latest_cache_control
+                    latest.patch()
+            except Exception as e:
+                logger.error(f"Failed to update latest path: {e}")
+                raise
         
-        client = self._get_client()
-        if not client:
+        if not executed:
             # Dry-run mode
             logger.info(f"DRY-RUN: Would copy {src_blob} to {latest_path}")
             return latest_url
         
-        try:
-            bucket = client.bucket(bucket_name)
-            src_blob_obj = bucket.blob(src_blob)
-            
-            # Copy to latest path
-            bucket.copy_blob(src_blob_obj, bucket, latest_path)
-            
-            logger.info(f"Updated latest path: {latest_url}")
-            return latest_url
-            
-        except Exception as e:
-            logger.error(f"Failed to update latest path: {e}")
-            raise
+        logger.info(f"Updated latest path: {latest_url}")
+        return latest_url
     
     def upload_and_set_latest(self, src_path: str, dst_blob: str, latest_path: str, bucket_name: Optional[str] = None) -> tuple[str, str]:
         """Upload a file and also set it as the latest version.
@@ -152,3 +358,12 @@ class GcsPublisher:
             # Use mimetypes for other files
             content_type, _ = mimetypes.guess_type(str(file_path))
             return content_type or 'application/octet-stream'
+
+
+def _is_credentials_error(error: Exception) -> bool:
+    """Whether ``error`` comes from missing or unusable Google credentials."""
+    try:
+        from google.auth.exceptions import GoogleAuthError
+    except ImportError:
+        return False
+    return isinstance(error, GoogleAuthError)
@@ -2,22 +2,36 @@
 import logging
 import os
 import csv
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 from zoneinfo import ZoneInfo
 
+from cli.repository.IncidentRepository import RetailerRule
 from cli.repository.WebDataRepository import WebDataRepository
+from cli.services.compression import write_compressed_variants
+from cli.services.html_stream import RowSpool, open_html_output
+from cli.services.status import STATUS_NAMES, classify
 
 logger = logging.getLogger(__name__)
 
+# Time of day checked by the progress rule (min_progress_0930)
+PROGRESS_TIME = time(9, 30)
+
+# Counters returned as tuples (IncidentRepository), named like the dict counters of the other repositories
+TUPLE_COUNTER_KEYS = {
+    'get_success_counters': ('success_count', 'total_count'),
+    'get_progress_at': ('completed_count', 'expected_total'),
+}
+
 
 @dataclass
 class ReportItem:
     """Single report item representing a rule evaluation."""
     retailer: str
-    rule_type: str  # 'crawling_rate' or 'content_rate'
+    rule_type: str  # 'crawling_rate', 'content_rate', 'success_rate', 'progress_0930', 'item_success_rate' or 'ko_rate'
     threshold_success: float
     threshold_warning: float
     actual_value: float
@@ -29,11 +43,14 @@ class ReportItem:
 class ReportService:
     """Service for generating dealer anomaly reports."""
     
-    def __init__(self, repository, output_dir: str, tz: str = "Europe/Paris", include_successes: bool = False):
+    def __init__(self, repository, output_dir: str, tz: str = "Europe/Paris", include_successes: bool = False,
+                 max_workers: int = 1):
         self.repository = repository
         self.output_dir = output_dir
         self.tz = tz
         self.include_successes = include_successes
+        # Number of retailers evaluated concurrently (1 = sequential)
+        self.max_workers = max(1, int(max_workers))
         self.logger = logging.getLogger(__name__)
         
         # Créer le dossier de sortie s'il n'existe pas
@@ -65,6 +82,12 @@ class ReportService:
             
         logger.info(f"Generating report for {date_from} to {date_to}, dealer={dealer}, format={fmt}")
         
+        # Repositories backed by a bulk snapshot (e.g. the Spider Vision overview)
+        # fetch it once per report run
+        refresh = getattr(self.repository, 'refresh_overview', None)
+        if callable(refresh):
+            refresh()
+        
         # Get retailer rules
         rules = self.repository.get_rules(dealer)
         if not rules:
@@ -88,6 +111,8 @@ class ReportService:
         if fmt in ('html', 'both'):
             html_path = Path(self.output_dir) / f"dealer-report-{timestamp}.html"
             self._write_html(report_items, html_path, date_from, date_to)
+            # Pre-compressed variants served with Content-Encoding by publish_report
+            write_compressed_variants(html_path)
             
         # Return appropriate path
         if fmt == 'csv':
@@ -98,81 +123,247 @@ class ReportService:
             return str(html_path)
     
     def _generate_report_items(self, rules, date_from: date, date_to: date) -> List[ReportItem]:
-        """Generate report items by evaluating rules."""
+        """Generate report items by evaluating rules.
+        
+        When max_workers > 1 the rules are evaluated concurrently, one task per
+        retailer, so wall-clock time follows the slowest retailer instead of
+        the sum of all of them. Items are collected in rule order before the
+        final sort, so the output is identical to the sequential mode.
+        
+        Rules are dicts with percentage thresholds; RetailerRule objects from
+        IncidentRepository (fractions) are converted with RetailerRule.to_rule.
+        """
+        rules = [rule.to_rule() if isinstance(rule, RetailerRule) else rule for rule in rules]
+        
+        # Counters of all retailers in one query per counter type when the repository supports it
+        prefetched = {
+            method: self._prefetch_counters(
+                method,
+                [rule['retailer_name'] for rule in rules
+                 if any(rule.get(threshold) is not None for threshold in thresholds)],
+                *args
+            )
+            for method, thresholds, args in (
+                ('get_crawling_counters', ('min_crawling_rate',), (date_from, date_to)),
+                ('get_content_counters', ('min_content_rate',), (date_from, date_to)),
+                ('get_success_counters', ('min_success_rate',), (date_from, date_to)),
+                ('get_progress_at', ('min_progress_0930',), (date_to, PROGRESS_TIME)),
+                ('get_item_counters', ('min_item_success_rate', 'max_ko_rate'), (date_from, date_to)),
+            )
+        }
+        
+        if self.max_workers > 1 and len(rules) > 1:
+            workers = min(self.max_workers, len(rules))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-rule") as executor:
+                results = list(executor.map(
+                    lambda rule: self._evaluate_rule(rule, date_from, date_to, prefetched), rules))
+        else:
+            results = [self._evaluate_rule(rule, date_from, date_to, prefetched) for rule in rules]
+        
+        items = [item for rule_items in results for item in rule_items]
+        
+        # Sort items: errors first (by retailer), then warnings, then successes (by retailer)
+        items.sort(key=lambda x: (x.status != 'success', x.retailer))
+        return items
+    
+    def _prefetch_counters(self, method: str, retailers: List[str], *args) -> Dict[str, dict]:
+        """Counters of many retailers from the repository's ``<method>_bulk`` variant.
+        
+        The bulk variant takes the arguments of ``method`` without the leading
+        retailer, e.g. ``get_success_counters_bulk(date_from, date_to, retailers=...)``
+        or ``get_progress_at_bulk(the_date, at_time, retailers=...)``.
+        
+        Returns an empty dict when the repository has no bulk variant, when
+        there is no retailer to query or when the bulk query fails: the
+        retailers are then queried one by one.
+        """
+        bulk = getattr(self.repository, f"{method}_bulk", None)
+        if not callable(bulk) or not retailers:
+            return {}
+        try:
+            counters = bulk(*args, retailers=retailers)
+        except Exception as e:
+            logger.warning(f"Bulk {method} failed, querying retailers one by one: {e}")
+            return {}
+        return counters if isinstance(counters, dict) else {}
+    
+    def _get_counters(self, method: str, retailer: str, *args,
+                      prefetched: Optional[Dict[str, Dict[str, dict]]] = None) -> dict:
+        """Counters of one retailer, from the prefetched bulk result when available.
+        
+        Tuple results are converted to the dict form (see TUPLE_COUNTER_KEYS),
+        so every repository is read the same way.
+        """
+        counters = (prefetched or {}).get(method, {}).get(retailer)
+        if counters is None:
+            counters = getattr(self.repository, method)(retailer, *args)
+        if isinstance(counters, tuple) and method in TUPLE_COUNTER_KEYS:
+            counters = dict(zip(TUPLE_COUNTER_KEYS[method], counters))
+        return counters
+    
+    def _evaluate_rule(self, rule, date_from: date, date_to: date,
+                       prefetched: Optional[Dict[str, Dict[str, dict]]] = None) -> List[ReportItem]:
+        """Evaluate every rule type configured for a single retailer."""
         items = []
         
-        for rule in rules:
-            # Check crawling rate rule
-            if rule.get('min_crawling_rate') is not None:
-                counters = self.repository.get_crawling_counters(rule['retailer_name'], date_from, date_to)
-                crawling_count = counters['crawling_count']
-                total_count = counters['total_count']
-                
-                if total_count == 0:
-                    crawling_rate = 0.0
-                else:
-                    crawling_rate = (crawling_count / total_count) * 100
-                
-                # Create report item for crawling rate
-                item = ReportItem(
+        # Check crawling rate rule
+        if rule.get('min_crawling_rate') is not None:
+            counters = self._get_counters('get_crawling_counters', rule['retailer_name'], date_from, date_to,
+                                          prefetched=prefetched)
+            crawling_count = counters['crawling_count']
+            total_count = counters['total_count']
+            
+            if total_count == 0:
+                crawling_rate = 0.0
+            else:
+                crawling_rate = (crawling_count / total_count) * 100
+            
+            # Create report item for crawling rate
+            item = ReportItem(
+                retailer=rule['retailer_name'],
+                rule_type="crawling_rate",
+                threshold_success=rule['min_crawling_rate'],
+                threshold_warning=rule['min_crawling_rate_warning'],
+                actual_value=crawling_rate,
+                status=self._get_status(crawling_rate, rule['min_crawling_rate'], rule['min_crawling_rate_warning']),
+                details={
+                    'crawling_count': crawling_count,
+                    'total_count': total_count,
+                    'period_days': (date_to - date_from).days + 1
+                },
+                message=""
+            )
+            items.append(item)
+            
+            logger.debug(f"Crawling rate for {rule['retailer_name']}: {crawling_rate:.1f}% "
+                       f"({crawling_count}/{total_count}), threshold: {rule['min_crawling_rate']}%")
+        
+        # Check content rate rule
+        if rule.get('min_content_rate') is not None:
+            counters = self._get_counters('get_content_counters', rule['retailer_name'], date_from, date_to,
+                                          prefetched=prefetched)
+            content_count = counters['content_count']
+            total_count = counters['total_count']
+            
+            if total_count == 0:
+                content_rate = 0.0
+            else:
+                content_rate = (content_count / total_count) * 100
+            
+            # Create report item for content rate
+            item = ReportItem(
+                retailer=rule['retailer_name'],
+                rule_type="content_rate",
+                threshold_success=rule['min_content_rate'],
+                threshold_warning=rule['min_content_rate_warning'],
+                actual_value=content_rate,
+                status=self._get_status(content_rate, rule['min_content_rate'], rule['min_content_rate_warning']),
+                details={
+                    'content_count': content_count,
+                    'total_count': total_count,
+                    'period_days': (date_to - date_from).days + 1
+                },
+                message=""
+            )
+            items.append(item)
+        
+        # Run success rate over the period
+        if rule.get('min_success_rate') is not None:
+            counters = self._get_counters('get_success_counters', rule['retailer_name'],
+                                          date_from, date_to, prefetched=prefetched)
+            success_count = counters['success_count']
+            total_count = counters['total_count']
+            success_rate = (success_count / total_count) * 100 if total_count else 0.0
+            threshold = rule['min_success_rate']
+            threshold_warning = rule.get('min_success_rate_warning', threshold)
+            items.append(ReportItem(
+                retailer=rule['retailer_name'],
+                rule_type="success_rate",
+                threshold_success=threshold,
+                threshold_warning=threshold_warning,
+                actual_value=success_rate,
+                status=self._get_status(success_rate, threshold, threshold_warning),
+                details={
+                    'success_count': success_count,
+                    'total_count': total_count,
+                    'period_days': (date_to - date_from).days + 1
+                },
+                message=""
+            ))
+        
+        # Runs completed by 09:30 on the last day
+        if rule.get('min_progress_0930') is not None:
+            counters = self._get_counters('get_progress_at', rule['retailer_name'],
+                                          date_to, PROGRESS_TIME, prefetched=prefetched)
+            completed_count = counters['completed_count']
+            expected_total = counters['expected_total']
+            progress = (completed_count / expected_total) * 100 if expected_total else 0.0
+            threshold = rule['min_progress_0930']
+            threshold_warning = rule.get('min_progress_0930_warning', threshold)
+            items.append(ReportItem(
+                retailer=rule['retailer_name'],
+                rule_type="progress_0930",
+                threshold_success=threshold,
+                threshold_warning=threshold_warning,
+                actual_value=progress,
+                status=self._get_status(progress, threshold, threshold_warning),
+                details={
+                    'completed_count': completed_count,
+                    'expected_total': expected_total,
+                    'date': date_to
+                },
+                message=""
+            ))
+        
+        # Item-weighted rules: a run counts by its items, not by its status
+        if rule.get('min_item_success_rate') is not None or rule.get('max_ko_rate') is not None:
+            counters = self._get_counters('get_item_counters', rule['retailer_name'], date_from, date_to,
+                                          prefetched=prefetched)
+            total_items = counters['total_items']
+            details = {
+                'ok_items': counters['ok_items'],
+                'ko_items': counters['ko_items'],
+                'total_items': total_items,
+                'period_days': (date_to - date_from).days + 1
+            }
+            
+            if rule.get('min_item_success_rate') is not None:
+                # No item at all is an anomaly, as for the other rates
+                item_success_rate = (counters['ok_items'] / total_items) * 100 if total_items else 0.0
+                threshold = rule['min_item_success_rate']
+                threshold_warning = rule.get('min_item_success_rate_warning', threshold)
+                items.append(ReportItem(
                     retailer=rule['retailer_name'],
-                    rule_type="crawling_rate",
-                    threshold_success=rule['min_crawling_rate'],
-                    threshold_warning=rule['min_crawling_rate_warning'],
-                    actual_value=crawling_rate,
-                    status=self._get_status(crawling_rate, rule['min_crawling_rate'], rule['min_crawling_rate_warning']),
-                    details={
-                        'crawling_count': crawling_count,
-                        'total_count': total_count,
-                        'period_days': (date_to - date_from).days + 1
-                    },
+                    rule_type="item_success_rate",
+                    threshold_success=threshold,
+                    threshold_warning=threshold_warning,
+                    actual_value=item_success_rate,
+                    status=self._get_status(item_success_rate, threshold, threshold_warning),
+                    details=details,
                     message=""
-                )
-                items.append(item)
-                
-                logger.debug(f"Crawling rate for {rule['retailer_name']}: {crawling_rate:.1f}% "
-                           f"({crawling_count}/{total_count}), threshold: {rule['min_crawling_rate']}%")
+                ))
             
-            # Check content rate rule
-            if rule.get('min_content_rate') is not None:
-                counters = self.repository.get_content_counters(rule['retailer_name'], date_from, date_to)
-                content_count = counters['content_count']
-                total_count = counters['total_count']
-                
-                if total_count == 0:
-                    content_rate = 0.0
-                else:
-                    content_rate = (content_count / total_count) * 100
-                
-                # Create report item for content rate
-                item = ReportItem(
+            if rule.get('max_ko_rate') is not None:
+                ko_rate = (counters['ko_items'] / total_items) * 100 if total_items else 100.0
+                threshold = rule['max_ko_rate']
+                threshold_warning = rule.get('max_ko_rate_warning', threshold)
+                items.append(ReportItem(
                     retailer=rule['retailer_name'],
-                    rule_type="content_rate",
-                    threshold_success=rule['min_content_rate'],
-                    threshold_warning=rule['min_content_rate_warning'],
-                    actual_value=content_rate,
-                    status=self._get_status(content_rate, rule['min_content_rate'], rule['min_content_rate_warning']),
-                    details={
-                        'content_count': content_count,
-                        'total_count': total_count,
-                        'period_days': (date_to - date_from).days + 1
-                    },
+                    rule_type="ko_rate",
+                    threshold_success=threshold,
+                    threshold_warning=threshold_warning,
+                    actual_value=ko_rate,
+                    # Lower is better: compare the negated rate with the negated ceilings
+                    status=self._get_status(-ko_rate, -threshold, -threshold_warning),
+                    details=details,
                     message=""
-                )
-                items.append(item)
+                ))
         
-        # Sort items: errors first (by retailer), then warnings, then successes (by retailer)
-        items.sort(key=lambda x: (x.status != 'success', x.retailer))
         return items
     
     def _get_status(self, actual_value: float, threshold_success: float, threshold_warning: float) -> str:
-        """Get the status of a report item."""
-        if actual_value >= threshold_success:
-            return 'success'
-        elif actual_value >= threshold_warning:
-            return 'warning'
-        else:
-            return 'error'
+        """Get the status of a report item (same classification as the HTML exports)."""
+        return STATUS_NAMES[int(classify(actual_value, threshold_success, threshold_warning))]
     
     def _format_percentage(self, value: float) -> str:
         """Format a decimal as a percentage with at most one decimal place."""
@@ -203,16 +394,27 @@ class ReportService:
         
         logger.info(f"CSV report written to {path}")
     
-    def _write_html(self, items: List[ReportItem], path: Path, date_from: date, date_to: date):
-        """Write report items to HTML file."""
+    def _write_html(self, items: Iterable[ReportItem], path: Path, date_from: date, date_to: date,
+                    compress: Optional[bool] = None):
+        """Write report items to HTML file.
+        
+        The document is streamed: items are formatted as they are read and
+        spooled per status, then the head, each section and the footer are
+        written to a buffered (or gzip) file handle. Memory does not grow with
+        the number of items, which may come from a generator.
+        """
         date_range = f"{date_from}" if date_from == date_to else f"{date_from} to {date_to}"
         
         # Separate errors, warnings and successes
-        errors = [item for item in items if item.status == 'error']
-        warnings = [item for item in items if item.status == 'warning']
-        successes = [item for item in items if item.status == 'success']
-        
-        html_content = f"""<!DOCTYPE html>
+        with RowSpool(('error', 'warning', 'success')) as spool:
+            for item in items:
+                if item.status in ('error', 'warning', 'success'):
+                    # Newline-separated within a section, like '\n'.join
+                    separator = '\n' if spool.counts[item.status] else ''
+                    spool.add(item.status, separator + self._format_item_html(item, item.status))
+            
+            with open_html_output(path, compress) as f:
+                f.write(f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
@@ -287,57 +489,60 @@ class ReportService:
         
         <div class="section">
             <h2>⚠️ Erreurs</h2>
-            {self._format_items_html(errors, 'error')}
+            """)
+                self._write_items_html(f, spool, 'error')
+                f.write("""
         </div>
         
-        {self._format_warnings_section(warnings) if warnings else ''}
+        """)
+                if spool.counts['warning']:
+                    f.write("""
+        <div class="section">
+            <h2>⚠️ Avertissements</h2>
+            """)
+                    self._write_items_html(f, spool, 'warning')
+                    f.write("""
+        </div>""")
+                f.write("""
         
-        {self._format_successes_section(successes) if successes else ''}
+        """)
+                if spool.counts['success']:
+                    f.write("""
+        <div class="section">
+            <h2>✅ Succès</h2>
+            """)
+                    self._write_items_html(f, spool, 'success')
+                    f.write("""
+        </div>""")
+                f.write("""
     </div>
 </body>
-</html>"""
-        
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+</html>""")
         
         logger.info(f"HTML report written to {path}")
     
-    def _format_items_html(self, items: List[ReportItem], item_type: str) -> str:
-        """Format report items as HTML."""
-        if not items:
-            return f'<div class="item {item_type}">Aucun élément à afficher.</div>'
-        
-        items_html = []
-        for item in items:
-            if item.rule_type == "crawling_rate":
-                message = f"{item.retailer}: crawling rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
-            elif item.rule_type == "content_rate":
-                message = f"{item.retailer}: content rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
-            else:
-                message = f"{item.retailer}: {item.rule_type} = {self._format_percentage(item.actual_value)}"
-            
-            items_html.append(f'<div class="item {item_type}">{message}</div>')
-        
-        return '\n'.join(items_html)
-    
-    def _format_warnings_section(self, warnings: List[ReportItem]) -> str:
-        """Render the warnings section if there are any."""
-        if not warnings:
-            return ''
-        
-        return f"""
-        <div class="section">
-            <h2>⚠️ Avertissements</h2>
-            {self._format_items_html(warnings, 'warning')}
-        </div>"""
+    def _write_items_html(self, f, spool: RowSpool, item_type: str):
+        """Copy the spooled items of one status, or the empty-section placeholder."""
+        if not spool.counts[item_type]:
+            f.write(f'<div class="item {item_type}">Aucun élément à afficher.</div>')
+            return
+        spool.copy_to(f, [item_type])
     
-    def _format_successes_section(self, successes: List[ReportItem]) -> str:
-        """Render the successes section if there are any."""
-        if not successes:
-            return ''
+    def _format_item_html(self, item: ReportItem, item_type: str) -> str:
+        """Format a single report item as HTML."""
+        if item.rule_type == "crawling_rate":
+            message = f"{item.retailer}: crawling rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        elif item.rule_type == "content_rate":
+            message = f"{item.retailer}: content rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        elif item.rule_type == "success_rate":
+            message = f"{item.retailer}: success rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        elif item.rule_type == "progress_0930":
+            message = f"{item.retailer}: progress at 09:30 = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        elif item.rule_type == "item_success_rate":
+            message = f"{item.retailer}: item success rate = {self._format_percentage(item.actual_value)} (threshold {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        elif item.rule_type == "ko_rate":
+            message = f"{item.retailer}: KO item rate = {self._format_percentage(item.actual_value)} (max {self._format_percentage(item.threshold_success)}, warning {self._format_percentage(item.threshold_warning)})"
+        else:
+            message = f"{item.retailer}: {item.rule_type} = {self._format_percentage(item.actual_value)}"
         
-        return f"""
-        <div class="section">
-            <h2>✅ Succès</h2>
-            {self._format_items_html(successes, 'success')}
-        </div>"""
+        return f'<div class="item {item_type}">{message}</div>'
@@ -0,0 +1,219 @@
+"""Storage backends used by GcsPublisher (Google Cloud Storage or a local directory)."""
+import base64
+import hashlib
+import json
+import logging
+import os
+import shutil
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Object storage used by the publisher.
+
+    A backend hands out bucket objects following the subset of the
+    ``google.cloud.storage.Bucket`` API used by GcsPublisher: ``blob(name,
+    chunk_size=None)``, ``get_blob(name)`` and ``copy_blob(blob,
+    destination_bucket, new_name)``. Blobs expose ``upload_from_file``,
+    ``patch``, ``md5_hash``, ``crc32c``, ``content_encoding`` and
+    ``cache_control``.
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def bucket(self, bucket_name: str):
+        """Return the bucket object for ``bucket_name``."""
+
+    @abstractmethod
+    def url(self, bucket_name: str, blob_name: str) -> str:
+        """Return the URL reported for a published object."""
+
+
+@lru_cache(maxsize=None)
+def _gcs_client(project: str):
+    """GCS client shared by every publisher of the process (created on first use)."""
+    from google.cloud import storage
+    return storage.Client(project=project)
+
+
+class GcsBackend(StorageBackend):
+    """Google Cloud Storage backend.
+
+    No API call is made when the backend is created: the client is built on
+    the first bucket operation and credentials are therefore validated by
+    the first real upload or copy. The client is cached per project for the
+    lifetime of the process.
+    """
+
+    name = 'gcs'
+
+    def __init__(self, project: str):
+        """Initialize GCS backend.
+
+        Args:
+            project: GCP project ID
+        """
+        self.project = project
+
+    def bucket(self, bucket_name: str):
+        return _gcs_client(self.project).bucket(bucket_name)
+
+    def url(self, bucket_name: str, blob_name: str) -> str:
+        return f"gs://{bucket_name}/{blob_name}"
+
+
+class LocalDirectoryBackend(StorageBackend):
+    """Backend storing objects as files under ``root/<bucket>/<blob>``.
+
+    Used for local runs and tests. Object metadata (content type, checksums)
+    is kept next to the tree in ``root/.metadata`` so that the bucket
+    directories mirror exactly what would be published.
+    """
+
+    name = 'local'
+
+    def __init__(self, root: str):
+        """Initialize local backend.
+
+        Args:
+            root: Directory holding one sub-directory per bucket
+        """
+        self.root = Path(root)
+
+    def bucket(self, bucket_name: str) -> "LocalBucket":
+        return LocalBucket(self.root, bucket_name)
+
+    def url(self, bucket_name: str, blob_name: str) -> str:
+        return (self.root / bucket_name / blob_name).resolve().as_uri()
+
+
+class LocalBucket:
+    """Bucket of a LocalDirectoryBackend."""
+
+    def __init__(self, root: Path, name: str):
+        self.root = root
+        self.name = name
+
+    def blob(self, blob_name: str, chunk_size: Optional[int] = None) -> "LocalBlob":
+        return LocalBlob(self, blob_name, chunk_size)
+
+    def get_blob(self, blob_name: str) -> Optional["LocalBlob"]:
+        blob = self.blob(blob_name)
+        if not blob.path.is_file():
+            return None
+        blob.reload()
+        return blob
+
+    def copy_blob(self, blob: "LocalBlob", destination_bucket: "LocalBucket", new_name: str) -> "LocalBlob":
+        copy = destination_bucket.blob(new_name)
+        copy.path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(blob.path, copy.path)
+        if blob.metadata_path.exists():
+            copy.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(blob.metadata_path, copy.metadata_path)
+        copy.reload()
+        return copy
+
+
+class LocalBlob:
+    """Object of a LocalBucket."""
+
+    def __init__(self, bucket: LocalBucket, name: str, chunk_size: Optional[int] = None):
+        self.bucket = bucket
+        self.name = name
+        self.chunk_size = chunk_size
+        self.content_type = None
+        self.content_encoding = None
+        self.cache_control = None
+        self.md5_hash = None
+        self.crc32c = None
+        self.size = None
+
+    @property
+    def path(self) -> Path:
+        return self.bucket.root / self.bucket.name / self.name
+
+    @property
+    def metadata_path(self) -> Path:
+        return self.bucket.root / '.metadata' / self.bucket.name / f"{self.name}.json"
+
+    def reload(self):
+        """Load the stored metadata of the object."""
+        if self.metadata_path.exists():
+            metadata = json.loads(self.metadata_path.read_text(encoding='utf-8'))
+            for key, value in metadata.items():
+                setattr(self, key, value)
+
+    def upload_from_file(self, file_obj, content_type: Optional[str] = None):
+        """Write the object atomically and record its metadata."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        md5 = hashlib.md5()
+        crc = _crc32c()
+        size = 0
+        try:
+            with open(tmp_path, 'wb') as f:
+                for block in iter(lambda: file_obj.read(READ_BLOCK_SIZE), b''):
+                    f.write(block)
+                    md5.update(block)
+                    if crc is not None:
+                        crc.update(block)
+                    size += len(block)
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+        self.content_type = content_type
+        self.md5_hash = base64.b64encode(md5.digest()).decode('ascii')
+        self.crc32c = base64.b64encode(crc.digest()).decode('ascii') if crc is not None else None
+        self.size = size
+        self.patch()
+
+    def patch(self):
+        """Store the current metadata of the object."""
+        self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+        self.metadata_path.write_text(json.dumps({
+            'content_type': self.content_type,
+            'content_encoding': self.content_encoding,
+            'cache_control': self.cache_control,
+            'md5_hash': self.md5_hash,
+            'crc32c': self.crc32c,
+            'size': self.size
+        }), encoding='utf-8')
+
+
+def _crc32c():
+    """CRC32C accumulator (None when google-crc32c is not installed)."""
+    try:
+        import google_crc32c
+    except ImportError:
+        return None
+    return google_crc32c.Checksum()
+
+
+def create_backend(kind: str, project: str, local_root: Optional[str] = None) -> StorageBackend:
+    """Create the storage backend selected by configuration.
+
+    Args:
+        kind: 'gcs' or 'local'
+        project: GCP project ID (GCS backend)
+        local_root: Root directory of the local backend
+            (defaults to $DEALER_REPORT_CACHE_DIR/gcs)
+    """
+    kind = (kind or 'gcs').lower()
+    if kind == 'gcs':
+        return GcsBackend(project)
+    if kind == 'local':
+        root = local_root or str(Path(os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')) / 'gcs')
+        logger.info(f"Publishing to local directory {root}")
+        return LocalDirectoryBackend(root)
+    raise ValueError(f"Unknown storage backend: {kind} (expected 'gcs' or 'local')")
@@ -6,21 +6,25 @@ from typing import Optional
 import requests
 import click
 
+from cli.services.http_session import get_shared_session
+
 logger = logging.getLogger(__name__)
 
 
 class TeamsNotifier:
     """Service for sending notifications to Microsoft Teams."""
     
-    def __init__(self, webhook_url: str, default_message: str):
+    def __init__(self, webhook_url: str, default_message: str, session: Optional[requests.Session] = None):
         """Initialize Teams notifier.
         
         Args:
             webhook_url: Microsoft Teams webhook URL
             default_message: Default message to use if none provided
+            session: Shared HTTP session (process-wide session if None)
         """
         self.webhook_url = webhook_url
         self.default_message = default_message
+        self.session = session or get_shared_session()
         
     def send_notification(self, url: str, message: Optional[str] = None, webhook_url: Optional[str] = None) -> bool:
         """Send notification to Teams channel.
@@ -60,7 +64,7 @@ class TeamsNotifier:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = requests.post(
+                response = self.session.post(
                     webhook,
                     json=payload,
                     timeout=10,
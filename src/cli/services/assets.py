@@ -0,0 +1,83 @@
+"""Ressources statiques (CSS, JS, logo) des rapports publiées sous un nom haché."""
+
+import hashlib
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Union
+
+logger = logging.getLogger(__name__)
+
+# Sous-dossier des ressources, à côté des rapports (``reports/assets``)
+ASSETS_DIR = 'assets'
+
+# Nombre de caractères hexadécimaux du hash ajouté au nom (``live_report.3f9a1c2b7e.css``)
+HASH_LENGTH = 10
+
+# Un fichier haché ne change jamais de contenu : il peut être mis en cache indéfiniment
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}\.[A-Za-z0-9]+$' % HASH_LENGTH)
+
+
+def inline_assets() -> bool:
+    """
+    Mode d'intégration des ressources (``REPORT_ASSETS``).
+
+    ``external`` (par défaut) : les rapports référencent ``assets/`` ;
+    ``inline`` : fichier HTML autonome (CSS, JS et logo intégrés).
+    """
+    value = os.getenv('REPORT_ASSETS', 'external').strip().lower()
+    if value not in ('external', 'inline'):
+        logger.warning(f"REPORT_ASSETS inconnu ({value}), ressources externes utilisées")
+        return False
+    return value == 'inline'
+
+
+def hashed_name(name: str, content: bytes) -> str:
+    """Nom de fichier incluant le hash du contenu (``logo.png`` -> ``logo.<hash>.png``)."""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    path = Path(name)
+    return f"{path.stem}.{digest}{path.suffix}"
+
+
+def is_hashed_asset(path: Union[str, Path]) -> bool:
+    """True si ``path`` est une ressource publiée par ``publish_asset``."""
+    path = Path(path)
+    return path.parent.name == ASSETS_DIR and bool(_HASHED_NAME.search(path.name))
+
+
+def publish_asset(output_dir: Union[str, Path], name: str, content: Union[str, bytes]) -> str:
+    """
+    Écrit une ressource sous ``output_dir/assets`` avec un nom haché.
+
+    Le fichier n'est écrit que s'il n'existe pas encore : tous les rapports
+    d'un même dossier partagent la même version d'une ressource, et les
+    anciens rapports gardent celle avec laquelle ils ont été générés.
+
+    Args:
+        output_dir: Dossier des rapports
+        name: Nom de la ressource (``live_report.css``)
+        content: Contenu (texte encodé en UTF-8)
+
+    Returns:
+        str: URL relative au dossier des rapports (``assets/live_report.<hash>.css``)
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    filename = hashed_name(name, content)
+    target = Path(output_dir) / ASSETS_DIR / filename
+
+    if not target.exists():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(content)
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        logger.info(f"Ressource publiée: {target}")
+
+    return f"{ASSETS_DIR}/{filename}"
@@ -0,0 +1,215 @@
+"""Client asynchrone (aiohttp) pour récupérer en masse l'historique des magasins SpiderVision."""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from cli.env import load_env
+
+# Charger les variables d'environnement
+load_env()
+
+logger = logging.getLogger(__name__)
+
+
+def _import_aiohttp():
+    """Import différé d'aiohttp (dépendance optionnelle)."""
+    try:
+        import aiohttp
+    except ImportError as e:
+        raise RuntimeError(
+            "aiohttp est requis pour le client asynchrone SpiderVision "
+            "(pip install 'dealer-report[async]')"
+        ) from e
+    return aiohttp
+
+
+class AsyncSpiderVisionData:
+    """
+    Équivalent asynchrone de SpiderVisionData.
+
+    Les requêtes partagent une seule session aiohttp dont le connecteur limite
+    le nombre de connexions (globalement et par hôte) ; un sémaphore borne le
+    nombre de requêtes en vol. À utiliser comme context manager asynchrone :
+
+        async with AsyncSpiderVisionData(auth=auth) as client:
+            histories = await client.get_store_histories(token, store_ids, deadline=600)
+    """
+
+    def __init__(self, auth=None, max_concurrency: Optional[int] = None,
+                 limit_per_host: Optional[int] = None, timeout: float = 30):
+        """
+        Args:
+            auth: SpiderVisionAuth utilisé pour rafraîchir le token sur une réponse 401 (optionnel)
+            max_concurrency: Nombre maximum de requêtes simultanées
+            limit_per_host: Nombre maximum de connexions ouvertes vers l'API
+            timeout: Timeout de chaque requête (secondes)
+        """
+        self.auth = auth
+        self.api_base = os.getenv('SPIDER_VISION_API_BASE', 'https://spider-vision.data-solutions.com/')
+        self.overview_endpoint = os.getenv('SPIDER_VISION_OVERVIEW_ENDPOINT', '/store-history/overview')
+        self.max_concurrency = int(max_concurrency or os.getenv('SPIDER_VISION_ASYNC_CONCURRENCY', '20'))
+        self.limit_per_host = int(limit_per_host or os.getenv('SPIDER_VISION_ASYNC_LIMIT_PER_HOST',
+                                                              str(self.max_concurrency)))
+        self.timeout = timeout
+
+        self._session = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._token: Optional[str] = None
+
+    async def __aenter__(self) -> "AsyncSpiderVisionData":
+        aiohttp = _import_aiohttp()
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.limit_per_host)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers={"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._refresh_lock = asyncio.Lock()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """Ferme la session HTTP."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _url(self, endpoint: str) -> str:
+        return f"{self.api_base.rstrip('/')}{endpoint}"
+
+    async def _refresh_token(self, stale_token: str) -> str:
+        """Rafraîchit le token une seule fois pour toutes les requêtes refusées en même temps."""
+        async with self._refresh_lock:
+            if self._token and self._token != stale_token:
+                return self._token
+            logger.info("Token refusé (401), rafraîchissement du token")
+            self._token = await asyncio.to_thread(self.auth.refresh, stale_token)
+            return self._token
+
+    async def _get_json(self, url: str, token: str) -> Any:
+        """GET authentifié ; sur 401, rafraîchit le token une fois puis rejoue la requête."""
+        if self._session is None:
+            raise RuntimeError("Session non ouverte : utiliser 'async with AsyncSpiderVisionData()'")
+        if not token:
+            raise RuntimeError("Token d'authentification requis")
+
+        aiohttp = _import_aiohttp()
+        token = self._token or token
+
+        async with self._semaphore:
+            try:
+                for attempt in range(2):
+                    headers = {"Authorization": f"Bearer {token}"}
+                    async with self._session.get(url, headers=headers) as response:
+                        if response.status == 401 and attempt == 0 and self.auth is not None:
+                            token = await self._refresh_token(token)
+                            continue
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+                        error_msg = f"Échec de récupération depuis {url}: {response.status}"
+                        logger.error(error_msg)
+                        raise RuntimeError(error_msg)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error_msg = f"Erreur de connexion: {e}"
+                logger.error(error_msg)
+                raise RuntimeError(error_msg)
+
+    async def get_overview(self, token: str) -> Dict[str, Any]:
+        """
+        Récupère les données overview depuis l'API SpiderVision.
+
+        Args:
+            token: Token JWT d'authentification
+
+        Returns:
+            Dict[str, Any]: Données JSON de l'overview
+        """
+        url = self._url(self.overview_endpoint)
+        logger.info(f"Récupération des données overview depuis {url}")
+        return await self._get_json(url, token)
+
+    async def get_store_history(self, token: str, store_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Récupère l'historique d'un magasin (ou l'overview si store_id est absent).
+
+        Args:
+            token: Token JWT d'authentification
+            store_id: ID du magasin spécifique (optionnel)
+
+        Returns:
+            Dict[str, Any]: Données JSON de l'historique
+        """
+        endpoint = f"/store-history/{store_id}" if store_id else self.overview_endpoint
+        return await self._get_json(self._url(endpoint), token)
+
+    async def get_store_histories(self, token: str, store_ids: Iterable[str],
+                                  deadline: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Récupère l'historique de plusieurs magasins en parallèle.
+
+        Args:
+            token: Token JWT d'authentification
+            store_ids: IDs des magasins
+            deadline: Budget total en secondes ; les requêtes encore en cours
+                à l'échéance sont annulées
+
+        Returns:
+            Dict[str, Any]: Historique par ID de magasin. Les magasins en échec
+            ou non récupérés avant l'échéance sont absents du résultat.
+        """
+        tasks = {
+            asyncio.create_task(self.get_store_history(token, store_id)): store_id
+            for store_id in dict.fromkeys(str(s) for s in store_ids)
+        }
+        if not tasks:
+            return {}
+
+        started = time.monotonic()
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning(f"Échéance de {deadline}s atteinte : {len(pending)} historiques annulés")
+
+        results = {}
+        failed = 0
+        for task in done:
+            if task.exception() is not None:
+                failed += 1
+                continue
+            results[tasks[task]] = task.result()
+
+        logger.info(f"{len(results)}/{len(tasks)} historiques récupérés en {time.monotonic() - started:.1f}s"
+                    f" ({failed} en échec, {len(pending)} annulés)")
+        return results
+
+
+# Fonction utilitaire pour une utilisation depuis du code synchrone
+def fetch_store_histories(token: str, store_ids: Iterable[str], deadline: Optional[float] = None,
+                          **kwargs) -> Dict[str, Any]:
+    """
+    Récupère l'historique de plusieurs magasins depuis du code synchrone.
+
+    Args:
+        token: Token JWT d'authentification
+        store_ids: IDs des magasins
+        deadline: Budget total en secondes (optionnel)
+        **kwargs: Paramètres de AsyncSpiderVisionData (auth, max_concurrency...)
+
+    Returns:
+        Dict[str, Any]: Historique par ID de magasin
+    """
+    async def _run():
+        async with AsyncSpiderVisionData(**kwargs) as client:
+            return await client.get_store_histories(token, store_ids, deadline=deadline)
+
+    return asyncio.run(_run())
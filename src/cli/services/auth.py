@@ -4,19 +4,28 @@ import logging
 import os
 import requests
 from typing import Optional
-from dotenv import load_dotenv
+
+from cli.env import load_env
+from cli.services.http_session import get_shared_session
+from cli.services.token_cache import TokenCache
 
 # Charger les variables d'environnement
-load_dotenv()
+load_env()
 
 logger = logging.getLogger(__name__)
 
 class SpiderVisionAuth:
     """Gestionnaire d'authentification pour l'API SpiderVision."""
     
-    def __init__(self):
-        """Initialiser le service d'authentification SpiderVision"""
-        load_dotenv()
+    def __init__(self, session: Optional[requests.Session] = None, token_cache: Optional[TokenCache] = None):
+        """Initialiser le service d'authentification SpiderVision
+        
+        Args:
+            session: Session HTTP partagée (session du processus par défaut)
+            token_cache: Cache local du token JWT (fichier par défaut si None)
+        """
+        self.session = session or get_shared_session()
+        self.token_cache = token_cache or TokenCache()
         
         self.api_base = os.getenv("SPIDER_VISION_API_BASE")
         self.email = os.getenv("SPIDER_VISION_EMAIL")
@@ -37,6 +46,12 @@ class SpiderVisionAuth:
         """
         Authentification via l'API SpiderVision.
         
+        Le token est réutilisé tant qu'il n'approche pas de son expiration
+        (claim ``exp``) : token en mémoire, puis cache local, puis token
+        pré-configuré dans .env. Une nouvelle connexion n'a lieu qu'en dernier
+        recours, sous verrou fichier pour que des processus concurrents ne se
+        connectent qu'une seule fois.
+        
         Args:
             email: Email de connexion (optionnel, utilise .env par défaut)
             password: Mot de passe (optionnel, utilise .env par défaut)
@@ -47,11 +62,55 @@ class SpiderVisionAuth:
         Raises:
             RuntimeError: En cas d'échec d'authentification
         """
-        # Si un token JWT est déjà configuré dans .env, l'utiliser directement
-        if self._token and not email and not password:
-            logger.info("Utilisation du token JWT pré-configuré")
+        # Identifiants explicites : toujours une nouvelle connexion
+        if email or password:
+            return self._sign_in(email, password)
+        
+        if self.token_cache.is_fresh(self._token):
+            logger.info("Utilisation du token JWT en cours de validité")
             return self._token
         
+        cached = self.token_cache.load(self.email)
+        if cached:
+            logger.info("Utilisation du token JWT en cache")
+            self._token = cached
+            return cached
+        
+        if not all([self.email, self.password]):
+            # Pas de credentials : seul le token pré-configuré est disponible
+            logger.warning("Token JWT pré-configuré expiré ou proche de l'expiration et credentials manquants")
+            return self._token
+        
+        return self.refresh()
+    
+    def refresh(self, stale_token: Optional[str] = None) -> str:
+        """
+        Force l'obtention d'un nouveau token (par exemple après une réponse 401).
+        
+        Args:
+            stale_token: Token refusé par l'API. Si un autre processus a déjà
+                mis un token différent en cache, celui-ci est réutilisé.
+            
+        Returns:
+            str: Token JWT
+        """
+        with self.token_cache.lock():
+            cached = self.token_cache.load(self.email)
+            if cached and cached != stale_token and cached != self._token:
+                logger.info("Token JWT déjà rafraîchi par un autre processus")
+                self._token = cached
+                return cached
+            
+            token = self._sign_in()
+            self.token_cache.store(token, self.email)
+            return token
+    
+    def is_token_fresh(self, token: Optional[str]) -> bool:
+        """Vérifie qu'un token n'approche pas de son expiration."""
+        return self.token_cache.is_fresh(token)
+    
+    def _sign_in(self, email: Optional[str] = None, password: Optional[str] = None) -> str:
+        """Connexion sur l'endpoint de login SpiderVision et récupération du token."""
         # Utiliser les paramètres fournis ou ceux de l'environnement
         auth_email = email or self.email
         auth_password = password or self.password
@@ -73,7 +132,7 @@ class SpiderVisionAuth:
         
         try:
             logger.info(f"Tentative d'authentification sur {login_url}")
-            response = requests.post(login_url, json=payload, headers=headers, timeout=30)
+            response = self.session.post(login_url, json=payload, headers=headers, timeout=30)
             
             logger.debug(f"Status code: {response.status_code}")
             logger.debug(f"Response headers: {dict(response.headers)}")
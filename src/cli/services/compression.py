@@ -0,0 +1,132 @@
+"""Variantes pré-compressées (gzip, brotli) des rapports HTML."""
+
+import gzip
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Suffixe de fichier de chaque encodage (valeur de l'en-tête Content-Encoding)
+ENCODING_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+# Types de contenu servis avec un Content-Encoding lorsqu'ils sont pré-compressés
+TEXT_SUFFIXES = ('.html', '.htm', '.csv', '.json', '.css', '.js', '.svg', '.txt')
+
+READ_BLOCK_SIZE = 1 << 16
+
+
+def _import_brotli():
+    """Module brotli, ou None s'il n'est pas installé (``pip install dealer-report[brotli]``)."""
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def configured_encodings() -> tuple:
+    """
+    Encodages à produire pour chaque rapport (``REPORT_PRECOMPRESS``).
+
+    ``gzip`` par défaut, ``gzip,br`` pour ajouter brotli, ``none`` pour désactiver.
+    Brotli est ignoré (avec un avertissement) si le module n'est pas installé.
+    """
+    value = os.getenv('REPORT_PRECOMPRESS', 'gzip').strip().lower()
+    if value in ('', 'none', 'false', '0'):
+        return ()
+    encodings = []
+    for encoding in (item.strip() for item in value.split(',')):
+        if encoding not in ENCODING_SUFFIXES:
+            logger.warning(f"Encodage inconnu ignoré dans REPORT_PRECOMPRESS: {encoding}")
+        elif encoding == 'br' and _import_brotli() is None:
+            logger.warning("REPORT_PRECOMPRESS demande brotli mais le module n'est pas installé")
+        elif encoding not in encodings:
+            encodings.append(encoding)
+    return tuple(encodings)
+
+
+def variant_path(path: Union[str, Path], encoding: str) -> Path:
+    """Chemin de la variante ``encoding`` de ``path`` (``rapport.html`` -> ``rapport.html.gz``)."""
+    path = Path(path)
+    return path.with_name(path.name + ENCODING_SUFFIXES[encoding])
+
+
+def split_encoding(path: Union[str, Path]) -> tuple:
+    """
+    Sépare l'encodage d'un fichier pré-compressé de son nom d'origine.
+
+    Seuls les formats texte sont considérés comme pré-compressés :
+    ``rapport.html.gz`` -> (``rapport.html``, ``gzip``), mais une archive
+    ``historique.tar.gz`` reste un fichier gzip (``None``).
+
+    Returns:
+        tuple: (nom sans suffixe d'encodage, encodage ou None)
+    """
+    path = Path(path)
+    for encoding, suffix in ENCODING_SUFFIXES.items():
+        if path.suffix.lower() == suffix and Path(path.stem).suffix.lower() in TEXT_SUFFIXES:
+            return path.with_name(path.stem), encoding
+    return path, None
+
+
+def fresh_variants(path: Union[str, Path]) -> Dict[str, Path]:
+    """Variantes existantes de ``path`` qui ne sont pas plus anciennes que lui."""
+    path = Path(path)
+    mtime = path.stat().st_mtime
+    variants = {}
+    for encoding in ENCODING_SUFFIXES:
+        variant = variant_path(path, encoding)
+        if variant.exists() and variant.stat().st_mtime >= mtime:
+            variants[encoding] = variant
+    return variants
+
+
+def write_compressed_variants(path: Union[str, Path],
+                              encodings: Optional[Iterable[str]] = None) -> Dict[str, Path]:
+    """
+    Écrit les variantes compressées d'un fichier à côté de lui.
+
+    La sortie gzip est reproductible (niveau 9, ``mtime`` à 0, sans nom de
+    fichier) : un rapport identique produit les mêmes octets, ce qui permet
+    de sauter son upload. Chaque variante est écrite dans un fichier
+    temporaire renommé à la fin.
+
+    Args:
+        path: Fichier à compresser
+        encodings: Encodages à produire (``configured_encodings()`` par défaut)
+
+    Returns:
+        Dict[str, Path]: Chemin de chaque variante écrite, par encodage
+    """
+    path = Path(path)
+    if encodings is None:
+        encodings = configured_encodings()
+
+    written = {}
+    for encoding in encodings:
+        target = variant_path(path, encoding)
+        tmp_path = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            with open(path, 'rb') as src, open(tmp_path, 'wb') as raw:
+                if encoding == 'gzip':
+                    with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=9, mtime=0) as dst:
+                        shutil.copyfileobj(src, dst, READ_BLOCK_SIZE)
+                else:
+                    brotli = _import_brotli()
+                    if brotli is None:
+                        raise RuntimeError("Le module brotli est requis pour l'encodage 'br'")
+                    compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=11)
+                    for block in iter(lambda: src.read(READ_BLOCK_SIZE), b''):
+                        raw.write(compressor.process(block))
+                    raw.write(compressor.finish())
+            os.replace(tmp_path, target)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        written[encoding] = target
+        logger.debug(f"{target.name}: {target.stat().st_size} octets ({path.stat().st_size} non compressés)")
+
+    return written
@@ -4,17 +4,33 @@ import logging
 import os
 import requests
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
+
+from cli.env import load_env
+from cli.services.http_session import get_shared_session
+from cli.services.response_cache import ResponseCache, token_user
 
 # Charger les variables d'environnement
-load_dotenv()
+load_env()
 
 logger = logging.getLogger(__name__)
 
 class SpiderVisionData:
     """Gestionnaire de récupération des données depuis l'API SpiderVision."""
     
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None, auth=None,
+                 response_cache: Optional[ResponseCache] = None, use_cache: Optional[bool] = None):
+        """
+        Args:
+            session: Session HTTP partagée (session du processus par défaut)
+            auth: SpiderVisionAuth utilisé pour rafraîchir le token sur une réponse 401 (optionnel)
+            response_cache: Cache disque des réponses (cache par défaut si None)
+            use_cache: False pour toujours interroger l'API (SPIDER_VISION_RESPONSE_CACHE par défaut)
+        """
+        self.session = session or get_shared_session()
+        self.auth = auth
+        if use_cache is None:
+            use_cache = ResponseCache.enabled_by_default()
+        self.response_cache = (response_cache or ResponseCache()) if use_cache else None
         self.api_base = os.getenv('SPIDER_VISION_API_BASE', 'https://spider-vision.data-solutions.com/')
         self.overview_endpoint = os.getenv('SPIDER_VISION_OVERVIEW_ENDPOINT', '/store-history/overview')
         
@@ -43,7 +59,7 @@ class SpiderVisionData:
         
         try:
             logger.info(f"Récupération des données overview depuis {overview_url}")
-            response = requests.get(overview_url, headers=headers, timeout=30)
+            response = self._get(overview_url, headers)
             
             logger.debug(f"Status code: {response.status_code}")
             logger.debug(f"Response headers: {dict(response.headers)}")
@@ -68,6 +84,51 @@ class SpiderVisionData:
             logger.error(error_msg)
             raise RuntimeError(error_msg)
     
+    def _get(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        """
+        GET authentifié passant par le cache des réponses.
+        
+        Une entrée avec ETag/Last-Modified est revalidée par une requête
+        conditionnelle ; sans validateur, elle est servie telle quelle tant
+        qu'elle est dans la fenêtre de fraîcheur.
+        """
+        cache = self.response_cache
+        if cache is None:
+            return self._send(url, headers)
+        
+        token = headers["Authorization"].split(" ", 1)[-1]
+        user = token_user(token) or (self.auth.email if self.auth is not None else '') or ''
+        entry = cache.lookup(url, user)
+        
+        if entry is not None:
+            if cache.has_validator(entry):
+                headers = {**headers, **cache.conditional_headers(entry)}
+            elif cache.is_fresh(entry):
+                logger.info(f"Réponse servie depuis le cache pour {url}")
+                return cache.to_response(url, entry)
+        
+        response = self._send(url, headers)
+        
+        if response.status_code == 304 and entry is not None:
+            logger.info(f"Réponse inchangée (304), utilisation du cache pour {url}")
+            cache.touch(url, user, entry)
+            return cache.to_response(url, entry)
+        if response.status_code == 200:
+            cache.store(url, user, response)
+        return response
+    
+    def _send(self, url: str, headers: Dict[str, str]) -> requests.Response:
+        """GET authentifié ; sur 401, rafraîchit le token une fois puis rejoue la requête."""
+        response = self.session.get(url, headers=headers, timeout=30)
+        
+        if response.status_code == 401 and self.auth is not None:
+            logger.info("Token refusé (401), rafraîchissement du token")
+            stale_token = headers["Authorization"].split(" ", 1)[-1]
+            headers = {**headers, "Authorization": f"Bearer {self.auth.refresh(stale_token)}"}
+            response = self.session.get(url, headers=headers, timeout=30)
+        
+        return response
+    
     def get_retailers_data(self, token: str) -> Dict[str, Any]:
         """
         Récupère les données des retailers (alias pour get_overview).
@@ -104,7 +165,7 @@ class SpiderVisionData:
         
         try:
             logger.info(f"Récupération de l'historique depuis {url}")
-            response = requests.get(url, headers=headers, timeout=30)
+            response = self._get(url, headers)
             
             if response.status_code == 200:
                 return response.json()
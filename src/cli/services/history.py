@@ -0,0 +1,162 @@
+"""Décodage typé de l'historique journalier (day0..dayN) renvoyé par l'overview SpiderVision."""
+
+import json
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+# Champs extraits de chaque jour et attributs correspondants de HistoryTable
+HISTORY_FIELDS = {
+    'progress': 'progress',
+    'successPercent': 'success_percent',
+    'successCount': 'success_count',
+    'failedCount': 'failed_count',
+}
+
+# Une paire clé/valeur d'un des champs suivis, en JSON ('"k": v') comme en repr Python ("'k': v").
+# Seules ces clés sont lues : une apostrophe dans une autre valeur ne gêne pas le décodage.
+_FIELD_RE = re.compile(
+    r"""["'](?P<key>progress|successPercent|successCount|failedCount)["']\s*:\s*"""
+    r"""(?P<value>None|null|["'][^"'\x00]*["']|[-+0-9.eE]+)"""
+)
+_SEPARATOR = '\x00'
+
+
+@dataclass(frozen=True)
+class HistoryTable:
+    """
+    Historique de plusieurs retailers sur plusieurs jours.
+
+    Chaque attribut est un tableau float64 de forme (retailers, jours) ; une
+    valeur absente ou illisible vaut NaN. ``row(i)`` retourne la vue d'un
+    retailer (tableaux de forme (jours,)).
+    """
+    progress: np.ndarray
+    success_percent: np.ndarray
+    success_count: np.ndarray
+    failed_count: np.ndarray
+
+    def __len__(self) -> int:
+        return self.progress.shape[0]
+
+    def row(self, index: int) -> "HistoryTable":
+        """Historique d'un seul retailer (vues, sans copie)."""
+        return HistoryTable(*(getattr(self, name)[index] for name in HISTORY_FIELDS.values()))
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def decode_history_cells(cells: Sequence[Any]) -> HistoryTable:
+    """
+    Décode une liste de cellules d'historique en tableaux 1-D.
+
+    Une cellule peut être un dict (forme native de l'API), une chaîne JSON,
+    une chaîne au format repr Python (``"{'progress': 12.5}"``) ou vide.
+    Toutes les chaînes sont concaténées et analysées en un seul passage
+    d'expression régulière ; les positions des correspondances sont ensuite
+    ramenées à leur cellule avec ``np.searchsorted``.
+
+    Args:
+        cells: Cellules day0..dayN de tous les retailers, à plat
+
+    Returns:
+        HistoryTable: Tableaux de forme (len(cells),)
+    """
+    n = len(cells)
+    columns = {name: np.full(n, np.nan) for name in HISTORY_FIELDS.values()}
+
+    text_index = []
+    text_cells = []
+    for i, cell in enumerate(cells):
+        if isinstance(cell, Mapping):
+            for key, name in HISTORY_FIELDS.items():
+                if key in cell:
+                    columns[name][i] = _to_float(cell[key])
+        elif isinstance(cell, str) and cell:
+            text_index.append(i)
+            text_cells.append(cell)
+
+    if text_cells:
+        text = _SEPARATOR.join(text_cells)
+        # Position de début de chaque cellule dans le texte concaténé
+        lengths = np.fromiter((len(cell) + 1 for cell in text_cells), dtype=np.int64, count=len(text_cells))
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        positions, keys, values = [], [], []
+        for match in _FIELD_RE.finditer(text):
+            positions.append(match.start())
+            keys.append(match.group('key'))
+            values.append(match.group('value').strip('"\''))
+
+        if positions:
+            owners = np.asarray(text_index)[np.searchsorted(starts, positions, side='right') - 1]
+            parsed = np.array([_to_float(v) if v not in ('None', 'null', '') else np.nan for v in values])
+            keys = np.asarray(keys)
+            for key, name in HISTORY_FIELDS.items():
+                selected = keys == key
+                columns[name][owners[selected]] = parsed[selected]
+
+    return HistoryTable(**columns)
+
+
+def decode_histories(records: Sequence[Mapping[str, Any]], days: int, prefix: str = 'day') -> HistoryTable:
+    """
+    Décode l'historique ``day0..day{days-1}`` de tous les retailers en un seul passage.
+
+    Args:
+        records: Lignes overview
+        days: Nombre de jours à lire
+        prefix: Préfixe des colonnes de jour
+
+    Returns:
+        HistoryTable: Tableaux de forme (len(records), days)
+    """
+    keys = [f'{prefix}{i}' for i in range(days)]
+    cells = [record.get(key) for record in records for key in keys]
+    flat = decode_history_cells(cells)
+    return HistoryTable(*(getattr(flat, name).reshape(len(records), days) for name in HISTORY_FIELDS.values()))
+
+
+def iter_history_chunks(records: Iterable[Mapping[str, Any]], days: int,
+                        chunk_size: int = 1024) -> Iterator[Tuple[List[Mapping[str, Any]], HistoryTable]]:
+    """
+    Découpe les lignes overview en lots de ``chunk_size`` et décode l'historique de chaque lot.
+
+    Le décodage reste vectorisé sur un lot tout en consommant les lignes au
+    fil de l'eau (les lignes peuvent provenir d'un générateur).
+
+    Yields:
+        Tuple[List, HistoryTable]: Lignes du lot et historique (tableaux de forme (len(lot), days))
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, chunk_size))
+        if not chunk:
+            return
+        yield chunk, decode_histories(chunk, days)
+
+
+def iter_with_history(records: Iterable[Mapping[str, Any]], days: int,
+                      chunk_size: int = 1024) -> Iterator[Tuple[Mapping[str, Any], HistoryTable]]:
+    """
+    Associe à chaque ligne overview son historique décodé, par lots de ``chunk_size``.
+
+    Yields:
+        Tuple[Mapping, HistoryTable]: Ligne et historique du retailer (tableaux de forme (days,))
+    """
+    for chunk, table in iter_history_chunks(records, days, chunk_size):
+        for i, record in enumerate(chunk):
+            yield record, table.row(i)
+
+
+def history_to_json(values: np.ndarray) -> str:
+    """Liste JSON d'entiers arrondis (12.58 -> 13), ``null`` pour les jours sans valeur."""
+    return json.dumps([None if np.isnan(v) else round(float(v)) for v in values])
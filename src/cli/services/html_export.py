@@ -2,14 +2,54 @@
 """Module pour l'export HTML des données SpiderVision."""
 
 import os
-import json
 import logging
 from datetime import datetime
-from typing import Dict, Any, List
-import pandas as pd
+from html import escape
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+import numpy as np
+
+from cli.services.history import iter_history_chunks
+from cli.services.html_stream import RowSpool, load_static, open_html_output
+from cli.services.status import classify, classify_rates, labels
 
 logger = logging.getLogger(__name__)
 
+# Ordre des lignes du tableau : succès, warnings puis erreurs
+ROW_STATUS_ORDER = ('success', 'warning', 'error')
+
+# Seuils (succès, warning) des règles Crawling et Contenu
+CRAWLING_THRESHOLDS = (95.0, 90.0)
+CONTENT_THRESHOLDS = (85.0, 80.0)
+
+# Seuils et classes des barres de progression et de l'historique (indexées par code de statut)
+BAR_THRESHOLDS = (90.0, 70.0)
+BAR_CLASSES = ('na', 'success', 'warning', 'danger', 'danger')
+
+# Compteurs lus pour chaque retailer, dont ceux totalisés dans l'en-tête
+COUNT_COLUMNS = ('storeCount', 'storeInDeltaCount', 'storeFailedCount', 'successCount')
+TOTAL_COLUMNS = ('storeCount', 'storeInDeltaCount', 'storeFailedCount')
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _has_name(row: Dict[str, Any]) -> bool:
+    """Vrai si la ligne a un nom de retailer (les cellules vides d'un DataFrame valent NaN)"""
+    name = row.get('domainDealerName')
+    return bool(name) and name == name
+
+
+def _column(chunk: Sequence[Dict[str, Any]], key: str) -> np.ndarray:
+    """Colonne numérique ``key`` d'un lot de lignes (0 si absente, vide ou NaN)"""
+    values = np.fromiter((_to_float(row.get(key)) for row in chunk), dtype=np.float64, count=len(chunk))
+    return np.nan_to_num(values, nan=0.0, posinf=0.0, neginf=0.0)
+
+
 class HTMLExporter:
     """Générateur de rapports HTML pour les données SpiderVision."""
     
@@ -17,46 +57,10 @@ class HTMLExporter:
         """Initialiser l'exporteur HTML"""
         pass
     
-    def _parse_day_data(self, day_str: str) -> Dict[str, Any]:
-        """Parser les données JSON d'un jour depuis une chaîne"""
-        if not day_str or day_str == '':
-            return {}
-        try:
-            # Remplacer les apostrophes par des guillemets pour un JSON valide
-            day_str = day_str.replace("'", '"')
-            return json.loads(day_str)
-        except (json.JSONDecodeError, ValueError):
-            return {}
-    
-    def _get_status_class(self, crawling_rate: float, content_rate: float) -> str:
-        """Déterminer la classe CSS basée sur les règles métier"""
-        # Règle 1: % de magasins crawlés (>95% succès, 90-95% warning, <90% erreur)
-        crawling_status = "success" if crawling_rate > 95 else "warning" if crawling_rate >= 90 else "error"
-        
-        # Règle 2: Taux de réussite avec contenu (>85% succès, 80-85% warning, <80% erreur)  
-        content_status = "success" if content_rate > 85 else "warning" if content_rate >= 80 else "error"
-        
-        # Le statut final est le plus restrictif des deux
-        if crawling_status == "error" or content_status == "error":
-            return "status-error"
-        elif crawling_status == "warning" or content_status == "warning":
-            return "status-warning"
-        else:
-            return "status-success"
-    
-    def _get_rule_status(self, value: float, success_threshold: float, warning_threshold: float) -> str:
-        """Déterminer le statut selon les seuils de règles"""
-        if value > success_threshold:
-            return "success"
-        elif value >= warning_threshold:
-            return "warning"
-        else:
-            return "error"
-    
     def _format_progress_bar(self, value: float, max_value: float = 100) -> str:
         """Générer une barre de progression HTML"""
         percentage = min((value / max_value) * 100, 100) if max_value > 0 else 0
-        status_class = "success" if percentage >= 90 else "warning" if percentage >= 70 else "danger"
+        status_class = BAR_CLASSES[int(classify(percentage, *BAR_THRESHOLDS))]
         
         return f"""
         <div class="progress-container">
@@ -65,13 +69,12 @@ class HTMLExporter:
         </div>
         """
     
-    def _generate_history_chart(self, days_data: List[Dict[str, Any]]) -> str:
+    def _generate_history_chart(self, success_percent: np.ndarray, color_classes: np.ndarray) -> str:
         """Générer un mini graphique pour l'historique des 6 derniers jours"""
         chart_bars = []
-        for i, day_data in enumerate(days_data):
-            success_percent = day_data.get('successPercent', 0)
-            height = max(success_percent, 5)  # Minimum 5% pour la visibilité
-            color_class = "success" if success_percent >= 90 else "warning" if success_percent >= 70 else "danger"
+        for i, (value, color_class) in enumerate(zip(success_percent, color_classes)):
+            success_percent = f"{value:g}"
+            height = max(value, 5)  # Minimum 5% pour la visibilité
             
             chart_bars.append(f"""
                 <div class="history-bar history-bar-{color_class}" 
@@ -82,41 +85,105 @@ class HTMLExporter:
         
         return f'<div class="history-chart">{"".join(chart_bars)}</div>'
     
-    def generate_html_report(self, data: Dict[str, Any], output_path: str = None) -> str:
+    def _iter_records(self, data: Any) -> Iterable[Dict[str, Any]]:
+        """Itérer sur les lignes overview (liste, dict ``{'data': [...]}``, dict seul, DataFrame ou générateur)"""
+        if isinstance(data, dict):
+            return data['data'] if 'data' in data else [data]
+        # DataFrame pandas (sans importer pandas) : une ligne par dict
+        if hasattr(data, 'to_dict') and hasattr(data, 'columns'):
+            return data.to_dict('records')
+        return data
+    
+    def _compute_metrics(self, chunk: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """
+        Calculer les métriques et statuts d'un lot de retailers, colonne par colonne.
+        
+        Les taux absents (0) sont recalculés depuis les compteurs :
+        ``storeInDeltaCount / storeCount`` pour le crawling,
+        ``successCount / storeInDeltaCount`` pour le contenu.
+        
+        Returns:
+            Dict[str, np.ndarray]: Colonnes de forme (len(chunk),)
+        """
+        metrics = {key: _column(chunk, key).astype(np.int64) for key in COUNT_COLUMNS}
+        stores_total = metrics['storeCount']
+        stores_crawled = metrics['storeInDeltaCount']
+        
+        # Utiliser les valeurs de crawlProgress et crawlSuccessProgress directement depuis les données,
+        # sinon les calculer depuis les compteurs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crawling_rate = _column(chunk, 'crawlProgress')
+            crawling_rate = np.where((crawling_rate == 0) & (stores_total > 0),
+                                     stores_crawled / stores_total * 100, crawling_rate)
+            content_rate = _column(chunk, 'crawlSuccessProgress')
+            content_rate = np.where((content_rate == 0) & (stores_crawled > 0),
+                                    metrics['successCount'] / stores_crawled * 100, content_rate)
+        
+        # Déterminer le statut selon les règles métier (le statut final est le plus restrictif des deux)
+        statuses = classify_rates(crawling_rate, content_rate, CRAWLING_THRESHOLDS, CONTENT_THRESHOLDS)
+        metrics.update(
+            crawling_rate=crawling_rate,
+            content_rate=content_rate,
+            crawling_status=labels(statuses.progress),
+            content_status=labels(statuses.success),
+            final_status=labels(statuses.worst),
+            sort_order=statuses.worst,
+            named=np.fromiter((_has_name(row) for row in chunk), dtype=bool, count=len(chunk))
+        )
+        return metrics
+    
+    def generate_html_report(self, data: Any, output_path: str = None, compress: Optional[bool] = None) -> str:
         """
         Générer un rapport HTML à partir des données overview.
         
+        Les lignes sont traitées par lots : taux, statuts et ordre de tri sont
+        calculés colonne par colonne, puis les lignes de chaque lot sont rendues
+        dans l'ordre des statuts et rangées dans un spool. La page (en-tête,
+        lignes, pied de page) est écrite dans un fichier bufferisé ou un flux
+        gzip ; la mémoire utilisée ne dépend pas du nombre de retailers.
+        
         Args:
-            data: Données JSON de l'API overview
-            output_path: Chemin de sortie (optionnel)
+            data: Données JSON de l'API overview (liste, dict, DataFrame ou générateur de lignes)
+            output_path: Chemin de sortie (optionnel, ``.gz`` pour une sortie compressée)
+            compress: Forcer (ou désactiver) la compression gzip
             
         Returns:
             str: Chemin du fichier HTML généré
         """
         try:
-            # Convertir les données en DataFrame pour faciliter le traitement
-            if isinstance(data, list):
-                df = pd.DataFrame(data)
-            elif isinstance(data, dict) and 'data' in data:
-                df = pd.DataFrame(data['data'])
-            else:
-                # Essayer de convertir directement
-                df = pd.DataFrame([data] if isinstance(data, dict) else data)
-            
             # Générer le nom de fichier si non fourni
             if not output_path:
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
                 output_path = f"reports/spider_vision_report_{timestamp}.html"
             
             # S'assurer que le répertoire existe
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
             
-            # Générer le contenu HTML
-            html_content = self._generate_html_content(df)
+            totals = {key: 0 for key in TOTAL_COLUMNS}
             
-            # Écrire le fichier
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            with RowSpool(ROW_STATUS_ORDER) as spool:
+                # L'historique day0..day5 est décodé par lots (dict, JSON ou repr Python)
+                for chunk, history in iter_history_chunks(self._iter_records(data), days=6):
+                    metrics = self._compute_metrics(chunk)
+                    
+                    # Les statistiques globales incluent toutes les lignes
+                    for key in totals:
+                        totals[key] += int(metrics[key].sum())
+                    
+                    success_percent = np.nan_to_num(history.success_percent, nan=0.0)
+                    history_classes = labels(classify(success_percent, *BAR_THRESHOLDS), BAR_CLASSES)
+                    
+                    # Lignes nommées du lot, triées par statut (tri stable)
+                    order = np.argsort(metrics['sort_order'], kind='stable')
+                    for i in order[metrics['named'][order]]:
+                        history_chart = self._generate_history_chart(success_percent[i], history_classes[i])
+                        spool.add(metrics['final_status'][i], self._render_row(chunk[i], metrics, i, history_chart))
+                
+                # Écrire le fichier
+                with open_html_output(output_path, compress) as f:
+                    f.write(self._html_head(totals))
+                    spool.copy_to(f)
+                    f.write(self._html_foot())
             
             logger.info(f"Rapport HTML généré: {output_path}")
             return output_path
@@ -125,67 +192,24 @@ class HTMLExporter:
             logger.error(f"Erreur lors de la génération HTML: {e}")
             raise
     
-    def _generate_html_content(self, df: pd.DataFrame) -> str:
-        """Générer le contenu HTML complet"""
-        
-        # Calculer les statistiques globales
-        total_stores = df['storeCount'].fillna(0).sum()
-        total_crawled = df['storeInDeltaCount'].fillna(0).sum()
-        total_failed = df['storeFailedCount'].fillna(0).sum()
-        total_success = df['successCount'].fillna(0).sum()
+    def _render_row(self, row: Dict[str, Any], metrics: Dict[str, np.ndarray], i: int, history_chart: str) -> str:
+        """Générer la ligne HTML du retailer ``i`` du lot à partir des colonnes calculées"""
+        stores_total = metrics['storeCount'][i]
+        stores_crawled = metrics['storeInDeltaCount'][i]
+        stores_failed = metrics['storeFailedCount'][i]
+        success_count = metrics['successCount'][i]
+        crawling_rate = metrics['crawling_rate'][i]
+        content_rate = metrics['content_rate'][i]
+        crawling_status = metrics['crawling_status'][i]
+        content_status = metrics['content_status'][i]
+        final_status = metrics['final_status'][i]
+        sort_order = metrics['sort_order'][i]
         
-        overall_progress = (total_crawled / total_stores * 100) if total_stores > 0 else 0
-        overall_success_rate = (total_success / total_crawled * 100) if total_crawled > 0 else 0
-        
-        # Générer les lignes du tableau
-        table_rows = []
-        for _, row in df.iterrows():
-            if pd.isna(row['domainDealerName']) or row['domainDealerName'] == '':
-                continue
-                
-            # Parser les données des 6 derniers jours
-            days_data = []
-            for i in range(6):
-                day_key = f'day{i}'
-                day_data = self._parse_day_data(str(row.get(day_key, '')))
-                days_data.append(day_data)
-            
-            # Calculer les métriques depuis les données CSV
-            stores_total = row.get('storeCount', 0) or 0
-            stores_crawled = row.get('storeInDeltaCount', 0) or 0
-            stores_failed = row.get('storeFailedCount', 0) or 0
-            success_count = row.get('successCount', 0) or 0
-            
-            # Utiliser les valeurs de crawlProgress et crawlSuccessProgress directement depuis les données
-            crawling_rate = float(row.get('crawlProgress', 0) or 0)
-            content_rate = float(row.get('crawlSuccessProgress', 0) or 0)
-            
-            # Si les valeurs sont manquantes, calculer manuellement
-            if crawling_rate == 0 and stores_total > 0:
-                crawling_rate = (stores_crawled / stores_total * 100)
-            
-            if content_rate == 0 and stores_crawled > 0:
-                content_rate = (success_count / stores_crawled * 100)
-            
-            # Déterminer le statut selon les règles métier
-            status_class = self._get_status_class(crawling_rate, content_rate)
-            
-            # Statuts individuels pour affichage
-            crawling_status = self._get_rule_status(crawling_rate, 95, 90)
-            content_status = self._get_rule_status(content_rate, 85, 80)
-            
-            # Générer l'historique
-            history_chart = self._generate_history_chart(days_data)
-            
-            # Déterminer le statut final pour le tri et le filtrage
-            final_status = 'error' if crawling_status == 'error' or content_status == 'error' else 'warning' if crawling_status == 'warning' or content_status == 'warning' else 'success'
-            
-            table_rows.append({
-                'html': f"""
-                <tr class="{status_class} row-{final_status}" data-status="{final_status}" data-sort-order="{1 if final_status == 'success' else 2 if final_status == 'warning' else 3}">
+        return f"""
+                <tr class="status-{final_status} row-{final_status}" data-status="{final_status}" data-sort-order="{sort_order}">
                     <td class="dealer-info">
-                        <div class="dealer-name">{row['domainDealerName']}</div>
-                        <div class="dealer-id">ID: {row['domainDealerId']}</div>
+                        <div class="dealer-name">{escape(str(row['domainDealerName']))}</div>
+                        <div class="dealer-id">ID: {escape(str(row.get('domainDealerId', '')))}</div>
                     </td>
                     <td class="text-center">{stores_total}</td>
                     <td class="text-center">{stores_crawled}</td>
@@ -196,7 +220,7 @@ class HTMLExporter:
                             <div class="rule-bar rule-{crawling_status}">
                                 <span class="rule-text">{crawling_rate:.1f}%</span>
                             </div>
-                            <div class="rule-label">Crawling (>95% ✓, 90-95% ⚠, <90% ✗)</div>
+                            <div class="rule-label">Crawling (≥95% ✓, 90-95% ⚠, <90% ✗)</div>
                         </div>
                     </td>
                     <td>
@@ -204,7 +228,7 @@ class HTMLExporter:
                             <div class="rule-bar rule-{content_status}">
                                 <span class="rule-text">{content_rate:.1f}%</span>
                             </div>
-                            <div class="rule-label">Contenu (>85% ✓, 80-85% ⚠, <80% ✗)</div>
+                            <div class="rule-label">Contenu (≥85% ✓, 80-85% ⚠, <80% ✗)</div>
                         </div>
                     </td>
                     <td class="status-cell">
@@ -214,12 +238,18 @@ class HTMLExporter:
                     </td>
                     <td>{history_chart}</td>
                 </tr>
-                """,
-                'sort_order': 1 if final_status == 'success' else 2 if final_status == 'warning' else 3
-            })
+                """
+
+    
+    def _html_head(self, totals: Dict[str, float]) -> str:
+        """En-tête de la page jusqu'à l'ouverture du corps du tableau"""
+        total_stores = totals['storeCount']
+        total_crawled = totals['storeInDeltaCount']
+        total_failed = totals['storeFailedCount']
         
-        # Template HTML complet
-        html_template = f"""
+        overall_progress = (total_crawled / total_stores * 100) if total_stores > 0 else 0
+        
+        return f"""
 <!DOCTYPE html>
 <html lang="fr">
 <head>
@@ -227,341 +257,7 @@ class HTMLExporter:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Rapport SpiderVision - {datetime.now().strftime('%d/%m/%Y %H:%M')}</title>
     <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-        
-        .container {{
-            max-width: 1400px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.1);
-            overflow: hidden;
-        }}
-        
-        .header {{
-            background: linear-gradient(135deg, #2c3e50 0%, #34495e 100%);
-            color: white;
-            padding: 30px;
-            text-align: center;
-        }}
-        
-        .header h1 {{
-            font-size: 2.5em;
-            margin-bottom: 10px;
-            font-weight: 300;
-        }}
-        
-        .header .subtitle {{
-            font-size: 1.2em;
-            opacity: 0.9;
-        }}
-        
-        .stats-grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 20px;
-            padding: 30px;
-            background: #f8f9fa;
-        }}
-        
-        .stat-card {{
-            background: white;
-            padding: 25px;
-            border-radius: 10px;
-            text-align: center;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-            border-left: 4px solid #3498db;
-        }}
-        
-        .stat-card.success {{ border-left-color: #27ae60; }}
-        .stat-card.warning {{ border-left-color: #f39c12; }}
-        .stat-card.danger {{ border-left-color: #e74c3c; }}
-        
-        .stat-value {{
-            font-size: 2.5em;
-            font-weight: bold;
-            color: #2c3e50;
-            margin-bottom: 5px;
-        }}
-        
-        .stat-label {{
-            color: #7f8c8d;
-            font-size: 0.9em;
-            text-transform: uppercase;
-            letter-spacing: 1px;
-        }}
-        
-        .table-container {{
-            padding: 30px;
-            overflow-x: auto;
-        }}
-        
-        table {{
-            width: 100%;
-            border-collapse: collapse;
-            background: white;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.08);
-        }}
-        
-        th {{
-            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-            color: white;
-            padding: 20px 15px;
-            text-align: left;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-            font-size: 0.85em;
-        }}
-        
-        td {{
-            padding: 15px;
-            border-bottom: 1px solid #ecf0f1;
-            vertical-align: middle;
-        }}
-        
-        tr:hover {{
-            background-color: #f8f9fa;
-        }}
-        
-        .dealer-info {{
-            min-width: 150px;
-        }}
-        
-        .dealer-name {{
-            font-weight: 600;
-            color: #2c3e50;
-            margin-bottom: 5px;
-        }}
-        
-        .dealer-id {{
-            font-size: 0.8em;
-            color: #7f8c8d;
-        }}
-        
-        .progress-container {{
-            position: relative;
-            background: #ecf0f1;
-            border-radius: 20px;
-            height: 25px;
-            min-width: 100px;
-            overflow: hidden;
-        }}
-        
-        .progress-bar {{
-            height: 100%;
-            border-radius: 20px;
-            transition: width 0.3s ease;
-            position: relative;
-        }}
-        
-        .progress-bar-success {{ background: linear-gradient(90deg, #27ae60, #2ecc71); }}
-        .progress-bar-warning {{ background: linear-gradient(90deg, #f39c12, #e67e22); }}
-        .progress-bar-danger {{ background: linear-gradient(90deg, #e74c3c, #c0392b); }}
-        
-        .progress-text {{
-            position: absolute;
-            top: 50%;
-            left: 50%;
-            transform: translate(-50%, -50%);
-            font-size: 0.8em;
-            font-weight: 600;
-            color: #2c3e50;
-            z-index: 2;
-        }}
-        
-        .history-chart {{
-            display: flex;
-            align-items: end;
-            gap: 2px;
-            height: 30px;
-            min-width: 80px;
-        }}
-        
-        .history-bar {{
-            flex: 1;
-            min-height: 3px;
-            border-radius: 2px 2px 0 0;
-            transition: all 0.3s ease;
-        }}
-        
-        .history-bar-success {{ background: #27ae60; }}
-        .history-bar-warning {{ background: #f39c12; }}
-        .history-bar-danger {{ background: #e74c3c; }}
-        
-        .history-bar:hover {{
-            opacity: 0.7;
-            transform: scaleY(1.1);
-        }}
-        
-        .text-center {{ text-align: center; }}
-        
-        .status-success {{ background-color: rgba(39, 174, 96, 0.05); }}
-        .status-warning {{ background-color: rgba(243, 156, 18, 0.05); }}
-        .status-error {{ background-color: rgba(231, 76, 60, 0.05); }}
-        
-        .rule-container {{
-            text-align: center;
-            min-width: 120px;
-        }}
-        
-        .rule-bar {{
-            background: #ecf0f1;
-            border-radius: 15px;
-            height: 30px;
-            position: relative;
-            margin-bottom: 5px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            font-weight: 600;
-        }}
-        
-        .rule-success {{ background: linear-gradient(90deg, #27ae60, #2ecc71); color: white; }}
-        .rule-warning {{ background: linear-gradient(90deg, #f39c12, #e67e22); color: white; }}
-        .rule-error {{ background: linear-gradient(90deg, #e74c3c, #c0392b); color: white; }}
-        
-        .rule-label {{
-            font-size: 0.7em;
-            color: #7f8c8d;
-            text-align: center;
-            line-height: 1.2;
-        }}
-        
-        .rule-text {{
-            font-size: 0.9em;
-            font-weight: 600;
-        }}
-        
-        .status-cell {{
-            text-align: center;
-            padding: 10px;
-        }}
-        
-        .status-badge {{
-            padding: 8px 12px;
-            border-radius: 20px;
-            font-size: 0.8em;
-            font-weight: 600;
-            text-transform: uppercase;
-            letter-spacing: 0.5px;
-        }}
-        
-        .status-badge-success {{
-            background: linear-gradient(90deg, #27ae60, #2ecc71);
-            color: white;
-        }}
-        
-        .status-badge-warning {{
-            background: linear-gradient(90deg, #f39c12, #e67e22);
-            color: white;
-        }}
-        
-        .status-badge-error {{
-            background: linear-gradient(90deg, #e74c3c, #c0392b);
-            color: white;
-        }}
-        
-        .filter-controls {{
-            margin-top: 20px;
-            text-align: center;
-        }}
-        
-        .filter-controls h3 {{
-            color: white;
-            margin-bottom: 15px;
-            font-size: 1.1em;
-            font-weight: 400;
-        }}
-        
-        .filter-buttons {{
-            display: flex;
-            justify-content: center;
-            gap: 15px;
-            flex-wrap: wrap;
-        }}
-        
-        .filter-btn {{
-            padding: 10px 20px;
-            border: none;
-            border-radius: 25px;
-            font-size: 0.9em;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }}
-        
-        .filter-btn:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.15);
-        }}
-        
-        .filter-success {{
-            background: linear-gradient(135deg, #27ae60, #2ecc71);
-            color: white;
-        }}
-        
-        .filter-warning {{
-            background: linear-gradient(135deg, #f39c12, #e67e22);
-            color: white;
-        }}
-        
-        .filter-error {{
-            background: linear-gradient(135deg, #e74c3c, #c0392b);
-            color: white;
-        }}
-        
-        .filter-all {{
-            background: linear-gradient(135deg, #3498db, #2980b9);
-            color: white;
-        }}
-        
-        .filter-btn:not(.active) {{
-            opacity: 0.5;
-            background: #95a5a6;
-        }}
-        
-        .filter-icon {{
-            font-size: 1.1em;
-        }}
-        
-        .hidden-row {{
-            display: none !important;
-        }}
-        
-        .footer {{
-            background: #34495e;
-            color: white;
-            text-align: center;
-            padding: 20px;
-            font-size: 0.9em;
-        }}
-        
-        @media (max-width: 768px) {{
-            .container {{ margin: 10px; }}
-            .header h1 {{ font-size: 2em; }}
-            .stats-grid {{ grid-template-columns: 1fr 1fr; }}
-            .table-container {{ padding: 15px; }}
-            th, td {{ padding: 10px 8px; font-size: 0.9em; }}
-        }}
-    </style>
+{load_static('html_export.css')}    </style>
 </head>
 <body>
     <div class="container">
@@ -623,7 +319,11 @@ class HTMLExporter:
                     </tr>
                 </thead>
                 <tbody id="retailer-table-body">
-                    {"".join([row['html'] for row in sorted(table_rows, key=lambda x: x['sort_order'])])}
+"""
+    
+    def _html_foot(self) -> str:
+        """Fin du tableau, pied de page et script des filtres"""
+        return f"""
                 </tbody>
             </table>
         </div>
@@ -634,123 +334,7 @@ class HTMLExporter:
     </div>
     
     <script>
-        // Variables globales pour les filtres
-        let activeFilters = new Set(['success', 'warning', 'error']);
-        
-        // Initialisation
-        document.addEventListener('DOMContentLoaded', function() {
-            initializeFilters();
-            addHistoryInteractions();
-        });
-        
-        // Initialiser les filtres
-        function initializeFilters() {
-            document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
-                btn.addEventListener('click', function() {
-                    toggleFilter(this.dataset.status);
-                });
-            });
-        }
-        
-        // Basculer un filtre
-        function toggleFilter(status) {
-            const btn = document.querySelector(`[data-status="${status}"]`);
-            
-            if (activeFilters.has(status)) {
-                activeFilters.delete(status);
-                btn.classList.remove('active');
-            } else {
-                activeFilters.add(status);
-                btn.classList.add('active');
-            }
-            
-            applyFilters();
-            updateStats();
-        }
-        
-        // Basculer tous les filtres
-        function toggleAllFilters() {
-            const allActive = activeFilters.size === 3;
-            
-            if (allActive) {
-                // Tout désactiver
-                activeFilters.clear();
-                document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
-                    btn.classList.remove('active');
-                });
-            } else {
-                // Tout activer
-                activeFilters = new Set(['success', 'warning', 'error']);
-                document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
-                    btn.classList.add('active');
-                });
-            }
-            
-            applyFilters();
-            updateStats();
-        }
-        
-        // Appliquer les filtres
-        function applyFilters() {
-            const rows = document.querySelectorAll('#retailer-table-body tr');
-            
-            rows.forEach(row => {
-                const status = row.dataset.status;
-                if (activeFilters.has(status)) {
-                    row.classList.remove('hidden-row');
-                } else {
-                    row.classList.add('hidden-row');
-                }
-            });
-        }
-        
-        // Mettre à jour les statistiques
-        function updateStats() {
-            const visibleRows = document.querySelectorAll('#retailer-table-body tr:not(.hidden-row)');
-            let totalStores = 0, totalCrawled = 0, totalFailed = 0;
-            
-            visibleRows.forEach(row => {
-                const cells = row.querySelectorAll('td');
-                if (cells.length >= 4) {
-                    totalStores += parseInt(cells[1].textContent) || 0;
-                    totalCrawled += parseInt(cells[2].textContent) || 0;
-                    totalFailed += parseInt(cells[3].textContent) || 0;
-                }
-            });
-            
-            // Mettre à jour les cartes de statistiques
-            const statCards = document.querySelectorAll('.stat-value');
-            if (statCards.length >= 3) {
-                statCards[0].textContent = totalStores;
-                statCards[1].textContent = totalCrawled;
-                statCards[2].textContent = totalFailed;
-                
-                const overallProgress = totalStores > 0 ? (totalCrawled / totalStores * 100).toFixed(1) : 0;
-                if (statCards[3]) statCards[3].textContent = overallProgress + '%';
-            }
-        }
-        
-        // Ajouter des interactions pour l'historique
-        function addHistoryInteractions() {
-            document.querySelectorAll('.history-bar').forEach(bar => {
-                bar.addEventListener('mouseenter', function() {
-                    this.style.transform = 'scaleY(1.2)';
-                });
-                bar.addEventListener('mouseleave', function() {
-                    this.style.transform = 'scaleY(1)';
-                });
-            });
-        }
-        
-        // Animation au chargement
-        setTimeout(() => {
-            document.querySelectorAll('.progress-bar').forEach(bar => {
-                bar.style.width = bar.style.width;
-            });
-        }, 100);
-    </script>
+{load_static('html_export.js')}    </script>
 </body>
 </html>
         """
-        
-{{ ... }}
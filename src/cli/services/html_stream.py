@@ -0,0 +1,124 @@
+"""Écriture en flux des rapports HTML (mémoire constante quel que soit le nombre de retailers)."""
+
+import gzip
+import io
+import os
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import Dict, Iterator, Optional, Sequence, TextIO, Union
+
+from markupsafe import Markup
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / 'templates'
+
+# Taille du tampon d'écriture et des blocs relus depuis le spool
+CHUNK_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def load_static(name: str) -> Markup:
+    """Contenu d'un fichier CSS/JS statique (``templates/static``), lu une seule fois."""
+    return Markup((TEMPLATES_DIR / 'static' / name).read_text(encoding='utf-8'))
+
+
+@contextmanager
+def open_html_output(path: Union[str, Path], compress: Optional[bool] = None) -> Iterator[TextIO]:
+    """
+    Ouvre un fichier HTML en écriture texte bufferisée, éventuellement compressé en gzip.
+
+    Le contenu est écrit dans un fichier temporaire renommé à la fin : en cas
+    d'erreur pendant le rendu, l'ancien rapport reste intact.
+
+    Args:
+        path: Fichier de sortie
+        compress: True pour écrire un flux gzip (par défaut : si ``path`` finit par ``.gz``)
+    """
+    path = Path(path)
+    if compress is None:
+        compress = path.suffix == '.gz'
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+
+    try:
+        if compress:
+            buffered = io.BufferedWriter(gzip.open(tmp_path, 'wb', compresslevel=6), CHUNK_SIZE)
+        else:
+            buffered = open(tmp_path, 'wb', buffering=CHUNK_SIZE)
+        with io.TextIOWrapper(buffered, encoding='utf-8', newline='') as f:
+            yield f
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+class RowSpool:
+    """
+    Lignes HTML déjà rendues, rangées par groupe (statut) en attendant l'en-tête.
+
+    L'en-tête d'un rapport affiche des compteurs qui ne sont connus qu'après
+    avoir vu toutes les lignes, et les lignes sont triées par statut. Chaque
+    groupe est donc écrit dans un ``SpooledTemporaryFile`` (en mémoire jusqu'à
+    ``max_memory`` octets, sur disque au-delà), puis relu dans l'ordre des
+    groupes. Le tri est stable : l'ordre d'arrivée est conservé dans un groupe.
+    """
+
+    def __init__(self, buckets: Sequence[str] = (), max_memory: int = 1 << 20):
+        """
+        Args:
+            buckets: Ordre d'écriture des groupes (les groupes inconnus viennent ensuite)
+            max_memory: Taille en mémoire de chaque groupe avant bascule sur disque
+        """
+        self.max_memory = max_memory
+        self._files: Dict[str, SpooledTemporaryFile] = {}
+        self.counts: Dict[str, int] = {}
+        for bucket in buckets:
+            self._bucket(bucket)
+
+    def _bucket(self, bucket: str) -> SpooledTemporaryFile:
+        spool = self._files.get(bucket)
+        if spool is None:
+            spool = SpooledTemporaryFile(max_size=self.max_memory, mode='w+', encoding='utf-8', newline='')
+            self._files[bucket] = spool
+            self.counts[bucket] = 0
+        return spool
+
+    def add(self, bucket: str, fragment: str):
+        """Ajoute une ligne rendue au groupe ``bucket``."""
+        self._bucket(bucket).write(fragment)
+        self.counts[bucket] += 1
+
+    def __len__(self) -> int:
+        return sum(self.counts.values())
+
+    def iter_fragments(self, buckets: Optional[Sequence[str]] = None) -> Iterator[str]:
+        """
+        Relit le contenu des groupes par blocs, dans l'ordre des groupes.
+
+        Args:
+            buckets: Groupes à relire (tous, dans l'ordre d'enregistrement, par défaut)
+        """
+        for bucket in (self._files if buckets is None else buckets):
+            spool = self._files.get(bucket)
+            if spool is None:
+                continue
+            spool.seek(0)
+            for chunk in iter(lambda: spool.read(CHUNK_SIZE), ''):
+                yield Markup(chunk)
+
+    def copy_to(self, f: TextIO, buckets: Optional[Sequence[str]] = None):
+        """Écrit le contenu des groupes dans ``f``."""
+        for chunk in self.iter_fragments(buckets):
+            f.write(chunk)
+
+    def close(self):
+        for spool in self._files.values():
+            spool.close()
+        self._files.clear()
+
+    def __enter__(self) -> "RowSpool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,74 @@
+"""Shared HTTP session factory (connection pooling, keep-alive, retries)."""
+import logging
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_shared_session: Optional[requests.Session] = None
+_shared_lock = threading.Lock()
+
+
+def create_session(pool_size: int = 10, max_retries: int = 3, backoff_factor: float = 0.5) -> requests.Session:
+    """Create a requests session with a pooled, retrying adapter.
+
+    Connections are kept alive and reused across calls. Idempotent requests
+    (GET/HEAD/OPTIONS) are retried with exponential backoff on connection
+    errors and on 429/5xx responses; POST requests are never retried here.
+
+    Args:
+        pool_size: Maximum number of connections kept per host
+        max_retries: Number of retries for idempotent requests
+        backoff_factor: Backoff factor in seconds (0.5 -> 0.5s, 1s, 2s...)
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset({'GET', 'HEAD', 'OPTIONS'}),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    })
+
+    logger.debug(f"HTTP session created (pool_size={pool_size}, max_retries={max_retries})")
+    return session
+
+
+def get_shared_session() -> requests.Session:
+    """Return the process-wide session, created on first use from environment settings.
+
+    Used by services instantiated outside the DI container (standalone scripts).
+    """
+    global _shared_session
+    if _shared_session is None:
+        with _shared_lock:
+            if _shared_session is None:
+                _shared_session = create_session(
+                    pool_size=int(os.getenv('HTTP_POOL_SIZE', '10')),
+                    max_retries=int(os.getenv('HTTP_MAX_RETRIES', '3')),
+                    backoff_factor=float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+                )
+    return _shared_session
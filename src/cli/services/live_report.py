@@ -0,0 +1,108 @@
+"""Rendu du rapport live SpiderVision à partir du template Jinja2 précompilé."""
+
+import logging
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Mapping, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+from cli.services.assets import inline_assets, publish_asset
+from cli.services.html_stream import TEMPLATES_DIR, RowSpool, load_static, open_html_output
+
+logger = logging.getLogger(__name__)
+
+LIVE_REPORT_TEMPLATE = 'live_report.html.j2'
+LIVE_REPORT_MACROS = 'live_report_macros.html.j2'
+
+# Ordre d'affichage des statuts : erreurs d'abord
+STATUS_ORDER = ('Erreur', 'Erreur!', 'Warning', 'Succès', 'N/A')
+
+LIVE_REPORT_STYLES = 'live_report.css'
+LIVE_REPORT_SCRIPT = 'live_report.js'
+
+
+@lru_cache(maxsize=None)
+def get_environment() -> Environment:
+    """
+    Environnement Jinja2 partagé par le processus.
+
+    Les templates compilés sont mis en cache en mémoire par l'environnement et
+    leur bytecode sur disque (``$DEALER_REPORT_CACHE_DIR/jinja``), ce qui évite
+    de recompiler le template à chaque exécution du script.
+    """
+    cache_dir = Path(os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')) / 'jinja'
+    bytecode_cache = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+    except OSError as e:
+        logger.warning(f"Cache de bytecode Jinja2 indisponible ({cache_dir}): {e}")
+
+    return Environment(
+        loader=FileSystemLoader(str(TEMPLATES_DIR)),
+        autoescape=select_autoescape(['html', 'j2']),
+        bytecode_cache=bytecode_cache,
+        trim_blocks=True,
+        lstrip_blocks=True,
+        auto_reload=False
+    )
+
+
+def render_live_report(path: str, retailers: Iterable[Mapping[str, Any]],
+                       compress: Optional[bool] = None, inline: Optional[bool] = None,
+                       **context) -> str:
+    """
+    Écrit le rapport live dans ``path`` en flux.
+
+    Chaque retailer est rendu par la macro ``retailer_row`` dès qu'il est lu,
+    puis rangé par statut dans un ``RowSpool`` : la mémoire utilisée ne dépend
+    pas du nombre de retailers, qui peuvent provenir d'un générateur. Les
+    compteurs de l'en-tête sont calculés pendant ce passage ; la page est
+    ensuite écrite (en-tête, lignes triées par statut, pied de page) dans un
+    fichier bufferisé ou un flux gzip.
+
+    Le CSS et le JS sont publiés une fois sous ``assets/`` (à côté du rapport)
+    avec un nom haché et référencés par le rapport ; en mode ``inline`` ils
+    sont intégrés à la page.
+
+    Args:
+        path: Fichier HTML de sortie (``.gz`` pour une sortie compressée)
+        retailers: Lignes du tableau (liste ou générateur de contextes de ligne)
+        compress: Forcer (ou désactiver) la compression gzip
+        inline: Intégrer le CSS et le JS (par défaut : ``REPORT_ASSETS``)
+        **context: Variables du template (current_time, logo, data_source, source_label)
+
+    Returns:
+        str: Chemin du fichier écrit
+    """
+    if inline is None:
+        inline = inline_assets()
+    if inline:
+        assets = {'styles': load_static(LIVE_REPORT_STYLES), 'script': load_static(LIVE_REPORT_SCRIPT)}
+    else:
+        output_dir = Path(path).parent
+        assets = {
+            'stylesheet': publish_asset(output_dir, LIVE_REPORT_STYLES, load_static(LIVE_REPORT_STYLES)),
+            'script_src': publish_asset(output_dir, LIVE_REPORT_SCRIPT, load_static(LIVE_REPORT_SCRIPT))
+        }
+
+    env = get_environment()
+    retailer_row = env.get_template(LIVE_REPORT_MACROS).module.retailer_row
+
+    with RowSpool(STATUS_ORDER) as spool:
+        for retailer in retailers:
+            spool.add(retailer['global_status'], retailer_row(retailer))
+
+        stats = {status: spool.counts.get(status, 0) for status in STATUS_ORDER}
+        stream = env.get_template(LIVE_REPORT_TEMPLATE).generate(
+            rows=spool.iter_fragments(),
+            stats=stats,
+            total_count=len(spool),
+            **assets,
+            **context
+        )
+        with open_html_output(path, compress) as f:
+            f.writelines(stream)
+    return path
@@ -0,0 +1,228 @@
+"""Manifeste des rapports générés (``reports/manifest.json``) et archive de index.html."""
+
+import html
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+REPORT_PATTERN = 'last_day_history_live_report_*.html'
+
+# Horodatage contenu dans le nom des rapports (last_day_history_live_report_20240101_093000.html)
+_REPORT_TIMESTAMP = re.compile(r'_(\d{8}_\d{6})\.html$')
+
+# Compteurs affichés par les boutons de filtre de l'en-tête d'un rapport
+_FILTER_COUNT = re.compile(r'filterTable\(\'[\w-]+\', this\)">([^<(]+?) \((\d+)\)')
+HEADER_READ_SIZE = 1 << 16
+
+# Statuts affichés dans l'archive, dans l'ordre
+ARCHIVE_STATUSES = (('Erreur', 'error'), ('Erreur!', 'error-critical'), ('Warning', 'warning'), ('Succès', 'success'))
+
+ARCHIVE_START = '<!-- ARCHIVE:START -->'
+ARCHIVE_END = '<!-- ARCHIVE:END -->'
+
+
+@dataclass
+class ReportEntry:
+    """Rapport enregistré dans le manifeste."""
+    filename: str
+    generated_at: str
+    size: int
+    total: Optional[int] = None
+    stats: Dict[str, int] = field(default_factory=dict)
+
+
+def _report_timestamp(path: Path) -> str:
+    """Date de génération d'un rapport : celle de son nom, sinon sa date de modification."""
+    match = _REPORT_TIMESTAMP.search(path.name)
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').isoformat()
+    return datetime.fromtimestamp(path.stat().st_mtime).replace(microsecond=0).isoformat()
+
+
+def read_report_stats(path: Union[str, Path]) -> Dict[str, int]:
+    """
+    Compteurs par statut lus dans l'en-tête d'un rapport existant.
+
+    Seul le début du fichier est lu : les boutons de filtre précèdent le tableau.
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        header = f.read(HEADER_READ_SIZE)
+    return {label.strip(): int(count) for label, count in _FILTER_COUNT.findall(header)}
+
+
+class ReportManifest:
+    """Liste des rapports d'un dossier, tenue à jour à chaque rapport écrit.
+
+    Chaque rapport ajouté est enregistré avec sa date, sa taille et ses
+    compteurs par statut : le dernier rapport et l'archive de index.html
+    sont obtenus sans parcourir ni ``stat`` le dossier. Le dossier n'est
+    parcouru qu'une fois par ``rebuild`` (manifeste absent ou à reconstruire).
+    """
+
+    def __init__(self, reports_dir: Union[str, Path] = 'reports', path: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            reports_dir: Dossier des rapports
+            path: Fichier du manifeste (``reports_dir/manifest.json`` par défaut)
+        """
+        self.reports_dir = Path(reports_dir)
+        self.path = Path(path) if path else self.reports_dir / MANIFEST_NAME
+        self._entries: Dict[str, ReportEntry] = self._load()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _load(self) -> Dict[str, ReportEntry]:
+        """Charger le manifeste (vide s'il est absent ou illisible)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            return {item['filename']: ReportEntry(**item) for item in stored.get('reports', [])}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Manifeste illisible ({self.path}), il sera reconstruit: {e}")
+            return {}
+
+    def _save(self):
+        """Écrire le manifeste de manière atomique"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        latest = self.latest()
+        data = {
+            'latest': latest.filename if latest else None,
+            'reports': [asdict(entry) for entry in self.entries()]
+        }
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def add(self, filename: str, generated_at: Union[str, datetime, None] = None,
+            stats: Optional[Mapping[str, int]] = None, total: Optional[int] = None) -> ReportEntry:
+        """
+        Enregistrer un rapport qui vient d'être écrit (remplace une entrée du même nom).
+
+        Seul le fichier ajouté est lu ; si le manifeste n'existe pas encore, il
+        est d'abord construit à partir du dossier.
+
+        Args:
+            filename: Nom du rapport dans ``reports_dir``
+            generated_at: Date de génération (par défaut : celle du nom du fichier)
+            stats: Nombre de retailers par statut
+            total: Nombre total de retailers
+        """
+        if not self.exists():
+            # Premier rapport enregistré : reprendre les rapports déjà présents
+            self.rebuild()
+        path = self.reports_dir / filename
+        if generated_at is None:
+            generated_at = _report_timestamp(path)
+        elif isinstance(generated_at, datetime):
+            generated_at = generated_at.replace(microsecond=0).isoformat()
+        entry = ReportEntry(filename, generated_at, path.stat().st_size,
+                            total, {status: int(count) for status, count in (stats or {}).items()})
+        self._entries[filename] = entry
+        self._save()
+        return entry
+
+    def remove(self, filename: str):
+        """Retirer un rapport supprimé du dossier."""
+        if self._entries.pop(filename, None) is not None:
+            self._save()
+
+    def prune(self) -> int:
+        """
+        Retirer les entrées dont le rapport n'existe plus dans le dossier.
+
+        Returns:
+            int: Nombre d'entrées retirées
+        """
+        missing = [name for name in self._entries if not (self.reports_dir / name).exists()]
+        for name in missing:
+            del self._entries[name]
+        if missing:
+            self._save()
+            logger.info(f"{len(missing)} rapport(s) supprimé(s) retiré(s) du manifeste")
+        return len(missing)
+
+    def entries(self) -> List[ReportEntry]:
+        """Rapports enregistrés, du plus récent au plus ancien."""
+        return sorted(self._entries.values(), key=lambda entry: (entry.generated_at, entry.filename), reverse=True)
+
+    def latest(self) -> Optional[ReportEntry]:
+        """Dernier rapport généré (None si le manifeste est vide)."""
+        if not self._entries:
+            return None
+        return max(self._entries.values(), key=lambda entry: (entry.generated_at, entry.filename))
+
+    def rebuild(self) -> int:
+        """
+        Reconstruire le manifeste à partir du contenu du dossier.
+
+        Les rapports déjà connus gardent leurs informations ; les compteurs des
+        autres sont lus dans leur en-tête. Les entrées dont le fichier a
+        disparu sont retirées.
+
+        Returns:
+            int: Nombre de rapports enregistrés
+        """
+        entries = {}
+        for path in self.reports_dir.glob(REPORT_PATTERN):
+            entry = self._entries.get(path.name)
+            if entry is None:
+                stats = read_report_stats(path)
+                total = stats.pop('Tous', None)
+                entry = ReportEntry(path.name, _report_timestamp(path), path.stat().st_size, total, stats)
+            entries[path.name] = entry
+        self._entries = entries
+        self._save()
+        logger.info(f"Manifeste reconstruit: {len(entries)} rapport(s) ({self.path})")
+        return len(entries)
+
+
+def render_archive(entries: List[ReportEntry], href_prefix: str = 'reports/') -> str:
+    """Bloc HTML de l'archive des rapports (inséré entre les marqueurs de index.html)."""
+    lines = [
+        ARCHIVE_START,
+        '        <div class="archive" id="archive">',
+        f'            <h3>🗂️ Archive des rapports ({len(entries)})</h3>',
+        '            <table>',
+    ]
+    for entry in entries:
+        generated_at = datetime.fromisoformat(entry.generated_at).strftime('%d/%m/%Y %H:%M')
+        badges = ''.join(
+            f'<span class="badge badge-{css}">{html.escape(status)} {entry.stats[status]}</span>'
+            for status, css in ARCHIVE_STATUSES if entry.stats.get(status)
+        )
+        total = f'{entry.total} retailers' if entry.total is not None else ''
+        lines.append(
+            f'                <tr><td><a href="{html.escape(href_prefix + entry.filename)}">{generated_at}</a></td>'
+            f'<td>{total}</td><td>{badges}</td><td class="size">{max(1, round(entry.size / 1024))} Ko</td></tr>'
+        )
+    lines += [
+        '            </table>',
+        '        </div>',
+        f'        {ARCHIVE_END}',
+    ]
+    return '\n'.join(lines)
+
+
+def replace_archive(content: str, archive: str) -> Optional[str]:
+    """Remplacer le bloc entre les marqueurs d'archive de ``content`` (None si absents)."""
+    start = content.find(ARCHIVE_START)
+    end = content.find(ARCHIVE_END, start)
+    if start < 0 or end < 0:
+        return None
+    return content[:start] + archive + content[end + len(ARCHIVE_END):]
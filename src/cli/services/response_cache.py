@@ -0,0 +1,152 @@
+"""Cache disque des réponses HTTP SpiderVision (corps compressés, requêtes conditionnelles)."""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from cli.services.token_cache import decode_jwt_claims
+
+logger = logging.getLogger(__name__)
+
+# En-têtes de réponse conservés avec le corps
+_STORED_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+
+def token_user(token: Optional[str]) -> str:
+    """Identifiant de l'utilisateur porté par le token (stable d'un token à l'autre)."""
+    claims = decode_jwt_claims(token or '')
+    for claim in ('sub', 'email', 'userId', 'id'):
+        if claims.get(claim):
+            return str(claims[claim])
+    return ''
+
+
+class ResponseCache:
+    """
+    Réponses JSON mémorisées sur disque, par URL et par utilisateur.
+
+    Chaque entrée est composée de ``<clé>.json.gz`` (corps compressé) et de
+    ``<clé>.meta.json`` (URL, en-têtes ETag/Last-Modified, date de stockage).
+    Si le serveur fournit un validateur, la réponse est revalidée par une
+    requête conditionnelle (304 = corps en cache réutilisé) ; sinon elle est
+    servie sans appel réseau pendant ``max_age`` secondes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_age: Optional[int] = None):
+        cache_dir = os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')
+        self.directory = Path(directory or os.getenv('SPIDER_VISION_RESPONSE_CACHE_DIR',
+                                                     os.path.join(cache_dir, 'responses')))
+        self.max_age = int(max_age if max_age is not None
+                           else os.getenv('SPIDER_VISION_RESPONSE_CACHE_MAX_AGE', '300'))
+
+    @staticmethod
+    def enabled_by_default() -> bool:
+        """Le cache est actif sauf si SPIDER_VISION_RESPONSE_CACHE vaut false/0/no."""
+        return os.getenv('SPIDER_VISION_RESPONSE_CACHE', 'true').strip().lower() not in ('false', '0', 'no', 'off')
+
+    def _paths(self, url: str, user: str):
+        key = hashlib.sha256(f"{user}\n{url}".encode('utf-8')).hexdigest()
+        return self.directory / f"{key}.json.gz", self.directory / f"{key}.meta.json"
+
+    def lookup(self, url: str, user: str = '') -> Optional[Dict[str, Any]]:
+        """
+        Retourne l'entrée en cache (``meta`` et ``body``) ou None.
+
+        Args:
+            url: URL de la requête
+            user: Utilisateur authentifié (les réponses ne sont jamais partagées entre utilisateurs)
+        """
+        body_path, meta_path = self._paths(url, user)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with gzip.open(body_path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError) as e:
+            logger.warning(f"Entrée de cache illisible pour {url}: {e}")
+            return None
+        if not isinstance(meta, dict) or meta.get('url') != url:
+            return None
+        return {'meta': meta, 'body': body}
+
+    def is_fresh(self, entry: Dict[str, Any]) -> bool:
+        """Vrai si l'entrée a été stockée (ou revalidée) il y a moins de ``max_age`` secondes."""
+        return time.time() - entry['meta'].get('stored_at', 0) < self.max_age
+
+    @staticmethod
+    def has_validator(entry: Dict[str, Any]) -> bool:
+        headers = entry['meta'].get('headers', {})
+        return bool(headers.get('ETag') or headers.get('Last-Modified'))
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        """En-têtes If-None-Match / If-Modified-Since pour revalider l'entrée."""
+        headers = entry['meta'].get('headers', {})
+        conditional = {}
+        if headers.get('ETag'):
+            conditional['If-None-Match'] = headers['ETag']
+        if headers.get('Last-Modified'):
+            conditional['If-Modified-Since'] = headers['Last-Modified']
+        return conditional
+
+    def store(self, url: str, user: str, response: requests.Response):
+        """Enregistre le corps compressé et les validateurs d'une réponse 200."""
+        body = response.content
+        if not isinstance(body, bytes):
+            return
+        headers = {name: response.headers[name] for name in _STORED_HEADERS
+                   if name in (response.headers or {})}
+        self._write(url, user, body, {'url': url, 'headers': headers, 'stored_at': time.time()})
+
+    def touch(self, url: str, user: str, entry: Dict[str, Any]):
+        """Marque une entrée comme revalidée (réponse 304)."""
+        meta = dict(entry['meta'], stored_at=time.time())
+        _, meta_path = self._paths(url, user)
+        self._replace(meta_path, json.dumps(meta).encode('utf-8'))
+        entry['meta'] = meta
+
+    def _write(self, url: str, user: str, body: bytes, meta: Dict[str, Any]):
+        body_path, meta_path = self._paths(url, user)
+        # Le corps d'abord : une méta sans corps n'est jamais visible
+        self._replace(body_path, gzip.compress(body, mtime=0))
+        self._replace(meta_path, json.dumps(meta).encode('utf-8'))
+
+    def _replace(self, path: Path, data: bytes):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache des réponses ({path}): {e}")
+
+    @staticmethod
+    def to_response(url: str, entry: Dict[str, Any]) -> requests.Response:
+        """Reconstruit une réponse 200 à partir d'une entrée en cache."""
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = entry['body']
+        response.headers = CaseInsensitiveDict(entry['meta'].get('headers', {}))
+        response.encoding = 'utf-8'
+        return response
+
+    def clear(self):
+        """Supprime toutes les réponses en cache."""
+        if not self.directory.exists():
+            return
+        for path in self.directory.iterdir():
+            if path.name.endswith(('.json.gz', '.meta.json')):
+                path.unlink(missing_ok=True)
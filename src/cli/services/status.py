@@ -0,0 +1,114 @@
+"""Classification vectorisée des statuts (succès / warning / erreur) sur des tableaux NumPy."""
+
+from dataclasses import dataclass
+from functools import reduce
+from typing import Sequence, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# Codes de statut, du meilleur au pire : le pire statut de plusieurs règles est leur maximum
+STATUS_NA = 0
+STATUS_SUCCESS = 1
+STATUS_WARNING = 2
+STATUS_ERROR = 3
+STATUS_CRITICAL = 4
+
+# Libellés indexés par code (rapports CLI / export HTML, puis rapport live)
+STATUS_NAMES = ('na', 'success', 'warning', 'error', 'error')
+LIVE_STATUS_LABELS = ('N/A', 'Succès', 'Warning', 'Erreur', 'Erreur!')
+
+# Bornes basses des classes de couleur : < 25 %, 25-50 %, 50-70 %, 70-90 %, 90-95 %, >= 95 %
+COLOR_EDGES = (25.0, 50.0, 70.0, 90.0, 95.0)
+GRADIENT_COLORS = ('#dc2626', '#ef4444', '#f87171', '#fb923c', '#fbbf24', '#10b981')
+
+
+@dataclass(frozen=True)
+class Classification:
+    """
+    Statuts de plusieurs retailers pour les deux règles (progress / success).
+
+    Chaque attribut est un tableau int8 de codes ``STATUS_*`` (ou d'indices de
+    couleur pour ``color``) de même forme que les valeurs classées.
+    """
+    progress: np.ndarray
+    success: np.ndarray
+    worst: np.ndarray
+    color: np.ndarray
+
+
+def classify(values: ArrayLike, success_threshold: ArrayLike, warning_threshold: ArrayLike,
+             zero_is_critical: bool = False) -> np.ndarray:
+    """
+    Classe des valeurs (en %) par rapport à leurs seuils.
+
+    Les seuils sont des scalaires ou des tableaux (un seuil par retailer),
+    diffusés sur ``values``. Une valeur atteint un seuil dès qu'elle lui est
+    égale : ``>= success`` -> succès, ``>= warning`` -> warning, sinon erreur.
+    Une valeur NaN (absente) vaut ``STATUS_NA``.
+
+    Args:
+        values: Valeurs à classer
+        success_threshold: Seuil(s) de succès
+        warning_threshold: Seuil(s) de warning
+        zero_is_critical: Classer une valeur nulle en ``STATUS_CRITICAL``
+
+    Returns:
+        np.ndarray: Codes de statut (int8)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    codes = np.where(values >= success_threshold, STATUS_SUCCESS,
+                     np.where(values >= warning_threshold, STATUS_WARNING, STATUS_ERROR))
+    if zero_is_critical:
+        codes = np.where(values == 0, STATUS_CRITICAL, codes)
+    return np.where(np.isnan(values), STATUS_NA, codes).astype(np.int8)
+
+
+def worst_status(*codes: np.ndarray) -> np.ndarray:
+    """Pire statut, élément par élément, de plusieurs tableaux de codes."""
+    return reduce(np.maximum, codes).astype(np.int8)
+
+
+def color_buckets(values: ArrayLike, edges: Sequence[float] = COLOR_EDGES) -> np.ndarray:
+    """Indice de classe de couleur de chaque valeur (0 = rouge foncé, NaN compris)."""
+    values = np.asarray(values, dtype=np.float64)
+    buckets = np.searchsorted(np.asarray(edges), values, side='right')
+    return np.where(np.isnan(values), 0, buckets).astype(np.int8)
+
+
+def gradient_colors(values: ArrayLike) -> np.ndarray:
+    """Couleur en dégradé selon le pourcentage (rouge foncé < 25 %, vert >= 95 %)."""
+    return labels(color_buckets(values), GRADIENT_COLORS)
+
+
+def labels(codes: np.ndarray, names: Sequence[str] = STATUS_NAMES) -> np.ndarray:
+    """Libellés des codes (tableau d'objets ``str``, indexé comme ``codes``)."""
+    return np.asarray(names, dtype=object)[codes]
+
+
+def classify_rates(progress: ArrayLike, success: ArrayLike,
+                   progress_thresholds: Tuple[ArrayLike, ArrayLike],
+                   success_thresholds: Tuple[ArrayLike, ArrayLike],
+                   zero_is_critical: bool = False) -> Classification:
+    """
+    Classe les deux règles de plusieurs retailers en un seul passage.
+
+    Args:
+        progress: Taux de crawl (%) par retailer
+        success: Taux de succès / de contenu (%) par retailer
+        progress_thresholds: Seuils (succès, warning) du taux de crawl, scalaires ou par retailer
+        success_thresholds: Seuils (succès, warning) du taux de succès, scalaires ou par retailer
+        zero_is_critical: Classer une valeur nulle en ``STATUS_CRITICAL``
+
+    Returns:
+        Classification: Statut de chaque règle, pire statut et couleur du taux de succès
+    """
+    progress_codes = classify(progress, *progress_thresholds, zero_is_critical=zero_is_critical)
+    success_codes = classify(success, *success_thresholds, zero_is_critical=zero_is_critical)
+    return Classification(
+        progress=progress_codes,
+        success=success_codes,
+        worst=worst_status(progress_codes, success_codes),
+        color=color_buckets(success)
+    )
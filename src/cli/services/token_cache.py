@@ -0,0 +1,140 @@
+"""Cache local du token JWT SpiderVision, avec prise en compte de l'expiration."""
+
+import base64
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def decode_jwt_claims(token: str) -> Dict[str, Any]:
+    """
+    Décode les claims d'un JWT sans vérifier sa signature.
+
+    Args:
+        token: Token JWT (header.payload.signature)
+
+    Returns:
+        Dict[str, Any]: Claims du payload (dict vide si le token n'est pas un JWT lisible)
+    """
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except (IndexError, ValueError, AttributeError):
+        return {}
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Retourne le timestamp d'expiration (claim ``exp``) ou None s'il est inconnu."""
+    exp = decode_jwt_claims(token).get('exp')
+    try:
+        return float(exp) if exp is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """
+    Token JWT mémorisé dans un fichier local (permissions 0600).
+
+    Le token est réutilisé jusqu'à ``refresh_margin`` secondes avant son
+    expiration. Un verrou fichier permet à plusieurs processus lancés en même
+    temps de ne faire qu'une seule connexion.
+    """
+
+    def __init__(self, path: Optional[str] = None, refresh_margin: Optional[int] = None):
+        cache_dir = os.getenv('DEALER_REPORT_CACHE_DIR', '.cache')
+        self.path = Path(path or os.getenv('SPIDER_VISION_TOKEN_CACHE',
+                                           os.path.join(cache_dir, 'spider_vision_token.json')))
+        self.refresh_margin = int(refresh_margin if refresh_margin is not None
+                                  else os.getenv('SPIDER_VISION_TOKEN_REFRESH_MARGIN', '300'))
+
+    def is_fresh(self, token: Optional[str]) -> bool:
+        """
+        Vérifie qu'un token est utilisable encore au moins ``refresh_margin`` secondes.
+
+        Un token dont l'expiration est inconnue est considéré comme valide.
+        """
+        if not token:
+            return False
+        exp = token_expiry(token)
+        return exp is None or exp - self.refresh_margin > time.time()
+
+    def load(self, user: Optional[str] = None) -> Optional[str]:
+        """
+        Retourne le token en cache s'il appartient à l'utilisateur et n'est pas proche de l'expiration.
+
+        Args:
+            user: Email de l'utilisateur configuré. Sans email, aucun token n'est
+                retourné : le token d'un autre utilisateur n'est jamais réutilisé.
+        """
+        if not user:
+            return None
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Cache du token illisible ({self.path}): {e}")
+            return None
+
+        if not isinstance(entry, dict) or entry.get('user') != user:
+            return None
+        token = entry.get('token')
+        return token if self.is_fresh(token) else None
+
+    def store(self, token: str, user: Optional[str] = None):
+        """Enregistre le token de manière atomique dans un fichier lisible par le seul propriétaire."""
+        entry = {'user': user, 'token': token, 'exp': token_expiry(token), 'stored_at': time.time()}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire le cache du token ({self.path}): {e}")
+
+    def clear(self):
+        """Supprime le token en cache."""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def lock(self):
+        """Verrou exclusif inter-processus autour du rafraîchissement du token."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = self.path.with_name(f"{self.path.name}.lock")
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+            yield
+        finally:
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
@@ -0,0 +1,114 @@
+// Variables globales pour les filtres
+let activeFilters = new Set(['success', 'warning', 'error']);
+
+// Initialisation
+document.addEventListener('DOMContentLoaded', function() {
+    initializeFilters();
+    addHistoryInteractions();
+});
+
+// Initialiser les filtres
+function initializeFilters() {
+    document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
+        btn.addEventListener('click', function() {
+            toggleFilter(this.dataset.status);
+        });
+    });
+}
+
+// Basculer un filtre
+function toggleFilter(status) {
+    const btn = document.querySelector(`[data-status="${status}"]`);
+
+    if (activeFilters.has(status)) {
+        activeFilters.delete(status);
+        btn.classList.remove('active');
+    } else {
+        activeFilters.add(status);
+        btn.classList.add('active');
+    }
+
+    applyFilters();
+    updateStats();
+}
+
+// Basculer tous les filtres
+function toggleAllFilters() {
+    const allActive = activeFilters.size === 3;
+
+    if (allActive) {
+        // Tout désactiver
+        activeFilters.clear();
+        document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
+            btn.classList.remove('active');
+        });
+    } else {
+        // Tout activer
+        activeFilters = new Set(['success', 'warning', 'error']);
+        document.querySelectorAll('.filter-btn[data-status]').forEach(btn => {
+            btn.classList.add('active');
+        });
+    }
+
+    applyFilters();
+    updateStats();
+}
+
+// Appliquer les filtres
+function applyFilters() {
+    const rows = document.querySelectorAll('#retailer-table-body tr');
+
+    rows.forEach(row => {
+        const status = row.dataset.status;
+        if (activeFilters.has(status)) {
+            row.classList.remove('hidden-row');
+        } else {
+            row.classList.add('hidden-row');
+        }
+    });
+}
+
+// Mettre à jour les statistiques
+function updateStats() {
+    const visibleRows = document.querySelectorAll('#retailer-table-body tr:not(.hidden-row)');
+    let totalStores = 0, totalCrawled = 0, totalFailed = 0;
+
+    visibleRows.forEach(row => {
+        const cells = row.querySelectorAll('td');
+        if (cells.length >= 4) {
+            totalStores += parseInt(cells[1].textContent) || 0;
+            totalCrawled += parseInt(cells[2].textContent) || 0;
+            totalFailed += parseInt(cells[3].textContent) || 0;
+        }
+    });
+
+    // Mettre à jour les cartes de statistiques
+    const statCards = document.querySelectorAll('.stat-value');
+    if (statCards.length >= 3) {
+        statCards[0].textContent = totalStores;
+        statCards[1].textContent = totalCrawled;
+        statCards[2].textContent = totalFailed;
+
+        const overallProgress = totalStores > 0 ? (totalCrawled / totalStores * 100).toFixed(1) : 0;
+        if (statCards[3]) statCards[3].textContent = overallProgress + '%';
+    }
+}
+
+// Ajouter des interactions pour l'historique
+function addHistoryInteractions() {
+    document.querySelectorAll('.history-bar').forEach(bar => {
+        bar.addEventListener('mouseenter', function() {
+            this.style.transform = 'scaleY(1.2)';
+        });
+        bar.addEventListener('mouseleave', function() {
+            this.style.transform = 'scaleY(1)';
+        });
+    });
+}
+
+// Animation au chargement
+setTimeout(() => {
+    document.querySelectorAll('.progress-bar').forEach(bar => {
+        bar.style.width = bar.style.width;
+    });
+}, 100);
@@ -0,0 +1,86 @@
+function filterTable(filter, el) {
+    const rows = document.querySelectorAll('#dataTable tbody tr');
+    const buttons = document.querySelectorAll('.filter-btn');
+
+    // Reset button states
+    buttons.forEach(btn => btn.classList.remove('active'));
+
+    // Set active button
+    if (el) { el.classList.add('active'); }
+
+    rows.forEach(row => {
+        const isMini = row.classList.contains('mini-details-row');
+        if (filter === 'all') {
+            // Show all rows; mini rows respect their own hidden class
+            row.style.display = isMini && row.classList.contains('hidden') ? 'none' : '';
+        } else {
+            if (isMini) {
+                // Mini row visibility depends on its parent row and hidden state
+                const parent = row.previousElementSibling;
+                const pStatus = parent ? parent.getAttribute('data-status') : null;
+                const pClass = pStatus ? getStatusClass(pStatus) : '';
+                const parentMatches = (filter === pClass) || (filter === 'error-critical' && pStatus === 'Erreur!');
+                row.style.display = parentMatches && !row.classList.contains('hidden') ? '' : 'none';
+            } else {
+                const status = row.getAttribute('data-status');
+                const statusClass = getStatusClass(status);
+                if (filter === statusClass || (filter === 'error-critical' && status === 'Erreur!')) {
+                    row.style.display = '';
+                } else {
+                    row.style.display = 'none';
+                }
+            }
+        }
+    });
+}
+
+function getStatusClass(status) {
+    if (status === 'Succès') return 'success';
+    if (status === 'Warning') return 'warning';
+    if (status === 'Erreur!') return 'error-critical';
+    if (status === 'Erreur') return 'error';
+    return '';
+}
+// Status class for history progress using same rules as day J
+function getHistoryStatusClass(percent) {
+    if (!isFinite(percent)) return 'history-na';
+    if (percent === 0) return 'history-error'; // Erreur!
+    if (percent >= 30) return 'history-success';
+    if (percent >= 25) return 'history-warning';
+    return 'history-error';
+}
+
+function toggleMini(el) {
+    const row = el.closest('tr');
+    const details = row.nextElementSibling;
+    if (details && details.classList.contains('mini-details-row')) {
+        // Toggle logical hidden class
+        details.classList.toggle('hidden');
+        // Ensure inline display matches the new state (overrides previous filter inline style)
+        if (details.classList.contains('hidden')) {
+            details.style.display = 'none';
+        } else {
+            details.style.display = '';
+        }
+        // Render history on first open
+        const historySpan = details.querySelector('.history-line');
+        if (historySpan && !historySpan.dataset.rendered) {
+            try {
+                const histStr = row.getAttribute('data-history') || '[]';
+                const hist = JSON.parse(histStr);
+                const pieces = (Array.isArray(hist) ? hist : []).map((v, idx) => {
+                    if (v === null || v === undefined || Number.isNaN(v)) {
+                        return '<span class="history-day history-na" title="Jour ' + idx + ': N/A">—</span>';
+                    }
+                    const n = Math.round(Number(v));
+                    const cls = getHistoryStatusClass(n);
+                    return '<span class="history-day ' + cls + '" title="Jour ' + idx + ': ' + n + '%">' + n + '%</span>';
+                });
+                historySpan.innerHTML = pieces.join('');
+            } catch (e) {
+                historySpan.textContent = '—';
+            }
+            historySpan.dataset.rendered = '1';
+        }
+    }
+}
@@ -3,32 +3,53 @@ Script pour mettre à jour automatiquement le lien du dernier rapport dans index
 """
 import os
 import re
+import shutil
 from pathlib import Path
 
+from cli.services.compression import ENCODING_SUFFIXES, variant_path
+from cli.services.manifest import ReportManifest, render_archive, replace_archive
+
 
 def get_latest_report(reports_dir='reports'):
     """
     Récupère le nom du dernier fichier de rapport généré.
     
+    Le dernier rapport est lu dans le manifeste (reports/manifest.json) ; le
+    dossier n'est parcouru que si le manifeste est absent ou périmé.
+    
     Args:
         reports_dir: Chemin vers le dossier des rapports
         
     Returns:
         str: Nom du fichier du dernier rapport (ex: 'last_day_history_live_report_20250930_103145.html')
     """
-    reports_path = Path(reports_dir)
-    
-    # Chercher tous les fichiers HTML de rapport
-    report_files = list(reports_path.glob('last_day_history_live_report_*.html'))
+    manifest = load_manifest(reports_dir)
+    latest_report = manifest.latest()
     
-    if not report_files:
+    if not latest_report:
         print("⚠️ Aucun rapport trouvé dans le dossier reports/")
         return None
     
-    # Trier par date de modification (le plus récent en premier)
-    latest_report = max(report_files, key=lambda f: f.stat().st_mtime)
+    return latest_report.filename
+
+
+def load_manifest(reports_dir='reports'):
+    """
+    Charge le manifeste des rapports, reconstruit depuis le dossier s'il est
+    absent. Les rapports supprimés hors du manifeste en sont retirés.
     
-    return latest_report.name
+    Args:
+        reports_dir: Chemin vers le dossier des rapports
+        
+    Returns:
+        ReportManifest: Manifeste à jour
+    """
+    manifest = ReportManifest(reports_dir)
+    if not manifest.exists():
+        manifest.rebuild()
+    else:
+        manifest.prune()
+    return manifest
 
 
 def update_index_html(latest_report_filename, index_path='index.html'):
@@ -88,10 +109,46 @@ def update_index_html(latest_report_filename, index_path='index.html'):
         return False
 
 
+def replace_with_link(source_file, target_file):
+    """
+    Fait pointer target_file sur le contenu de source_file de manière atomique.
+    
+    Un lien physique temporaire vers source_file est créé puis renommé sur
+    target_file (os.replace) : aucun octet n'est copié et un lecteur voit
+    toujours soit l'ancien fichier complet, soit le nouveau. Si le système de
+    fichiers ne permet pas les liens physiques, le contenu est copié dans le
+    fichier temporaire avant le renommage.
+    
+    Les rapports étant écrits dans un nouveau fichier renommé à la fin, le
+    lien n'est jamais modifié par la génération d'un rapport suivant.
+    
+    Returns:
+        bool: True pour un lien physique, False pour une copie
+    """
+    source_file = Path(source_file)
+    target_file = Path(target_file)
+    tmp_file = target_file.with_name(f"{target_file.name}.{os.getpid()}.tmp")
+    
+    try:
+        try:
+            os.link(source_file, tmp_file)
+            linked = True
+        except OSError:
+            # Système de fichiers sans liens physiques (FAT, partage réseau...)
+            shutil.copyfile(source_file, tmp_file)
+            linked = False
+        os.replace(tmp_file, target_file)
+    finally:
+        if tmp_file.exists():
+            tmp_file.unlink()
+    return linked
+
+
 def update_last_report_symlink(latest_report_filename, reports_dir='reports'):
     """
     Crée ou met à jour le fichier last_day_history_live_report.html
-    pour qu'il soit une copie du dernier rapport.
+    pour qu'il pointe sur le dernier rapport (lien physique, ou copie si
+    le système de fichiers ne le permet pas), remplacé de manière atomique.
     
     Args:
         latest_report_filename: Nom du fichier du dernier rapport
@@ -105,40 +162,84 @@ def update_last_report_symlink(latest_report_filename, reports_dir='reports'):
     target_file = reports_path / 'last_day_history_live_report.html'
     
     try:
-        # Copier le contenu du dernier rapport vers le fichier "latest"
-        with open(source_file, 'r', encoding='utf-8') as src:
-            content = src.read()
+        # Faire pointer le fichier "latest" sur le dernier rapport (octets inchangés)
+        linked = replace_with_link(source_file, target_file)
         
-        with open(target_file, 'w', encoding='utf-8') as dst:
-            dst.write(content)
+        # Ses variantes pré-compressées aussi, et retirer celles qui n'existent plus
+        for encoding in ENCODING_SUFFIXES:
+            source_variant = variant_path(source_file, encoding)
+            target_variant = variant_path(target_file, encoding)
+            if source_variant.exists():
+                replace_with_link(source_variant, target_variant)
+            elif target_variant.exists():
+                target_variant.unlink()
         
-        print(f"✅ Fichier last_day_history_live_report.html mis à jour")
+        print(f"✅ Fichier last_day_history_live_report.html mis à jour ({'lien' if linked else 'copie'})")
         return True
     except Exception as e:
         print(f"⚠️ Erreur lors de la mise à jour du symlink: {e}")
         return False
 
 
-def auto_update_index():
+def update_index_archive(manifest, index_path='index.html'):
+    """
+    Réécrit l'archive des rapports de index.html (entre les marqueurs
+    ARCHIVE:START / ARCHIVE:END) à partir du manifeste.
+    
+    Args:
+        manifest: Manifeste des rapports
+        index_path: Chemin vers le fichier index.html
+        
+    Returns:
+        bool: True si la mise à jour a réussi, False sinon
+    """
+    index_file = Path(index_path)
+    
+    try:
+        content = index_file.read_text(encoding='utf-8')
+    except Exception as e:
+        print(f"❌ Erreur lors de la lecture de {index_path}: {e}")
+        return False
+    
+    href_prefix = f"{manifest.reports_dir.as_posix().rstrip('/')}/"
+    updated_content = replace_archive(content, render_archive(manifest.entries(), href_prefix))
+    if updated_content is None:
+        print("⚠️ Marqueurs de l'archive non trouvés dans index.html")
+        return False
+    
+    try:
+        index_file.write_text(updated_content, encoding='utf-8')
+        print(f"✅ Archive de index.html mise à jour ({len(manifest.entries())} rapports)")
+        return True
+    except Exception as e:
+        print(f"❌ Erreur lors de l'écriture de {index_path}: {e}")
+        return False
+
+
+def auto_update_index(reports_dir='reports', index_path='index.html'):
     """
     Fonction principale pour automatiser la mise à jour de index.html
     """
     print("🔄 Mise à jour automatique de index.html...")
     
-    # 1. Récupérer le dernier rapport
-    latest_report = get_latest_report()
+    # 1. Récupérer le dernier rapport (manifeste)
+    manifest = load_manifest(reports_dir)
+    latest = manifest.latest()
     
-    if not latest_report:
+    if not latest:
         print("❌ Impossible de trouver le dernier rapport")
         return False
     
+    latest_report = latest.filename
     print(f"📊 Dernier rapport trouvé: {latest_report}")
     
-    # 2. Mettre à jour index.html
-    success = update_index_html(latest_report)
+    # 2. Mettre à jour index.html (bouton du dernier rapport et archive)
+    success = update_index_html(latest_report, index_path)
+    if success:
+        update_index_archive(manifest, index_path)
     
     # 3. Mettre à jour le fichier "latest" pour GitHub Pages
-    update_last_report_symlink(latest_report)
+    update_last_report_symlink(latest_report, reports_dir)
     
     return success
 
@@ -0,0 +1,90 @@
+"""Unit tests for the asynchronous Spider Vision client."""
+import asyncio
+from unittest.mock import Mock
+
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+from aiohttp import web
+
+from cli.services.async_data import AsyncSpiderVisionData
+
+
+async def _serve(handler):
+    """Start a local HTTP server answering /store-history/{store_id} with ``handler``."""
+    app = web.Application()
+    app.router.add_get('/store-history/{store_id}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+class TestAsyncSpiderVisionData:
+    """Test bulk store history fetching."""
+
+    def test_concurrency_is_bounded(self, monkeypatch):
+        """Test that no more than max_concurrency requests are in flight."""
+        state = {'in_flight': 0, 'peak': 0}
+
+        async def handler(request):
+            state['in_flight'] += 1
+            state['peak'] = max(state['peak'], state['in_flight'])
+            await asyncio.sleep(0.01)
+            state['in_flight'] -= 1
+            return web.json_response({'id': request.match_info['store_id']})
+
+        async def scenario():
+            runner, base = await _serve(handler)
+            monkeypatch.setenv('SPIDER_VISION_API_BASE', base)
+            try:
+                async with AsyncSpiderVisionData(max_concurrency=3) as client:
+                    return await client.get_store_histories('token', [str(i) for i in range(12)])
+            finally:
+                await runner.cleanup()
+
+        histories = asyncio.run(scenario())
+        assert histories == {str(i): {'id': str(i)} for i in range(12)}
+        assert state['peak'] <= 3
+
+    def test_deadline_cancels_slow_stores(self, monkeypatch):
+        """Test that requests still running at the deadline are dropped."""
+        async def handler(request):
+            if request.match_info['store_id'] == 'slow':
+                await asyncio.sleep(1)
+            return web.json_response({'id': request.match_info['store_id']})
+
+        async def scenario():
+            runner, base = await _serve(handler)
+            monkeypatch.setenv('SPIDER_VISION_API_BASE', base)
+            try:
+                async with AsyncSpiderVisionData() as client:
+                    return await client.get_store_histories('token', ['fast', 'slow'], deadline=0.2)
+            finally:
+                await runner.cleanup()
+
+        assert asyncio.run(scenario()) == {'fast': {'id': 'fast'}}
+
+    def test_401_refreshes_token_once(self, monkeypatch):
+        """Test that concurrent 401s share a single token refresh."""
+        async def handler(request):
+            if request.headers['Authorization'] != 'Bearer fresh':
+                return web.json_response({}, status=401)
+            return web.json_response({'id': request.match_info['store_id']})
+
+        auth = Mock()
+        auth.refresh.return_value = 'fresh'
+
+        async def scenario():
+            runner, base = await _serve(handler)
+            monkeypatch.setenv('SPIDER_VISION_API_BASE', base)
+            try:
+                async with AsyncSpiderVisionData(auth=auth) as client:
+                    return await client.get_store_histories('stale', ['1', '2', '3'])
+            finally:
+                await runner.cleanup()
+
+        assert asyncio.run(scenario()) == {str(i): {'id': str(i)} for i in (1, 2, 3)}
+        auth.refresh.assert_called_once_with('stale')
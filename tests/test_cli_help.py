@@ -137,6 +137,29 @@ class TestCLIIntegration:
         assert 'Report generated: /tmp/report.html' in result.output
         mock_container.report_service.return_value.generate_dealer_report.assert_called_once()
     
+    def test_generate_dealer_report_no_cache(self, mock_container):
+        """Test that --no-cache disables the response cache of the repository."""
+        mock_container.report_service.return_value.generate_dealer_report.return_value = '/tmp/report.html'
+        mock_container.report_repository_kind.return_value = 'web'
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['generate-dealer-report', '--no-cache'])
+        
+        assert result.exit_code == 0
+        mock_container.web_data_repository.add_kwargs.assert_called_once_with(use_cache=False)
+    
+    def test_generate_dealer_report_no_cache_warns_on_mysql(self, mock_container):
+        """Test that --no-cache warns when the selected repository has no response cache."""
+        mock_container.report_service.return_value.generate_dealer_report.return_value = '/tmp/report.html'
+        mock_container.report_repository_kind.return_value = 'mysql'
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['generate-dealer-report', '--no-cache'])
+        
+        assert result.exit_code == 0
+        assert '--no-cache has no effect unless REPORT_REPOSITORY=web' in result.stderr
+        mock_container.web_data_repository.add_kwargs.assert_not_called()
+    
     def test_publish_report_success(self, mock_container, tmp_path):
         """Test successful report publishing."""
         # Create a temporary file
@@ -167,3 +190,14 @@ class TestCLIIntegration:
             message=None,
             webhook_url=None
         )
+    
+    def test_refresh_rollup_closes_the_pool_on_failure(self, mock_container):
+        """Test that the pooled connections are closed when the refresh fails."""
+        mock_container.crawler_runs_rollup.return_value.refresh.side_effect = RuntimeError('deadlock')
+        
+        runner = CliRunner()
+        result = runner.invoke(cli, ['refresh-rollup'])
+        
+        assert result.exit_code != 0
+        assert 'Rollup refresh failed: deadlock' in result.output
+        mock_container.shutdown_resources.assert_called_once()
@@ -0,0 +1,124 @@
+"""Tests for pre-compressed report variants and their publication."""
+import gzip
+import os
+
+import pytest
+
+from cli.services.compression import (
+    configured_encodings, fresh_variants, split_encoding, variant_path, write_compressed_variants,
+)
+from cli.services.GcsPublisher import GcsPublisher
+from cli.services.StorageBackend import LocalDirectoryBackend
+
+
+@pytest.fixture
+def report(tmp_path):
+    path = tmp_path / 'report.html'
+    path.write_text('<html>' + '<tr><td>Carrefour</td></tr>' * 500 + '</html>', encoding='utf-8')
+    return path
+
+
+class TestCompressedVariants:
+    """Test gzip/brotli variants written next to a report."""
+
+    def test_gzip_variant_is_reproducible(self, report):
+        first = write_compressed_variants(report, ['gzip'])['gzip'].read_bytes()
+        second = write_compressed_variants(report, ['gzip'])['gzip'].read_bytes()
+
+        assert first == second
+        assert gzip.decompress(first) == report.read_bytes()
+        assert len(first) * 5 < report.stat().st_size
+
+    def test_brotli_variant(self, report):
+        brotli = pytest.importorskip('brotli')
+
+        variant = write_compressed_variants(report, ['br'])['br']
+
+        assert variant.name == 'report.html.br'
+        assert brotli.decompress(variant.read_bytes()) == report.read_bytes()
+
+    def test_configured_encodings(self, monkeypatch):
+        monkeypatch.delenv('REPORT_PRECOMPRESS', raising=False)
+        assert configured_encodings() == ('gzip',)
+
+        monkeypatch.setenv('REPORT_PRECOMPRESS', 'none')
+        assert configured_encodings() == ()
+
+        monkeypatch.setenv('REPORT_PRECOMPRESS', 'gzip,zstd,gzip')
+        assert configured_encodings() == ('gzip',)
+
+    def test_split_encoding(self, tmp_path):
+        assert split_encoding(tmp_path / 'report.html.gz') == (tmp_path / 'report.html', 'gzip')
+        assert split_encoding(tmp_path / 'report.html.br') == (tmp_path / 'report.html', 'br')
+        assert split_encoding(tmp_path / 'history.tar.gz') == (tmp_path / 'history.tar.gz', None)
+        assert split_encoding(tmp_path / 'report.html') == (tmp_path / 'report.html', None)
+
+    def test_stale_variants_are_ignored(self, report):
+        write_compressed_variants(report, ['gzip'])
+        assert set(fresh_variants(report)) == {'gzip'}
+
+        stat = variant_path(report, 'gzip').stat()
+        os.utime(report, (stat.st_atime, stat.st_mtime + 10))
+
+        assert fresh_variants(report) == {}
+
+
+class TestPublishCompressed:
+    """Test Content-Encoding and Cache-Control metadata on upload."""
+
+    @pytest.fixture
+    def backend(self, tmp_path):
+        return LocalDirectoryBackend(str(tmp_path / 'gcs'))
+
+    @pytest.fixture
+    def publisher(self, backend):
+        return GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend,
+                            cache_control='public, max-age=3600', latest_cache_control='no-cache')
+
+    def test_gzip_variant_is_uploaded(self, publisher, backend, report):
+        write_compressed_variants(report, ['gzip'])
+
+        publisher.upload(str(report), 'reports/report.html')
+
+        blob = backend.bucket('bucket').get_blob('reports/report.html')
+        assert blob.content_encoding == 'gzip'
+        assert blob.content_type == 'text/html'
+        assert blob.cache_control == 'public, max-age=3600'
+        assert gzip.decompress(blob.path.read_bytes()) == report.read_bytes()
+
+    def test_plain_upload_without_variant(self, publisher, backend, report):
+        publisher.upload(str(report), 'reports/report.html')
+
+        blob = backend.bucket('bucket').get_blob('reports/report.html')
+        assert blob.content_encoding is None
+        assert blob.path.read_bytes() == report.read_bytes()
+
+    def test_latest_copy_is_not_cached(self, publisher, backend, report):
+        write_compressed_variants(report, ['gzip'])
+
+        publisher.upload_and_set_latest(str(report), 'reports/report.html', 'reports/latest.html')
+
+        latest = backend.bucket('bucket').get_blob('reports/latest.html')
+        assert latest.cache_control == 'no-cache'
+        assert latest.content_encoding == 'gzip'
+        assert backend.bucket('bucket').get_blob('reports/report.html').cache_control == 'public, max-age=3600'
+
+
+class TestLatestReportCopy:
+    """Test that the latest report copy carries its compressed variants."""
+
+    def test_variants_are_copied(self, tmp_path):
+        from update_index_link import update_last_report_symlink
+
+        report = tmp_path / 'last_day_history_live_report_20240101_093000.html'
+        report.write_text('<html>new</html>', encoding='utf-8')
+        write_compressed_variants(report, ['gzip'])
+        stale = tmp_path / 'last_day_history_live_report.html.br'
+        stale.write_bytes(b'old')
+
+        assert update_last_report_symlink(report.name, reports_dir=str(tmp_path))
+
+        latest = tmp_path / 'last_day_history_live_report.html'
+        assert latest.read_text(encoding='utf-8') == '<html>new</html>'
+        assert gzip.decompress((tmp_path / 'last_day_history_live_report.html.gz').read_bytes()) == b'<html>new</html>'
+        assert not stale.exists()
@@ -0,0 +1,169 @@
+"""Tests for the pooled MySQL connections."""
+import threading
+from unittest.mock import MagicMock, Mock
+
+import pymysql
+import pytest
+
+from cli.db.connection import ConnectionPool
+
+
+@pytest.fixture
+def factory():
+    """DatabaseConnection returning a new mock connection on each call."""
+    factory = Mock()
+    factory.create_connection.side_effect = lambda: MagicMock(open=True)
+    return factory
+
+
+class TestConnectionPool:
+    """Test checkout, reuse, health checks and eviction."""
+
+    def test_min_size_connections_are_opened(self, factory):
+        pool = ConnectionPool(factory, min_size=2, max_size=4)
+
+        assert factory.create_connection.call_count == 2
+        assert pool.size == 2
+        assert pool.idle == 2
+
+    def test_connection_is_reused_and_pinged(self, factory):
+        pool = ConnectionPool(factory, min_size=0, max_size=2)
+
+        with pool.connection() as first:
+            assert pool.idle == 0
+        with pool.connection() as second:
+            pass
+
+        assert first is second
+        assert factory.create_connection.call_count == 1
+        second.ping.assert_called_with(reconnect=True)
+        assert pool.size == 1
+        assert pool.idle == 1
+
+    def test_broken_connection_is_replaced(self, factory):
+        pool = ConnectionPool(factory, min_size=1, max_size=1)
+        with pool.connection() as broken:
+            broken.ping.side_effect = pymysql.err.OperationalError(2013, 'Lost connection')
+
+        with pool.connection() as connection:
+            assert connection is not broken
+
+        broken.close.assert_called_once()
+        assert pool.size == 1
+
+    def test_closed_connection_is_not_returned(self, factory):
+        pool = ConnectionPool(factory, min_size=0, max_size=2)
+
+        with pool.connection() as connection:
+            connection.open = False
+
+        assert pool.size == 0
+        assert pool.idle == 0
+
+    def test_idle_connections_are_evicted(self, factory):
+        pool = ConnectionPool(factory, min_size=1, max_size=3, max_idle_seconds=0)
+        with pool.connection():
+            with pool.connection():
+                with pool.connection():
+                    pass
+        assert pool.size == 3
+
+        with pool.connection():
+            pass
+
+        assert pool.size == 1
+
+    def test_checkout_waits_for_a_free_connection(self, factory):
+        pool = ConnectionPool(factory, min_size=0, max_size=1, timeout=5)
+        checked_out = threading.Event()
+
+        def worker():
+            with pool.connection():
+                checked_out.set()
+
+        with pool.connection() as connection:
+            thread = threading.Thread(target=worker)
+            thread.start()
+            assert not checked_out.wait(0.1)
+        thread.join(5)
+
+        assert checked_out.is_set()
+        assert factory.create_connection.call_count == 1
+        connection.ping.assert_called_with(reconnect=True)
+
+    def test_checkout_timeout(self, factory):
+        pool = ConnectionPool(factory, min_size=0, max_size=1, timeout=0.05)
+
+        with pool.connection():
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+
+    def test_failed_connect_frees_its_slot(self, factory):
+        pool = ConnectionPool(factory, min_size=0, max_size=1)
+        factory.create_connection.side_effect = pymysql.err.OperationalError(2003, "Can't connect")
+
+        with pytest.raises(pymysql.err.OperationalError):
+            with pool.connection():
+                pass
+
+        assert pool.size == 0
+
+    def test_cursor_checks_out_a_connection(self, factory):
+        pool = ConnectionPool(factory, min_size=1, max_size=1)
+
+        with pool.cursor() as cursor:
+            assert pool.idle == 0
+
+        assert pool.idle == 1
+        assert cursor is not None
+
+    def test_close(self, factory):
+        pool = ConnectionPool(factory, min_size=2, max_size=2)
+        idle = [connection for connection, _ in pool._idle]
+
+        pool.close()
+
+        for connection in idle:
+            connection.close.assert_called_once()
+        with pytest.raises(RuntimeError):
+            with pool.connection():
+                pass
+
+    def test_invalid_sizes(self, factory):
+        with pytest.raises(ValueError):
+            ConnectionPool(factory, min_size=3, max_size=2)
+
+
+class TestContainerPool:
+    """Test the pool wiring in the dependency injection container."""
+
+    def test_pool_is_shared_and_closed_on_shutdown(self, factory):
+        from dependency_injector import providers
+        from cli.ioc import Container
+
+        container = Container()
+        container.database_connection.override(providers.Object(factory))
+
+        repository = container.incident_repository()
+
+        assert isinstance(repository.connection, ConnectionPool)
+        assert container.db_pool() is repository.connection
+
+        container.shutdown_resources()
+
+        with pytest.raises(RuntimeError):
+            with repository.connection.connection():
+                pass
+
+    def test_report_service_reads_mysql_by_default(self, factory, monkeypatch, tmp_path):
+        from dependency_injector import providers
+        from cli.ioc import Container
+
+        monkeypatch.chdir(tmp_path)
+        container = Container()
+        container.database_connection.override(providers.Object(factory))
+
+        assert container.report_service().repository is container.incident_repository()
+
+        container.shutdown_resources()
@@ -0,0 +1,226 @@
+"""Tests for batch publishing with GcsPublisher."""
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+from google.auth.exceptions import DefaultCredentialsError, RefreshError
+
+from cli.services.assets import IMMUTABLE_CACHE_CONTROL
+from cli.services.GcsPublisher import GcsPublisher
+from cli.services.StorageBackend import GcsBackend, LocalDirectoryBackend, StorageBackend, create_backend
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+    reports = tmp_path / 'reports'
+    (reports / 'history').mkdir(parents=True)
+    (reports / 'a.html').write_text('<html>a</html>', encoding='utf-8')
+    (reports / 'b.csv').write_text('x,y\n1,2\n', encoding='utf-8')
+    (reports / 'history' / 'day.json.gz').write_bytes(b'\x1f\x8b archive')
+    (reports / 'notes.txt').write_text('ignored', encoding='utf-8')
+    return reports
+
+
+@pytest.fixture
+def backend(tmp_path):
+    return LocalDirectoryBackend(str(tmp_path / 'gcs'))
+
+
+@pytest.fixture
+def publisher(backend):
+    return GcsPublisher(default_bucket='bucket', gcp_project='project', max_workers=4, backend=backend)
+
+
+class TestPublishBatch:
+    """Test concurrent, resumable batch uploads."""
+
+    def test_directory_upload(self, publisher, backend, reports_dir, tmp_path):
+        """Test that matching files are uploaded under the prefix with their relative path."""
+        results = publisher.publish_batch(str(reports_dir), 'reports/2024/01/01')
+
+        assert [(r.gs_url, r.status) for r in results] == [
+            (backend.url('bucket', 'reports/2024/01/01/a.html'), 'uploaded'),
+            (backend.url('bucket', 'reports/2024/01/01/b.csv'), 'uploaded'),
+            (backend.url('bucket', 'reports/2024/01/01/history/day.json.gz'), 'uploaded'),
+        ]
+        assert (tmp_path / 'gcs' / 'bucket' / 'reports/2024/01/01/a.html').read_text() == '<html>a</html>'
+        assert backend.bucket('bucket').get_blob('reports/2024/01/01/a.html').content_type == 'text/html'
+
+    def test_unchanged_files_are_skipped(self, publisher, reports_dir):
+        """Test that a second run only uploads the files that changed."""
+        publisher.publish_batch(str(reports_dir), 'daily')
+        (reports_dir / 'b.csv').write_text('x,y\n3,4\n', encoding='utf-8')
+
+        results = publisher.publish_batch(str(reports_dir), 'daily')
+
+        assert {Path(r.src_path).name: r.status for r in results} == {
+            'a.html': 'skipped', 'b.csv': 'uploaded', 'day.json.gz': 'skipped'
+        }
+
+    def test_force_upload(self, publisher, reports_dir):
+        """Test that skip_unchanged=False uploads every file again."""
+        publisher.publish_batch(str(reports_dir), 'daily')
+
+        results = publisher.publish_batch(str(reports_dir), 'daily', skip_unchanged=False)
+
+        assert {r.status for r in results} == {'uploaded'}
+
+    def test_glob_source(self, publisher, backend, reports_dir):
+        """Test that glob matches are named relative to the fixed part of the pattern."""
+        results = publisher.publish_batch(str(reports_dir / '**' / '*.gz'), 'archives')
+
+        assert [r.gs_url for r in results] == [backend.url('bucket', 'archives/history/day.json.gz')]
+
+    def test_large_files_use_chunked_uploads(self, tmp_path):
+        """Test that files above the chunk size are uploaded with a chunk size."""
+        bucket = Mock()
+        backend = Mock(**{'bucket.return_value': bucket, 'url.return_value': 'gs://bucket/daily/big.html'})
+        bucket.get_blob.return_value = None
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend)
+        publisher.chunk_size = 256 * 1024
+        big = tmp_path / 'big.html'
+        big.write_bytes(b'x' * (publisher.chunk_size + 1))
+        small = tmp_path / 'small.html'
+        small.write_bytes(b'x')
+
+        publisher.publish_batch(str(big), 'daily')
+        publisher.publish_batch(str(small), 'daily')
+
+        assert bucket.blob.call_args_list[0].args == ('daily/big.html',)
+        assert bucket.blob.call_args_list[0].kwargs == {'chunk_size': 256 * 1024}
+        assert bucket.blob.call_args_list[1].kwargs == {'chunk_size': None}
+
+    def test_hashed_assets_are_cached_forever(self, publisher, backend, reports_dir):
+        """Test that content-hashed assets are uploaded with an immutable Cache-Control."""
+        (reports_dir / 'assets').mkdir()
+        (reports_dir / 'assets' / 'live_report.0123456789.css').write_text('body{}', encoding='utf-8')
+
+        publisher.publish_batch(str(reports_dir), 'daily')
+
+        bucket = backend.bucket('bucket')
+        assert bucket.get_blob('daily/assets/live_report.0123456789.css').cache_control == IMMUTABLE_CACHE_CONTROL
+        assert bucket.get_blob('daily/assets/live_report.0123456789.css').content_type == 'text/css'
+        assert bucket.get_blob('daily/a.html').cache_control == publisher.cache_control
+
+    def test_failures_are_reported(self, publisher, reports_dir, mocker):
+        """Test that one failing upload does not stop the batch."""
+        original = publisher._upload_file
+
+        def upload(bucket, src_file, dst_blob):
+            if src_file.suffix == '.csv':
+                raise IOError('connection reset')
+            return original(bucket, src_file, dst_blob)
+
+        mocker.patch.object(publisher, '_upload_file', side_effect=upload)
+
+        results = publisher.publish_batch(str(reports_dir), 'daily')
+
+        statuses = {Path(r.src_path).name: (r.status, r.error) for r in results}
+        assert statuses['b.csv'] == ('failed', 'connection reset')
+        assert statuses['a.html'] == ('uploaded', None)
+
+    def test_dry_run_without_credentials(self, reports_dir):
+        """Test that no upload is attempted without a client."""
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project')
+        publisher._credentials_available = False
+
+        results = publisher.publish_batch(str(reports_dir), 'daily')
+
+        assert {r.status for r in results} == {'dry-run'}
+        assert len(results) == 3
+
+    def test_chunk_size_is_rounded(self):
+        """Test that the chunk size is a multiple of 256 KiB."""
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', chunk_size=1_000_000)
+
+        assert publisher.chunk_size == 3 * 256 * 1024
+
+
+class TestLazyCredentials:
+    """Test that credentials are validated by the first real operation."""
+
+    def test_no_probe_before_upload(self, tmp_path):
+        """Test that publishing only performs the upload itself."""
+        bucket = Mock()
+        backend = Mock(**{'bucket.return_value': bucket, 'url.return_value': 'gs://bucket/a.html'})
+        src = tmp_path / 'a.html'
+        src.write_text('<html>', encoding='utf-8')
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend)
+
+        assert publisher.upload(str(src), 'a.html') == 'gs://bucket/a.html'
+
+        assert [call[0] for call in bucket.mock_calls] == ['blob', 'blob().upload_from_file']
+        assert publisher._credentials_available is True
+
+    def test_missing_default_credentials_switch_to_dry_run(self, tmp_path):
+        """Test that a client that cannot be created leads to a dry run."""
+        backend = Mock(**{'url.return_value': 'gs://bucket/a.html'})
+        backend.bucket.side_effect = DefaultCredentialsError('no credentials')
+        src = tmp_path / 'a.html'
+        src.write_text('<html>', encoding='utf-8')
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend)
+
+        assert publisher.upload(str(src), 'a.html') == 'gs://bucket/a.html'
+        assert publisher.update_latest('a.html', 'latest.html') == 'gs://bucket/a.html'
+
+        assert publisher._credentials_available is False
+        backend.bucket.assert_called_once()
+
+    def test_rejected_credentials_on_first_upload(self, reports_dir):
+        """Test that a credential error on the first upload turns the batch into a dry run."""
+        bucket = Mock()
+        bucket.get_blob.side_effect = RefreshError('invalid_grant')
+        backend = Mock(**{'bucket.return_value': bucket, 'url.return_value': 'gs://bucket/x'})
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend)
+
+        results = publisher.publish_batch(str(reports_dir), 'daily')
+
+        assert [r.status for r in results] == ['dry-run'] * 3
+        bucket.get_blob.assert_called_once()
+        bucket.blob.assert_not_called()
+
+    def test_errors_after_validation_are_raised(self, tmp_path):
+        """Test that later failures are real errors, not dry runs."""
+        bucket = Mock()
+        backend = Mock(**{'bucket.return_value': bucket, 'url.return_value': 'gs://bucket/a.html'})
+        src = tmp_path / 'a.html'
+        src.write_text('<html>', encoding='utf-8')
+        publisher = GcsPublisher(default_bucket='bucket', gcp_project='project', backend=backend)
+        publisher.upload(str(src), 'a.html')
+        bucket.copy_blob.side_effect = RefreshError('expired')
+
+        with pytest.raises(RefreshError):
+            publisher.update_latest('a.html', 'latest.html')
+
+
+class TestStorageBackends:
+    """Test backend selection and the local directory backend."""
+
+    def test_create_backend(self, tmp_path, monkeypatch):
+        monkeypatch.setenv('DEALER_REPORT_CACHE_DIR', str(tmp_path))
+
+        assert isinstance(create_backend('gcs', 'project'), GcsBackend)
+        local = create_backend('local', 'project')
+        assert isinstance(local, LocalDirectoryBackend)
+        assert local.root == tmp_path / 'gcs'
+        with pytest.raises(ValueError):
+            create_backend('s3', 'project')
+
+    def test_incomplete_backend_fails_on_creation(self):
+        class BucketOnlyBackend(StorageBackend):
+            def bucket(self, bucket_name):
+                return None
+
+        with pytest.raises(TypeError):
+            BucketOnlyBackend()
+
+    def test_local_upload_and_latest_copy(self, publisher, backend, tmp_path):
+        src = tmp_path / 'report.html'
+        src.write_text('<html>report</html>', encoding='utf-8')
+
+        publisher.upload_and_set_latest(str(src), 'reports/report.html', 'reports/latest.html')
+
+        latest = backend.bucket('bucket').get_blob('reports/latest.html')
+        assert latest.path.read_text(encoding='utf-8') == '<html>report</html>'
+        assert latest.content_type == 'text/html'
+        assert latest.md5_hash == backend.bucket('bucket').get_blob('reports/report.html').md5_hash
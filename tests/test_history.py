@@ -0,0 +1,35 @@
+"""Unit tests for the typed history decoder."""
+import numpy as np
+
+from cli.services.history import decode_histories, history_to_json, iter_with_history
+
+
+class TestHistoryDecoder:
+    """Test decoding of the overview day0..dayN cells."""
+
+    def test_all_cell_forms_are_decoded(self):
+        """Test native dicts, JSON strings, Python repr strings and missing days."""
+        records = [
+            {'day0': {'progress': 12.58, 'successPercent': 93, 'successCount': 40, 'failedCount': 3},
+             'day1': '{"progress": 48.21, "successPercent": null}',
+             'day2': "{'progress': '', 'successPercent': 75.5, 'name': \"L'Atelier\"}"},
+            {'day0': 'not a dict', 'day2': None},
+        ]
+
+        table = decode_histories(records, days=3)
+
+        assert table.progress.shape == (2, 3)
+        np.testing.assert_array_equal(table.progress[0], [12.58, 48.21, np.nan])
+        np.testing.assert_array_equal(table.success_percent[0], [93, np.nan, 75.5])
+        assert table.success_count[0, 0] == 40 and table.failed_count[0, 0] == 3
+        assert np.isnan(table.progress[1]).all()
+
+    def test_iter_with_history_consumes_generator_in_chunks(self):
+        """Test that each record gets its own history across chunk boundaries."""
+        records = ({'id': i, 'day0': f"{{'progress': {i}}}"} for i in range(5))
+
+        pairs = list(iter_with_history(records, days=2, chunk_size=2))
+
+        assert [record['id'] for record, _ in pairs] == [0, 1, 2, 3, 4]
+        assert [history.progress[0] for _, history in pairs] == [0, 1, 2, 3, 4]
+        assert history_to_json(pairs[3][1].progress) == '[3, null]'
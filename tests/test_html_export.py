@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from cli.services.html_export import HTMLExporter
+
+
+RECORDS = [
+    {'domainDealerName': 'Carrefour', 'storeCount': 100, 'storeInDeltaCount': 96,
+     'storeFailedCount': 1, 'successCount': 90},
+    {'domainDealerName': 'Lidl', 'storeCount': 0, 'crawlProgress': 97, 'crawlSuccessProgress': 80},
+    {'domainDealerName': 'Auchan', 'storeCount': 100, 'storeInDeltaCount': 50, 'successCount': None,
+     'crawlProgress': None},
+    {'domainDealerName': None, 'storeCount': 10},
+]
+
+
+class TestHTMLExporterColumns:
+    """Test the columnar metrics of HTMLExporter."""
+
+    def test_compute_metrics(self):
+        """Test rate fallbacks, statuses and sort keys for a whole chunk."""
+        metrics = HTMLExporter()._compute_metrics(RECORDS)
+
+        np.testing.assert_allclose(metrics['crawling_rate'], [96.0, 97.0, 50.0, 0.0])
+        np.testing.assert_allclose(metrics['content_rate'], [90.0 / 96 * 100, 80.0, 0.0, 0.0])
+        assert metrics['final_status'].tolist() == ['success', 'warning', 'error', 'error']
+        assert metrics['sort_order'].tolist() == [1, 2, 3, 3]
+        assert metrics['named'].tolist() == [True, True, True, False]
+        assert metrics['storeCount'].tolist() == [100, 0, 100, 10]
+
+    def test_rows_are_sorted_by_status(self, tmp_path):
+        """Test that rows are written success first and that totals include unnamed rows."""
+        html = (tmp_path / 'report.html')
+        HTMLExporter().generate_html_report(list(reversed(RECORDS)), str(html))
+
+        content = html.read_text(encoding='utf-8')
+        assert content.index('Carrefour') < content.index('Lidl') < content.index('Auchan')
+        assert '<div class="stat-value">210</div>' in content
+
+    def test_dataframe_input(self, tmp_path):
+        """Test that a pandas DataFrame is accepted when pandas is installed."""
+        pd = pytest.importorskip('pandas')
+        html = (tmp_path / 'report.html')
+
+        HTMLExporter().generate_html_report(pd.DataFrame(RECORDS), str(html))
+
+        content = html.read_text(encoding='utf-8')
+        assert content.count('<tr class="status-') == 3
+        assert '<div class="stat-value">210</div>' in content
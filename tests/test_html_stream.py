@@ -0,0 +1,70 @@
+"""Unit tests for the streaming HTML writers."""
+import gzip
+
+import pytest
+
+from cli.services.html_export import HTMLExporter
+from cli.services.html_stream import RowSpool, open_html_output
+
+
+class TestRowSpool:
+    """Test spooled, status-grouped rows."""
+
+    def test_rows_are_replayed_in_bucket_order(self):
+        """Test bucket ordering, stable order within a bucket and counters."""
+        with RowSpool(('error', 'success'), max_memory=16) as spool:
+            spool.add('success', '<tr>s1</tr>')
+            spool.add('error', '<tr>e1</tr>')
+            spool.add('success', '<tr>s2</tr>')
+            spool.add('unknown', '<tr>u1</tr>')
+
+            assert ''.join(spool.iter_fragments()) == '<tr>e1</tr><tr>s1</tr><tr>s2</tr><tr>u1</tr>'
+            assert spool.counts == {'error': 1, 'success': 2, 'unknown': 1}
+            assert len(spool) == 4
+
+
+class TestOpenHtmlOutput:
+    """Test buffered/gzip output files."""
+
+    def test_gzip_output_from_suffix(self, tmp_path):
+        """Test that a .gz path is written as a gzip stream."""
+        path = tmp_path / 'report.html.gz'
+        with open_html_output(path) as f:
+            f.write('<html>é</html>')
+
+        assert gzip.decompress(path.read_bytes()).decode('utf-8') == '<html>é</html>'
+
+    def test_failed_render_keeps_previous_file(self, tmp_path):
+        """Test that an exception while rendering leaves the old report untouched."""
+        path = tmp_path / 'report.html'
+        path.write_text('previous', encoding='utf-8')
+
+        with pytest.raises(RuntimeError):
+            with open_html_output(path) as f:
+                f.write('<html>')
+                raise RuntimeError('boom')
+
+        assert path.read_text(encoding='utf-8') == 'previous'
+        assert list(tmp_path.iterdir()) == [path]
+
+
+class TestHTMLExporterStreaming:
+    """Test HTMLExporter fed by a generator."""
+
+    def test_generate_html_report_from_generator(self, tmp_path):
+        """Test totals, row order and escaping without materialising the records."""
+        records = [
+            {'domainDealerName': 'Carrefour', 'domainDealerId': 1, 'storeCount': 100,
+             'storeInDeltaCount': 96, 'storeFailedCount': 1, 'successCount': 90},
+            {'domainDealerName': 'Lidl <Drive>', 'domainDealerId': 2, 'storeCount': 100,
+             'storeInDeltaCount': 50, 'storeFailedCount': 5, 'successCount': 10},
+            {'domainDealerName': '', 'storeCount': 10},
+        ]
+        path = HTMLExporter().generate_html_report((r for r in records), str(tmp_path / 'report.html'))
+
+        html = (tmp_path / 'report.html').read_text(encoding='utf-8')
+        assert path == str(tmp_path / 'report.html')
+        assert '<div class="stat-value">210</div>' in html
+        assert html.index('Carrefour') < html.index('Lidl &lt;Drive&gt;')
+        assert html.count('<tr class="status-') == 2
+        assert 'function toggleFilter' in html
@@ -0,0 +1,48 @@
+"""Tests for the atomic latest-report pointer."""
+import os
+
+from update_index_link import replace_with_link, update_last_report_symlink
+
+
+class TestLatestReportPointer:
+    """Test that last_day_history_live_report.html is swapped atomically without copying."""
+
+    def test_latest_is_a_hard_link(self, tmp_path):
+        report = tmp_path / 'last_day_history_live_report_20240101_093000.html'
+        report.write_text('<html>new</html>', encoding='utf-8')
+        latest = tmp_path / 'last_day_history_live_report.html'
+        latest.write_text('<html>old</html>', encoding='utf-8')
+
+        assert update_last_report_symlink(report.name, reports_dir=str(tmp_path))
+
+        assert os.path.samefile(report, latest)
+        assert latest.read_text(encoding='utf-8') == '<html>new</html>'
+        assert sorted(p.name for p in tmp_path.iterdir()) == sorted([report.name, latest.name])
+
+    def test_copy_when_links_are_not_supported(self, tmp_path, mocker):
+        mocker.patch('update_index_link.os.link', side_effect=OSError('not supported'))
+        report = tmp_path / 'report.html'
+        report.write_text('<html>new</html>', encoding='utf-8')
+        latest = tmp_path / 'latest.html'
+
+        assert replace_with_link(report, latest) is False
+
+        assert not os.path.samefile(report, latest)
+        assert latest.read_text(encoding='utf-8') == '<html>new</html>'
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_target_is_replaced_not_written(self, tmp_path):
+        """Test that a reader holding the previous latest file keeps reading it unchanged."""
+        old = tmp_path / 'old.html'
+        old.write_text('<html>old</html>', encoding='utf-8')
+        new = tmp_path / 'new.html'
+        new.write_text('<html>new</html>', encoding='utf-8')
+        latest = tmp_path / 'latest.html'
+        replace_with_link(old, latest)
+
+        with open(latest, encoding='utf-8') as reader:
+            replace_with_link(new, latest)
+            assert reader.read() == '<html>old</html>'
+
+        assert old.read_text(encoding='utf-8') == '<html>old</html>'
+        assert latest.read_text(encoding='utf-8') == '<html>new</html>'
@@ -0,0 +1,112 @@
+"""Unit tests for the template-based live report rendering."""
+import gzip
+
+import pytest
+
+from cli.services.assets import hashed_name, is_hashed_asset, publish_asset
+from cli.services.html_stream import load_static
+from cli.services.live_report import get_environment, render_live_report
+
+
+@pytest.fixture
+def report_context():
+    return {
+        'current_time': '01/01/2024 à 09:30',
+        'logo': '',
+        'data_source': 'API',
+        'source_label': 'API SpiderVision',
+    }
+
+
+def _row(name, progress=95.0, success=97.0, status='Succès'):
+    return {
+        'name': name, 'global_status': status, 'progress_status': 'Succès', 'success_status': 'Succès',
+        'global_class': 'success', 'status_class': 'success', 'progress_class': 'success', 'success_class': 'success',
+        'progress': progress, 'success': success, 'progress_width': min(progress, 100),
+        'success_width': min(success, 100), 'success_color': '#10b981',
+        'progress_label': f"{progress:.1f}%", 'success_label': f"{success:.1f}%", 'history_json': '[13, null, 48]',
+    }
+
+
+class TestLiveReport:
+    """Test the live report template."""
+
+    def test_rows_are_streamed_from_a_generator(self, tmp_path, report_context):
+        """Test that rows come from an iterator and retailer names are escaped."""
+        path = tmp_path / 'report.html'
+        rows = (_row(name) for name in ['Carrefour', 'Auchan <Drive>'])
+
+        render_live_report(str(path), rows, **report_context)
+
+        html = path.read_text(encoding='utf-8')
+        assert html.count('class="mini-details-row hidden"') == 2
+        assert 'Auchan &lt;Drive&gt;' in html
+        assert "data-history='[13, null, 48]'" in html
+        assert 'Tous (2)' in html
+        assert html.rstrip().endswith('</html>')
+
+    def test_rows_are_grouped_by_status_and_counted(self, tmp_path, report_context):
+        """Test that errors come first and the filter counters match the rows."""
+        path = tmp_path / 'report.html.gz'
+        rows = [_row('Auchan'), _row('Lidl', status='Erreur!'), _row('Casino', status='Erreur')]
+
+        render_live_report(str(path), iter(rows), **report_context)
+
+        html = gzip.decompress(path.read_bytes()).decode('utf-8')
+        assert html.index('Casino') < html.index('Lidl') < html.index('Auchan')
+        assert 'Erreur! (1)' in html and 'Succès (1)' in html and 'Tous (3)' in html
+
+    def test_zero_progress_uses_empty_bar(self, tmp_path, report_context):
+        """Test the zero-value bar variant."""
+        path = tmp_path / 'report.html'
+        render_live_report(str(path), [_row('Lidl', progress=0.0)], **report_context)
+
+        assert '<div class="progress-fill-zero">0.0%</div>' in path.read_text(encoding='utf-8')
+
+    def test_static_assets_and_environment_are_loaded_once(self):
+        """Test that CSS/JS and the Jinja2 environment are reused across renders."""
+        assert load_static('live_report.css') is load_static('live_report.css')
+        assert 'function filterTable' in load_static('live_report.js')
+        assert get_environment() is get_environment()
+
+
+class TestReportAssets:
+    """Test content-hashed assets shared by the reports of a directory."""
+
+    def test_reports_reference_shared_assets(self, tmp_path, report_context):
+        """Test that CSS/JS are written once under assets/ and linked by every report."""
+        render_live_report(str(tmp_path / 'a.html'), [_row('Auchan')], inline=False, **report_context)
+        render_live_report(str(tmp_path / 'b.html'), [_row('Lidl')], inline=False, **report_context)
+
+        css = hashed_name('live_report.css', load_static('live_report.css').encode('utf-8'))
+        js = hashed_name('live_report.js', load_static('live_report.js').encode('utf-8'))
+        assert sorted(p.name for p in (tmp_path / 'assets').iterdir()) == sorted([css, js])
+        for name in ('a.html', 'b.html'):
+            html = (tmp_path / name).read_text(encoding='utf-8')
+            assert f'<link rel="stylesheet" href="assets/{css}">' in html
+            assert f'<script src="assets/{js}"></script>' in html
+            assert 'function filterTable' not in html
+
+    def test_inline_mode_is_self_contained(self, tmp_path, report_context, monkeypatch):
+        """Test that REPORT_ASSETS=inline embeds CSS/JS and writes no asset."""
+        monkeypatch.setenv('REPORT_ASSETS', 'inline')
+        path = tmp_path / 'report.html'
+
+        render_live_report(str(path), [_row('Auchan')], **report_context)
+
+        html = path.read_text(encoding='utf-8')
+        assert 'function filterTable' in html and '<style>' in html
+        assert 'assets/' not in html
+        assert not (tmp_path / 'assets').exists()
+
+    def test_asset_name_follows_content(self, tmp_path):
+        """Test that a changed asset gets a new name and the old version is kept."""
+        first = publish_asset(tmp_path, 'logo.png', b'v1')
+        second = publish_asset(tmp_path, 'logo.png', b'v2')
+
+        assert first != second and first.startswith('assets/logo.') and first.endswith('.png')
+        assert publish_asset(tmp_path, 'logo.png', b'v1') == first
+        assert (tmp_path / first).read_bytes() == b'v1'
+        assert (tmp_path / second).read_bytes() == b'v2'
+        assert is_hashed_asset(tmp_path / first)
+        assert not is_hashed_asset(tmp_path / 'logo.png')
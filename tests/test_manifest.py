@@ -0,0 +1,140 @@
+"""Tests for the report manifest and the index.html archive."""
+import json
+from datetime import datetime
+
+import pytest
+
+from cli.services.manifest import ARCHIVE_END, ARCHIVE_START, ReportManifest, read_report_stats
+from update_index_link import auto_update_index, get_latest_report
+
+HEADER = (
+    '<button class="filter-btn btn-all active" onclick="filterTable(\'all\', this)">Tous ({total})</button>'
+    '<button class="filter-btn btn-success" onclick="filterTable(\'success\', this)">Succès ({success})</button>'
+    '<button class="filter-btn btn-error-critical" onclick="filterTable(\'error-critical\', this)">Erreur! ({critical})</button>'
+)
+
+INDEX = (
+    '<a href="reports/old.html" class="btn">\n    📈 Voir le Dernier Rapport\n</a>\n'
+    f'{ARCHIVE_START}\n{ARCHIVE_END}\n'
+)
+
+
+def _write_report(reports_dir, stamp, success=3, critical=1):
+    path = reports_dir / f'last_day_history_live_report_{stamp}.html'
+    path.write_text(HEADER.format(total=success + critical, success=success, critical=critical), encoding='utf-8')
+    return path.name
+
+
+@pytest.fixture
+def reports_dir(tmp_path):
+    reports = tmp_path / 'reports'
+    reports.mkdir()
+    return reports
+
+
+class TestReportManifest:
+    """Test the manifest maintained as reports are written."""
+
+    def test_rebuild_reads_existing_reports(self, reports_dir):
+        """Test that a missing manifest is built once from the report headers."""
+        _write_report(reports_dir, '20240101_093000')
+        newest = _write_report(reports_dir, '20240102_093000', success=2, critical=5)
+
+        manifest = ReportManifest(reports_dir)
+        assert manifest.rebuild() == 2
+
+        latest = ReportManifest(reports_dir).latest()
+        assert latest.filename == newest
+        assert latest.generated_at == '2024-01-02T09:30:00'
+        assert (latest.total, latest.stats) == (7, {'Succès': 2, 'Erreur!': 5})
+
+    def test_add_does_not_rescan(self, reports_dir, mocker):
+        """Test that adding a report only reads the new file once the manifest exists."""
+        _write_report(reports_dir, '20240101_093000')
+        ReportManifest(reports_dir).rebuild()
+        name = _write_report(reports_dir, '20240102_093000')
+        glob = mocker.patch('pathlib.Path.glob')
+
+        manifest = ReportManifest(reports_dir)
+        manifest.add(name, datetime(2024, 1, 2, 9, 30), stats={'Succès': 4}, total=4)
+
+        glob.assert_not_called()
+        assert [entry.filename for entry in ReportManifest(reports_dir).entries()] == [
+            name, 'last_day_history_live_report_20240101_093000.html'
+        ]
+
+    def test_first_add_includes_existing_reports(self, reports_dir):
+        """Test that the first registered report does not hide the older ones."""
+        _write_report(reports_dir, '20240101_093000')
+        name = _write_report(reports_dir, '20240102_093000')
+
+        ReportManifest(reports_dir).add(name, stats={'Succès': 3}, total=3)
+
+        assert len(ReportManifest(reports_dir).entries()) == 2
+
+    def test_remove_and_prune_deleted_reports(self, reports_dir):
+        """Test that deleted reports leave the manifest (retention cleanup or manual deletion)."""
+        first = _write_report(reports_dir, '20240101_093000')
+        second = _write_report(reports_dir, '20240102_093000')
+        latest = _write_report(reports_dir, '20240103_093000')
+        ReportManifest(reports_dir).rebuild()
+
+        (reports_dir / first).unlink()
+        ReportManifest(reports_dir).remove(first)
+        (reports_dir / second).unlink()
+        manifest = ReportManifest(reports_dir)
+        assert manifest.prune() == 1
+
+        assert [entry.filename for entry in ReportManifest(reports_dir).entries()] == [latest]
+        assert manifest.prune() == 0
+
+    def test_read_report_stats(self, reports_dir):
+        path = reports_dir / _write_report(reports_dir, '20240101_093000', success=7, critical=0)
+
+        assert read_report_stats(path) == {'Tous': 7, 'Succès': 7, 'Erreur!': 0}
+
+
+class TestIndexArchive:
+    """Test index.html regeneration from the manifest."""
+
+    def test_index_lists_every_report(self, tmp_path, reports_dir, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'index.html').write_text(INDEX, encoding='utf-8')
+        _write_report(reports_dir, '20240101_093000')
+        latest = _write_report(reports_dir, '20240102_093000')
+
+        assert auto_update_index()
+
+        html = (tmp_path / 'index.html').read_text(encoding='utf-8')
+        assert f'<a href="reports/{latest}" class="btn">' in html
+        assert 'Archive des rapports (2)' in html
+        assert html.index('02/01/2024 09:30') < html.index('01/01/2024 09:30')
+        assert '<span class="badge badge-error-critical">Erreur! 1</span>' in html
+        assert get_latest_report('reports') == latest
+
+    def test_deleted_reports_leave_the_archive(self, tmp_path, reports_dir):
+        """Test that reports deleted outside the manifest are pruned when it is loaded."""
+        old = _write_report(reports_dir, '20240101_093000')
+        latest = _write_report(reports_dir, '20240102_093000')
+        ReportManifest(reports_dir).rebuild()
+        (reports_dir / latest).unlink()
+
+        assert get_latest_report(str(reports_dir)) == old
+
+
+class TestRetention:
+    """Test the retention cleanup of generate_new_report."""
+
+    def test_expired_reports_are_deleted_and_leave_the_manifest(self, reports_dir):
+        from generate_new_report import cleanup_old_reports
+
+        names = [_write_report(reports_dir, f'2024010{day}_093000') for day in range(1, 5)]
+        (reports_dir / f'{names[0]}.gz').write_bytes(b'gzip')
+        ReportManifest(reports_dir).rebuild()
+
+        assert cleanup_old_reports(str(reports_dir), max_reports=2) == names[:2]
+
+        assert sorted(path.name for path in reports_dir.glob('*.html*')) == names[2:]
+        stored = json.loads((reports_dir / 'manifest.json').read_text(encoding='utf-8'))
+        assert [entry['filename'] for entry in stored['reports']] == names[:1:-1]
+        assert stored['latest'] == names[-1]
@@ -0,0 +1,85 @@
+"""Tests for the local metrics history store."""
+from datetime import datetime
+
+import pytest
+from click.testing import CliRunner
+
+from cli.cli import cli
+from cli.repository.MetricsStore import MetricsStore
+
+
+def _retailer(name, progress, success=95.0):
+    return {'name': name, 'progress': progress, 'success': success, 'store_count': 10,
+            'success_count': 9, 'failed_count': 1, 'in_delta_count': 0, 'to_crawl_count': 2}
+
+
+@pytest.fixture
+def store(tmp_path):
+    with MetricsStore(str(tmp_path / 'metrics.sqlite')) as store:
+        yield store
+
+
+class TestMetricsStore:
+    """Test the append-only (dealer, run_at) metrics table."""
+
+    def test_runs_are_appended(self, store):
+        """Test that each run adds one row per dealer, ordered by time."""
+        store.record_run(datetime(2024, 1, 2, 9, 30), [_retailer('Auchan', 30.0), _retailer('Lidl', 10.0)])
+        store.record_run(datetime(2024, 1, 1, 9, 30), [_retailer('Auchan', 20.0)], source='API')
+
+        history = store.history('Auchan')
+
+        assert [(row['run_at'], row['progress']) for row in history] == [
+            ('2024-01-01T09:30:00', 20.0), ('2024-01-02T09:30:00', 30.0)
+        ]
+        assert history[0]['to_crawl_count'] == 2
+        assert [run['dealer_count'] for run in store.runs()] == [1, 2]
+
+    def test_recorded_runs_are_never_modified(self, store):
+        """Test that recording the same run twice keeps the first values."""
+        assert store.record_run('2024-01-01T09:30:00', [_retailer('Auchan', 20.0)]) == 1
+        assert store.record_run('2024-01-01T09:30:00', [_retailer('Auchan', 99.0)]) == 0
+
+        assert [row['progress'] for row in store.history('Auchan')] == [20.0]
+
+    def test_trend_queries(self, store):
+        """Test period filters, daily averages and the latest value of each dealer."""
+        store.record_run('2024-01-01T09:00:00', [_retailer('Auchan', 20.0), _retailer('Lidl', 50.0)])
+        store.record_run('2024-01-01T18:00:00', [_retailer('Auchan', 40.0)])
+        store.record_run('2024-03-01T09:00:00', [_retailer('Auchan', 60.0)])
+
+        assert len(store.history('Auchan', since='2024-02-01')) == 1
+        assert len(store.history('Auchan', until='2024-03-01')) == 2
+        assert [(row['day'], row['progress'], row['runs']) for row in store.daily_averages('Auchan')] == [
+            ('2024-01-01', 30.0, 2), ('2024-03-01', 60.0, 1)
+        ]
+        assert {row['dealer']: row['progress'] for row in store.latest()} == {'Auchan': 60.0, 'Lidl': 50.0}
+
+    def test_data_survives_reopening(self, tmp_path):
+        """Test that the history is persisted on disk."""
+        path = str(tmp_path / 'metrics.sqlite')
+        with MetricsStore(path) as store:
+            store.record_run('2024-01-01T09:00:00', [_retailer('Auchan', 20.0)])
+
+        with MetricsStore(path) as store:
+            assert store.latest()[0]['dealer'] == 'Auchan'
+
+
+class TestMetricsHistoryCommand:
+    """Test the metrics_history CLI command."""
+
+    def test_daily_trend(self, tmp_path):
+        path = tmp_path / 'metrics.sqlite'
+        with MetricsStore(str(path)) as store:
+            store.record_run(datetime.now(), [_retailer('Auchan', 42.0)])
+
+        result = CliRunner().invoke(cli, ['metrics-history', '--db', str(path), '--dealer', 'Auchan', '--daily'])
+
+        assert result.exit_code == 0
+        assert 'progress   42.0%' in result.output
+
+    def test_unknown_dealer(self, tmp_path):
+        result = CliRunner().invoke(cli, ['metrics-history', '--db', str(tmp_path / 'm.sqlite'), '--dealer', 'X'])
+
+        assert result.exit_code != 0
+        assert 'No metrics recorded for X' in result.output
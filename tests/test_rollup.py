@@ -0,0 +1,121 @@
+"""Tests for the incremental crawler_runs_daily rollup."""
+from unittest.mock import MagicMock
+
+import pytest
+
+from cli.repository.CrawlerRunsRollup import CrawlerRunsRollup
+
+
+@pytest.fixture
+def cursor():
+    return MagicMock()
+
+
+@pytest.fixture
+def connection(cursor):
+    connection = MagicMock()
+    connection.cursor.return_value.__enter__.return_value = cursor
+    return connection
+
+
+def _statements(cursor):
+    return [' '.join(call.args[0].split()) for call in cursor.execute.call_args_list]
+
+
+class TestCrawlerRunsRollup:
+    """Test the watermark-based refresh of the daily rollup."""
+
+    def test_refresh_processes_runs_after_the_watermark(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 100},
+            {'max_id': 180, 'first_pending_id': None},
+            {'run_count': 80},
+            {'last_processed_id': 180},
+            {'max_id': None, 'first_pending_id': None},
+        ]
+
+        assert CrawlerRunsRollup(connection).refresh() == 80
+
+        statements = _statements(cursor)
+        insert = next(call for call in cursor.execute.call_args_list if 'INSERT INTO crawler_runs_daily' in call.args[0])
+        assert 'ON DUPLICATE KEY UPDATE' in insert.args[0]
+        assert insert.args[1] == (100, 180)
+        update = next(call for call in cursor.execute.call_args_list if call.args[0].startswith('UPDATE rollup_watermarks'))
+        assert update.args[1] == (180, 'crawler_runs_daily')
+        assert sum('FOR UPDATE' in statement for statement in statements) == 2
+        assert connection.commit.call_count == 2
+        connection.rollback.assert_not_called()
+
+    def test_watermark_stops_before_pending_runs(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 100},
+            {'max_id': 180, 'first_pending_id': 150},
+            {'run_count': 49},
+            {'last_processed_id': 149},
+            {'max_id': 180, 'first_pending_id': 150},
+        ]
+
+        assert CrawlerRunsRollup(connection).refresh() == 49
+
+        insert = next(call for call in cursor.execute.call_args_list if 'INSERT INTO crawler_runs_daily' in call.args[0])
+        assert insert.args[1] == (100, 149)
+
+    def test_watermark_lags_recent_runs_and_skips_stale_pending_runs(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 100},
+            {'max_id': None, 'first_pending_id': None},
+        ]
+
+        assert CrawlerRunsRollup(connection, settle_minutes=15, stale_hours=6).refresh() == 0
+
+        bounds = next(call for call in cursor.execute.call_args_list if 'MAX(' in call.args[0])
+        sql = ' '.join(bounds.args[0].split())
+        assert 'MAX(CASE WHEN started_at <= NOW() - INTERVAL %s MINUTE THEN id END)' in sql
+        assert 'started_at > NOW() - INTERVAL %s HOUR' in sql
+        assert bounds.args[1] == (15, ('running', 'queued'), 6, 100)
+        assert not any('INSERT INTO crawler_runs_daily' in statement for statement in _statements(cursor))
+
+    def test_refresh_is_batched(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 0},
+            {'max_id': 25, 'first_pending_id': None},
+            {'run_count': 10},
+            {'last_processed_id': 10},
+            {'max_id': 25, 'first_pending_id': None},
+            {'run_count': 10},
+            {'last_processed_id': 20},
+            {'max_id': 25, 'first_pending_id': None},
+            {'run_count': 5},
+            {'last_processed_id': 25},
+            {'max_id': None, 'first_pending_id': None},
+        ]
+
+        assert CrawlerRunsRollup(connection, batch_size=10).refresh() == 25
+
+        inserts = [call.args[1] for call in cursor.execute.call_args_list if 'INSERT INTO crawler_runs_daily' in call.args[0]]
+        assert inserts == [(0, 10), (10, 20), (20, 25)]
+
+    def test_failed_batch_is_rolled_back(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 100},
+            {'max_id': 180, 'first_pending_id': None},
+        ]
+        cursor.execute.side_effect = [None, None, RuntimeError('deadlock')]
+
+        with pytest.raises(RuntimeError):
+            CrawlerRunsRollup(connection).refresh()
+
+        connection.rollback.assert_called_once()
+        connection.commit.assert_not_called()
+
+    def test_rebuild_resets_the_watermark(self, connection, cursor):
+        cursor.fetchone.side_effect = [
+            {'last_processed_id': 0},
+            {'max_id': None, 'first_pending_id': None},
+        ]
+
+        assert CrawlerRunsRollup(connection).rebuild() == 0
+
+        statements = _statements(cursor)
+        assert statements[0].startswith('INSERT INTO rollup_watermarks')
+        assert statements[1] == 'DELETE FROM crawler_runs_daily'
@@ -1,10 +1,12 @@
 """Unit tests for business logic and rules evaluation."""
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 from datetime import date, time
 from pathlib import Path
 import tempfile
+import csv
 import os
+import pymysql
 
 from cli.repository.IncidentRepository import IncidentRepository, RetailerRule
 from cli.services.ReportService import ReportService, ReportItem
@@ -103,6 +105,244 @@ class TestIncidentRepository:
         assert expected is None
 
 
+class TestIncidentRepositoryBulk:
+    """Test the set-based queries returning every retailer at once."""
+    
+    @pytest.fixture
+    def cursor(self):
+        return MagicMock()
+    
+    @pytest.fixture
+    def repo(self, cursor):
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+        return IncidentRepository(connection)
+    
+    def test_success_counters_bulk(self, repo, cursor):
+        """Test one GROUP BY query keyed by retailer."""
+        cursor.fetchall.return_value = [
+            {'retailer': 'Auchan', 'success_count': 8, 'total_count': 10},
+            {'retailer': 'Lidl', 'success_count': None, 'total_count': 3},
+        ]
+        
+        counters = repo.get_success_counters_bulk(date(2024, 1, 1), date(2024, 1, 7))
+        
+        assert counters == {'Auchan': (8, 10), 'Lidl': (0, 3)}
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args[0]
+        assert 'FROM crawler_runs_daily' in sql
+        assert 'GROUP BY retailer' in sql
+        assert params == (date(2024, 1, 1), date(2024, 1, 7)) * 2
+    
+    def test_success_counters_without_rollup(self, repo, cursor):
+        """Test the fallback to the raw runs when migration 002 is not applied."""
+        cursor.execute.side_effect = [
+            pymysql.err.ProgrammingError(1146, "Table 'analytics.crawler_runs_daily' doesn't exist"),
+            None,
+        ]
+        cursor.fetchall.return_value = [{'retailer': 'Auchan', 'success_count': 8, 'total_count': 10}]
+        
+        counters = repo.get_success_counters_bulk(date(2024, 1, 1), date(2024, 1, 7))
+        
+        assert counters == {'Auchan': (8, 10)}
+        assert not repo.use_rollup
+        assert repo.use_completed_time
+        sql, params = cursor.execute.call_args[0]
+        assert 'crawler_runs_daily' not in sql
+        assert params == (date(2024, 1, 1), date(2024, 1, 7))
+    
+    def test_progress_at_bulk(self, repo, cursor):
+        """Test that the plan, the run count fallback and missing totals match get_progress_at."""
+        cursor.fetchall.return_value = [
+            {'retailer': 'Auchan', 'expected_total': 5, 'total_count': 3, 'completed_count': 2},
+            {'retailer': 'Lidl', 'expected_total': None, 'total_count': 3, 'completed_count': 1},
+            {'retailer': 'Casino', 'expected_total': 4, 'total_count': 0, 'completed_count': 0},
+        ]
+        
+        progress = repo.get_progress_at_bulk(date(2024, 1, 1), time(9, 30))
+        
+        assert progress == {'Auchan': (2, 5), 'Lidl': (1, 3), 'Casino': (0, 4)}
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args[0]
+        assert 'LEFT JOIN runs_plan' in sql
+        assert sql.count('%s') == len(params)
+    
+    def test_retailer_filter(self, repo, cursor):
+        """Test that the optional retailer list becomes an IN clause."""
+        cursor.fetchall.return_value = []
+        
+        repo.get_progress_at_bulk(date(2024, 1, 1), time(9, 30), retailers=['Auchan', 'Lidl'])
+        
+        sql, params = cursor.execute.call_args[0]
+        assert sql.count('retailer IN (%s, %s)') == 3
+        assert sql.count('%s') == len(params)
+        assert params.count('Auchan') == 3
+    
+    def test_item_counters_bulk(self, repo, cursor):
+        """Test that item sums of every retailer come from one rollup query."""
+        cursor.fetchall.return_value = [
+            {'retailer': 'Auchan', 'total_items': 1000, 'ok_items': 400, 'ko_items': 600, 'run_count': 1},
+        ]
+        
+        counters = repo.get_item_counters_bulk(date(2024, 1, 1), date(2024, 1, 31), retailers=['Auchan'])
+        
+        assert counters == {'Auchan': {'total_items': 1000, 'ok_items': 400, 'ko_items': 600, 'run_count': 1}}
+        cursor.execute.assert_called_once()
+        sql, params = cursor.execute.call_args[0]
+        assert 'FROM crawler_runs_daily' in sql
+        assert 'SUM(ko_items)' in sql
+        assert sql.count('%s') == len(params)
+    
+    def test_report_service_issues_one_query_per_counter_type(self, repo, cursor):
+        """Test that ReportService reads success and progress counters of every retailer in bulk."""
+        retailers = ['Auchan', 'Lidl', 'Casino', 'Monoprix']
+        rules = [{'retailer_name': name, 'min_success_rate': 90.0, 'min_progress_0930': 10.0} for name in retailers]
+        
+        def fetchall():
+            sql = cursor.execute.call_args[0][0]
+            if 'LEFT JOIN runs_plan' in sql:
+                return [{'retailer': name, 'expected_total': 20, 'total_count': 20, 'completed_count': 1}
+                        for name in retailers]
+            return [{'retailer': name, 'success_count': 19, 'total_count': 20} for name in retailers]
+        cursor.fetchall.side_effect = fetchall
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            service = ReportService(repo, temp_dir, 'Europe/Paris', True, max_workers=4)
+            items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 7))
+        
+        assert {(item.rule_type, item.status) for item in items} == {
+            ('success_rate', 'success'), ('progress_0930', 'error')
+        }
+        assert len(items) == 2 * len(retailers)
+        # One success query and one progress query instead of one (or three) per retailer
+        assert cursor.execute.call_count == 2
+        cursor.fetchone.assert_not_called()
+        progress_sql, progress_params = cursor.execute.call_args_list[1][0]
+        assert 'LEFT JOIN runs_plan' in progress_sql
+        assert progress_params[0] == date(2024, 1, 7)
+    
+    def test_retailers_without_data_are_not_queried_one_by_one(self, repo, cursor):
+        """Test that bulk results cover every requested retailer, even without runs or plan."""
+        rules = [{'retailer_name': name, 'min_success_rate': 90.0, 'min_progress_0930': 10.0,
+                  'min_item_success_rate': 90.0}
+                 for name in ['Auchan', 'Lidl', 'Casino']]
+        
+        def fetchall():
+            sql = cursor.execute.call_args[0][0]
+            if 'LEFT JOIN runs_plan' in sql:
+                return [{'retailer': 'Auchan', 'expected_total': 20, 'total_count': 20, 'completed_count': 4}]
+            if 'SUM(ko_items)' in sql:
+                return [{'retailer': 'Auchan', 'total_items': 100, 'ok_items': 95, 'ko_items': 5, 'run_count': 20}]
+            return [{'retailer': 'Auchan', 'success_count': 19, 'total_count': 20}]
+        cursor.fetchall.side_effect = fetchall
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            service = ReportService(repo, temp_dir, 'Europe/Paris', True, max_workers=4)
+            with patch.object(repo, 'get_success_counters') as success, \
+                    patch.object(repo, 'get_progress_at') as progress, \
+                    patch.object(repo, 'get_item_counters') as item_counters:
+                items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 7))
+        
+        success.assert_not_called()
+        progress.assert_not_called()
+        item_counters.assert_not_called()
+        assert cursor.execute.call_count == 3
+        cursor.fetchone.assert_not_called()
+        assert {item.status for item in items if item.retailer == 'Auchan'} == {'success'}
+        assert {item.status for item in items if item.retailer != 'Auchan'} == {'error'}
+        assert len(items) == 9
+    
+    def test_bulk_defaults_for_requested_retailers(self, repo, cursor):
+        """Test the (0, 0), (0, None) and zero item defaults of requested retailers without data."""
+        cursor.fetchall.return_value = []
+        
+        assert repo.get_success_counters_bulk(date(2024, 1, 1), date(2024, 1, 1), ['Lidl']) == {'Lidl': (0, 0)}
+        assert repo.get_progress_at_bulk(date(2024, 1, 1), time(9, 30), ['Lidl']) == {'Lidl': (0, None)}
+        assert repo.get_item_counters_bulk(date(2024, 1, 1), date(2024, 1, 1), ['Lidl']) == {
+            'Lidl': {'total_items': 0, 'ok_items': 0, 'ko_items': 0, 'run_count': 0}
+        }
+        assert repo.get_success_counters_bulk(date(2024, 1, 1), date(2024, 1, 1)) == {}
+    
+    def test_report_from_fractional_rules(self, repo, cursor):
+        """Test that rules stored as fractions (0.90, 0.05) are evaluated as percentages."""
+        def fetchall():
+            sql = cursor.execute.call_args[0][0]
+            if 'FROM retailer_rules' in sql:
+                return [
+                    {'retailer': name, 'min_success_rate': None, 'min_progress_0930': None, 'include_successes': 0,
+                     'min_item_success_rate': 0.90, 'max_ko_rate': 0.05}
+                    for name in ['Auchan', 'Lidl']
+                ]
+            return [
+                {'retailer': 'Auchan', 'total_items': 1000, 'ok_items': 400, 'ko_items': 600, 'run_count': 4},
+                {'retailer': 'Lidl', 'total_items': 1000, 'ok_items': 970, 'ko_items': 30, 'run_count': 4},
+            ]
+        cursor.fetchall.side_effect = fetchall
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            service = ReportService(repo, temp_dir, 'Europe/Paris', True)
+            output_path = service.generate_dealer_report(date(2024, 1, 1), date(2024, 1, 31), None, 'csv')
+            with open(output_path, encoding='utf-8') as f:
+                rows = {(row['retailer'], row['rule']): row for row in csv.DictReader(f)}
+        
+        assert {key: row['status'] for key, row in rows.items()} == {
+            ('Auchan', 'item_success_rate'): 'error', ('Auchan', 'ko_rate'): 'error',
+            ('Lidl', 'item_success_rate'): 'success', ('Lidl', 'ko_rate'): 'success',
+        }
+        assert rows[('Lidl', 'item_success_rate')]['threshold_success'] == '90.0000'
+        assert rows[('Lidl', 'ko_rate')]['threshold_success'] == '5.0000'
+        # Rules and the item counters of both retailers: two queries
+        assert cursor.execute.call_count == 2
+    
+    def test_rules_without_item_rate_columns(self, repo, cursor):
+        """Test that rules load without the item rate columns (migration 003 not applied)."""
+        cursor.execute.side_effect = [
+            pymysql.err.OperationalError(1054, "Unknown column 'min_item_success_rate' in 'field list'"),
+            None,
+        ]
+        cursor.fetchall.return_value = [
+            {'retailer': 'Auchan', 'min_success_rate': 0.9, 'min_progress_0930': None, 'include_successes': 0},
+        ]
+        
+        rules = repo.get_rules()
+        
+        assert rules == [RetailerRule('Auchan', 0.9, None, False)]
+        assert rules[0].max_ko_rate is None
+        assert not repo.use_item_rules
+        assert 'max_ko_rate' not in cursor.execute.call_args[0][0]
+    
+    def test_progress_uses_indexed_completion_time(self, repo, cursor):
+        """Test that progress queries compare the indexed completed_time column."""
+        cursor.fetchone.side_effect = [{'expected_total': 5}, {'completed_count': 2}]
+        
+        assert repo.get_progress_at('Auchan', date(2024, 1, 1), time(9, 30)) == (2, 5)
+        
+        sql, params = cursor.execute.call_args[0]
+        assert 'completed_time <= %s' in sql
+        assert 'TIME(finished_at)' not in sql
+        assert params == ('Auchan', date(2024, 1, 1), time(9, 30))
+    
+    def test_progress_without_completion_time_column(self, repo, cursor):
+        """Test the fallback to the unindexed condition when migration 001 is not applied."""
+        cursor.execute.side_effect = [
+            pymysql.err.OperationalError(1054, "Unknown column 'completed_time' in 'where clause'"),
+            None,
+            None,
+        ]
+        cursor.fetchall.return_value = [
+            {'retailer': 'Auchan', 'expected_total': 5, 'total_count': 3, 'completed_count': 2},
+        ]
+        
+        assert repo.get_progress_at_bulk(date(2024, 1, 1), time(9, 30)) == {'Auchan': (2, 5)}
+        assert repo.get_progress_at_bulk(date(2024, 1, 1), time(9, 30)) == {'Auchan': (2, 5)}
+        
+        assert cursor.execute.call_count == 3
+        assert not repo.use_completed_time
+        sql, params = cursor.execute.call_args[0]
+        assert 'TIME(finished_at) <= %s' in sql
+        assert sql.count('%s') == len(params)
+
+
 class TestReportService:
     """Test ReportService report generation logic."""
     
@@ -285,3 +525,96 @@ class TestReportService:
                 assert '⚠️ Anomalies' in content
                 assert 'Carrefour' in content
                 assert '80%' in content
+    
+    def test_generate_report_items_concurrent_matches_sequential(self):
+        """Test that concurrent rule evaluation keeps the sequential ordering."""
+        rules = [
+            {
+                'retailer_name': name,
+                'min_crawling_rate': 95.0,
+                'min_crawling_rate_warning': 90.0,
+                'min_content_rate': 85.0,
+                'min_content_rate_warning': 80.0,
+            }
+            for name in ['Leclerc', 'Auchan', 'Carrefour', 'Casino']
+        ]
+        crawling = {'Leclerc': 99, 'Auchan': 50, 'Carrefour': 92, 'Casino': 97}
+        content = {'Leclerc': 90, 'Auchan': 86, 'Carrefour': 70, 'Casino': 81}
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_repo = Mock()
+            mock_repo.get_crawling_counters.side_effect = lambda retailer, d1, d2: {
+                'crawling_count': crawling[retailer], 'total_count': 100
+            }
+            mock_repo.get_content_counters.side_effect = lambda retailer, d1, d2: {
+                'content_count': content[retailer], 'total_count': 100
+            }
+            
+            sequential = ReportService(mock_repo, temp_dir, 'Europe/Paris', True, max_workers=1)
+            concurrent = ReportService(mock_repo, temp_dir, 'Europe/Paris', True, max_workers=4)
+            
+            expected = sequential._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 1))
+            actual = concurrent._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 1))
+            
+            assert actual == expected
+            assert len(actual) == 8
+            anomalies = [item.retailer for item in actual if item.status != 'success']
+            assert anomalies == sorted(anomalies)
+    
+    def test_item_weighted_rules(self):
+        """Test item success and KO rate rules from a single bulk item query."""
+        rules = [
+            {'retailer_name': name, 'min_item_success_rate': 90.0, 'min_item_success_rate_warning': 80.0,
+             'max_ko_rate': 5.0, 'max_ko_rate_warning': 10.0}
+            for name in ['Auchan', 'Lidl', 'Casino']
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_repo = Mock()
+            mock_repo.get_item_counters_bulk.return_value = {
+                # Every run succeeded, but 60% of the items were KO
+                'Auchan': {'total_items': 1000, 'ok_items': 400, 'ko_items': 600, 'run_count': 4},
+                'Lidl': {'total_items': 1000, 'ok_items': 920, 'ko_items': 80, 'run_count': 4},
+                'Casino': {'total_items': 0, 'ok_items': 0, 'ko_items': 0, 'run_count': 0},
+            }
+            
+            service = ReportService(mock_repo, temp_dir, 'Europe/Paris', True, max_workers=4)
+            items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 31))
+            
+            statuses = {(item.retailer, item.rule_type): item.status for item in items}
+            assert statuses == {
+                ('Auchan', 'item_success_rate'): 'error', ('Auchan', 'ko_rate'): 'error',
+                ('Lidl', 'item_success_rate'): 'success', ('Lidl', 'ko_rate'): 'warning',
+                ('Casino', 'item_success_rate'): 'error', ('Casino', 'ko_rate'): 'error',
+            }
+            mock_repo.get_item_counters_bulk.assert_called_once_with(
+                date(2024, 1, 1), date(2024, 1, 31), retailers=['Auchan', 'Lidl', 'Casino'])
+            mock_repo.get_item_counters.assert_not_called()
+            assert 'KO item rate = 8% (max 5%, warning 10%)' in service._format_item_html(
+                next(item for item in items if item.retailer == 'Lidl' and item.rule_type == 'ko_rate'), 'warning')
+    
+    def test_generate_report_items_uses_bulk_counters(self):
+        """Test that bulk variants replace per-retailer queries when the repository has them."""
+        rules = [
+            {'retailer_name': name, 'min_crawling_rate': 95.0, 'min_crawling_rate_warning': 90.0}
+            for name in ['Auchan', 'Lidl', 'Casino']
+        ]
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            mock_repo = Mock()
+            mock_repo.get_crawling_counters_bulk.return_value = {
+                'Auchan': {'crawling_count': 99, 'total_count': 100},
+                'Lidl': {'crawling_count': 50, 'total_count': 100},
+            }
+            mock_repo.get_crawling_counters.return_value = {'crawling_count': 92, 'total_count': 100}
+            
+            service = ReportService(mock_repo, temp_dir, 'Europe/Paris', True, max_workers=4)
+            items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 1))
+            
+            assert {item.retailer: item.status for item in items} == {
+                'Auchan': 'success', 'Lidl': 'error', 'Casino': 'warning'
+            }
+            mock_repo.get_crawling_counters_bulk.assert_called_once_with(
+                date(2024, 1, 1), date(2024, 1, 1), retailers=['Auchan', 'Lidl', 'Casino'])
+            # Only the retailer missing from the bulk result is queried on its own
+            mock_repo.get_crawling_counters.assert_called_once_with('Casino', date(2024, 1, 1), date(2024, 1, 1))
@@ -0,0 +1,68 @@
+"""Startup-time checks for the dealer-report CLI (cold start in the cron container)."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import cli
+
+SRC_DIR = Path(cli.__file__).resolve().parent.parent
+
+# Budget for `import cli.cli` (cumulative, microseconds) as reported by -X importtime
+IMPORT_BUDGET_US = int(os.getenv('DEALER_REPORT_IMPORT_BUDGET_US', '300000'))
+
+HEAVY_MODULES = ('google.cloud.storage', 'bs4', 'dependency_injector', 'numpy', 'jinja2')
+
+
+def _importtime(code: str, **env) -> dict:
+    """Run ``code`` in a fresh interpreter and return the cumulative import time of each module."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR,
+        env={**os.environ, 'PYTHONPATH': str(SRC_DIR), **env},
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+class TestStartup:
+    """Test that the CLI only imports what a subcommand needs."""
+
+    def test_cli_import_within_budget(self):
+        """Test the cumulative import time of the CLI module."""
+        timings = _importtime('import cli.cli')
+
+        assert timings['cli.cli'] < IMPORT_BUDGET_US, f"import cli.cli took {timings['cli.cli']}us"
+
+    def test_help_does_not_import_services(self):
+        """Test that --help does not import the container or heavy dependencies."""
+        timings = _importtime(
+            "from cli.cli import cli\n"
+            "try:\n"
+            "    cli(['--help'])\n"
+            "except SystemExit:\n"
+            "    pass\n"
+        )
+
+        assert 'cli.ioc' not in timings
+        assert not [module for module in HEAVY_MODULES if module in timings]
+
+    def test_teams_notifier_does_not_import_gcs(self):
+        """Test that resolving the Teams notifier leaves GCS and BeautifulSoup unloaded."""
+        timings = _importtime(
+            "from cli.cli import get_container\n"
+            "get_container().teams_notifier()\n",
+            TEAMS_WEBHOOK_URL='https://example.invalid/webhook'
+        )
+
+        assert 'cli.ioc' in timings
+        assert 'google.cloud.storage' not in timings
+        assert 'bs4' not in timings
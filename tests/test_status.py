@@ -0,0 +1,58 @@
+import numpy as np
+
+from cli.services.status import (
+    STATUS_CRITICAL, STATUS_ERROR, STATUS_NA, STATUS_SUCCESS, STATUS_WARNING,
+    classify, classify_rates, color_buckets, gradient_colors, labels, worst_status,
+)
+
+
+class TestClassify:
+    def test_thresholds_are_inclusive(self):
+        codes = classify([95.0, 94.9, 90.0, 89.9], 95.0, 90.0)
+
+        assert codes.tolist() == [STATUS_SUCCESS, STATUS_WARNING, STATUS_WARNING, STATUS_ERROR]
+        assert codes.dtype == np.int8
+
+    def test_per_retailer_thresholds(self):
+        codes = classify([50.0, 50.0, 50.0], np.array([40.0, 60.0, 80.0]), np.array([30.0, 45.0, 70.0]))
+
+        assert codes.tolist() == [STATUS_SUCCESS, STATUS_WARNING, STATUS_ERROR]
+
+    def test_zero_and_missing_values(self):
+        codes = classify([0.0, np.nan, 10.0], 30.0, 25.0, zero_is_critical=True)
+
+        assert codes.tolist() == [STATUS_CRITICAL, STATUS_NA, STATUS_ERROR]
+        assert classify(0.0, 30.0, 25.0) == STATUS_ERROR
+
+    def test_scalar_input(self):
+        assert int(classify(85.0, 85.0, 80.0)) == STATUS_SUCCESS
+
+
+class TestClassifyRates:
+    def test_worst_status_and_color(self):
+        statuses = classify_rates([50.0, 27.0, 0.0], [99.0, 96.0, 92.0], (30.0, 25.0), (95.0, 90.0),
+                                  zero_is_critical=True)
+
+        assert statuses.progress.tolist() == [STATUS_SUCCESS, STATUS_WARNING, STATUS_CRITICAL]
+        assert statuses.success.tolist() == [STATUS_SUCCESS, STATUS_SUCCESS, STATUS_WARNING]
+        assert statuses.worst.tolist() == [STATUS_SUCCESS, STATUS_WARNING, STATUS_CRITICAL]
+        assert labels(statuses.worst).tolist() == ['success', 'warning', 'error']
+
+    def test_worst_status_of_several_rules(self):
+        assert worst_status(np.array([1, 3]), np.array([2, 1]), np.array([1, 4])).tolist() == [2, 4]
+
+    def test_large_input(self):
+        values = np.linspace(0, 100, 100_000)
+
+        statuses = classify_rates(values, values[::-1], (30.0, 25.0), (95.0, 90.0))
+
+        assert statuses.worst.shape == (100_000,)
+        assert set(np.unique(statuses.worst)) <= {STATUS_SUCCESS, STATUS_WARNING, STATUS_ERROR}
+
+
+class TestColors:
+    def test_color_buckets(self):
+        assert color_buckets([0.0, 25.0, 49.9, 70.0, 90.0, 95.0, np.nan]).tolist() == [0, 1, 1, 3, 4, 5, 0]
+
+    def test_gradient_colors(self):
+        assert gradient_colors([96.0, 91.0, 10.0]).tolist() == ['#10b981', '#fbbf24', '#dc2626']
@@ -0,0 +1,405 @@
+"""Unit tests for the Spider Vision web repository and its caches."""
+import base64
+import json
+import os
+import stat
+import time
+
+import pytest
+import requests
+from unittest.mock import Mock
+from datetime import date, timedelta
+
+from cli.repository.EndpointDiscoveryCache import EndpointDiscoveryCache
+from cli.repository.WebDataRepository import WebDataRepository
+from cli.services.auth import SpiderVisionAuth
+from cli.services.data import SpiderVisionData
+from cli.services.http_session import create_session
+from cli.services.ReportService import ReportService
+from cli.services.response_cache import ResponseCache
+from cli.services.token_cache import TokenCache, token_expiry
+
+
+@pytest.fixture
+def spider_vision_env(monkeypatch, tmp_path):
+    """Minimal Spider Vision configuration (pre-configured JWT, no sign-in)."""
+    monkeypatch.setenv('SPIDER_VISION_API_BASE', 'https://spider-vision.test')
+    monkeypatch.setenv('SPIDER_VISION_JWT_TOKEN', 'token')
+    monkeypatch.setenv('DEALER_REPORT_CACHE_DIR', str(tmp_path))
+
+
+def _response(status_code, payload=None):
+    response = Mock()
+    response.status_code = status_code
+    response.headers = {}
+    response.json.return_value = payload
+    return response
+
+
+def _jwt(exp):
+    """Build an unsigned JWT whose payload only carries ``exp``."""
+    payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f"header.{payload}.signature"
+
+
+class TestEndpointDiscoveryCache:
+    """Test the persistent endpoint discovery cache."""
+
+    def test_remember_persists_to_disk(self, tmp_path):
+        """Test that a discovered endpoint survives a new cache instance."""
+        path = tmp_path / 'endpoints.json'
+        cache = EndpointDiscoveryCache(str(path), ttl_seconds=60)
+        cache.remember('crawling', '/api/crawling/{retailer}')
+        cache.mark_missing('/api/crawler/crawling/{retailer}')
+
+        reloaded = EndpointDiscoveryCache(str(path), ttl_seconds=60)
+        assert reloaded.get('crawling') == '/api/crawling/{retailer}'
+        assert reloaded.is_missing('/api/crawler/crawling/{retailer}')
+
+    def test_expired_entries_are_ignored(self, tmp_path):
+        """Test that entries older than the TTL trigger a new probe."""
+        cache = EndpointDiscoveryCache(str(tmp_path / 'endpoints.json'), ttl_seconds=0)
+        cache.remember('crawling', '/api/crawling/{retailer}')
+        cache.mark_missing('/api/stores/{retailer}')
+
+        assert cache.get('crawling') is None
+        assert not cache.is_missing('/api/stores/{retailer}')
+
+
+class TestEndpointProbing:
+    """Test WebDataRepository endpoint probing through the discovery cache."""
+
+    def test_probe_skips_missing_and_reuses_known_endpoint(self, spider_vision_env, tmp_path):
+        """Test that 404s are skipped and the answering endpoint is called directly."""
+        cache = EndpointDiscoveryCache(str(tmp_path / 'endpoints.json'), ttl_seconds=60)
+        repo = WebDataRepository(endpoint_cache=cache)
+
+        def fake_request(endpoint, method='GET', **kwargs):
+            if endpoint == '/api/stores/Carrefour':
+                return _response(200, {'crawling_count': 9, 'total_count': 10})
+            return _response(404)
+
+        repo._request = Mock(side_effect=fake_request)
+
+        counters = repo.get_crawling_counters('Carrefour', date(2024, 1, 1), date(2024, 1, 1))
+        assert counters == {'crawling_count': 9, 'total_count': 10}
+        assert repo._request.call_count == 4
+        assert cache.get('crawling') == '/api/stores/{retailer}'
+
+        repo._request.reset_mock()
+        repo.get_crawling_counters('Carrefour', date(2024, 1, 2), date(2024, 1, 2))
+        assert repo._request.call_count == 1
+        assert repo._request.call_args[0][0] == '/api/stores/Carrefour'
+
+    def test_retailer_404_is_not_global(self, spider_vision_env, tmp_path):
+        """Test that a 404 on a retailer URL only skips that retailer, unlike a global endpoint."""
+        cache = EndpointDiscoveryCache(str(tmp_path / 'endpoints.json'), ttl_seconds=60)
+        repo = WebDataRepository(endpoint_cache=cache)
+        repo._request = Mock(return_value=_response(404))
+
+        repo.get_crawling_counters('Carrefour', date(2024, 1, 1), date(2024, 1, 1))
+
+        assert cache.is_missing('/api/stores/Carrefour')
+        assert not cache.is_missing('/api/stores/{retailer}')
+        assert cache.is_missing('/api/crawling')
+
+        repo._request.reset_mock()
+        repo.get_crawling_counters('Auchan', date(2024, 1, 1), date(2024, 1, 1))
+
+        called = [call[0][0] for call in repo._request.call_args_list]
+        assert '/api/stores/Auchan' in called
+        assert '/api/crawling' not in called
+
+    def test_probe_forgets_failing_known_endpoint(self, spider_vision_env, tmp_path):
+        """Test that a failing known endpoint triggers a new probe."""
+        cache = EndpointDiscoveryCache(str(tmp_path / 'endpoints.json'), ttl_seconds=60)
+        cache.remember('content', '/api/content/{retailer}')
+        repo = WebDataRepository(endpoint_cache=cache)
+
+        def fake_request(endpoint, method='GET', **kwargs):
+            if endpoint == '/api/crawler/content':
+                return _response(200, {'content_count': 5, 'total_count': 10})
+            return _response(500)
+
+        repo._request = Mock(side_effect=fake_request)
+
+        counters = repo.get_content_counters('Auchan', date(2024, 1, 1), date(2024, 1, 1))
+        assert counters == {'content_count': 5, 'total_count': 10}
+        assert repo._request.call_args_list[0][0][0] == '/api/content/Auchan'
+        assert cache.get('content') == '/api/crawler/content'
+
+
+class TestOverviewCounterIndex:
+    """Test counters answered from a single overview payload."""
+
+    OVERVIEW = [
+        {'domainDealerName': 'Carrefour', 'storeCount': 200, 'storeInDeltaCount': 190,
+         'successCount': 171, 'storeFailedCount': 19, 'crawlProgress': 95.0},
+        {'domainDealerName': ' Auchan ', 'storeCount': 100, 'storeInDeltaCount': 50,
+         'successCount': 40, 'storeFailedCount': 10, 'crawlProgress': 50.0},
+    ]
+
+    def test_overview_fetched_once_for_all_retailers(self, spider_vision_env, tmp_path):
+        """Test that every counter of every retailer costs a single overview call."""
+        repo = WebDataRepository(endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')))
+        repo.data_service.get_overview = Mock(return_value=self.OVERVIEW)
+        repo._request = Mock()
+        today = date.today()
+
+        assert repo.get_crawling_counters('carrefour', today, today) == {'crawling_count': 190, 'total_count': 200}
+        assert repo.get_content_counters('Auchan', today, today) == {'content_count': 40, 'total_count': 50}
+        assert repo.get_success_counters('Auchan', today, today) == {'success_count': 40, 'total_count': 50}
+
+        assert repo.data_service.get_overview.call_count == 1
+        repo._request.assert_not_called()
+
+        repo.refresh_overview()
+        repo.get_crawling_counters('Carrefour', today, today)
+        assert repo.data_service.get_overview.call_count == 2
+
+    def test_bulk_counters(self, spider_vision_env, tmp_path):
+        """Test that bulk counters are answered from the overview for today only."""
+        repo = WebDataRepository(endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')))
+        repo.data_service.get_overview = Mock(return_value=self.OVERVIEW)
+        today = date.today()
+
+        assert repo.get_content_counters_bulk(today, today, retailers=['Auchan', 'Unknown']) == {
+            'Auchan': {'content_count': 40, 'total_count': 50}
+        }
+        assert set(repo.get_crawling_counters_bulk(today, today)) == {'Carrefour', ' Auchan '}
+        assert repo.get_crawling_counters_bulk(date(2024, 1, 1), date(2024, 1, 1)) == {}
+
+    def test_past_ranges_are_not_answered_from_overview(self, spider_vision_env, tmp_path):
+        """Test that the live overview is not used for a range that excludes today."""
+        repo = WebDataRepository(endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')))
+        repo.data_service.get_overview = Mock(return_value=self.OVERVIEW)
+        repo._request = Mock(return_value=_response(200, {'crawling_count': 1, 'total_count': 2}))
+
+        counters = repo.get_crawling_counters('Carrefour', date(2024, 1, 1), date(2024, 1, 1))
+        assert counters == {'crawling_count': 1, 'total_count': 2}
+        repo.data_service.get_overview.assert_not_called()
+
+
+    def test_ranges_containing_today_are_not_answered_from_overview(self, spider_vision_env, tmp_path):
+        """Test that today's overview does not stand for a multi-day range."""
+        repo = WebDataRepository(endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')))
+        repo.data_service.get_overview = Mock(return_value=self.OVERVIEW)
+        repo._request = Mock(return_value=_response(200, {'crawling_count': 1, 'total_count': 2}))
+        today = date.today()
+
+        counters = repo.get_crawling_counters('Carrefour', today - timedelta(days=6), today)
+        assert counters == {'crawling_count': 1, 'total_count': 2}
+        assert repo.get_crawling_counters_bulk(today - timedelta(days=6), today) == {}
+        repo.data_service.get_overview.assert_not_called()
+
+    def test_overview_keys_follow_dashboard_precedence(self, spider_vision_env, tmp_path):
+        """Test that the index and the dashboard parser read the same list of a payload."""
+        payload = {'data': [{'domainDealerName': 'Data'}], 'retailers': [{'domainDealerName': 'Retailers'}]}
+        repo = WebDataRepository(endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')))
+        repo.data_service.get_overview = Mock(return_value=payload)
+
+        assert [item['domainDealerName'] for item in repo.overview_index.records()] == ['Retailers']
+        assert len(repo._parse_overview_data(payload)) == 1
+
+class TestSharedSession:
+    """Test the pooled HTTP session shared by the Spider Vision services."""
+
+    def test_create_session_configures_pool_and_retries(self):
+        """Test pool size, retry policy and compression headers."""
+        session = create_session(pool_size=4, max_retries=2, backoff_factor=0.1)
+        adapter = session.get_adapter('https://spider-vision.test/')
+
+        assert adapter._pool_maxsize == 4
+        assert adapter.max_retries.total == 2
+        assert 'POST' not in adapter.max_retries.allowed_methods
+        assert 503 in adapter.max_retries.status_forcelist
+        assert 'gzip' in session.headers['Accept-Encoding']
+
+    def test_repository_services_share_session(self, spider_vision_env, tmp_path):
+        """Test that authenticated requests go through the injected session."""
+        session = Mock()
+        session.request.return_value = _response(200, {})
+        repo = WebDataRepository(base_url='https://spider-vision.test/',
+                                 endpoint_cache=EndpointDiscoveryCache(str(tmp_path / 'e.json')),
+                                 session=session)
+
+        assert repo.auth.session is session
+        assert repo.data_service.session is session
+
+        repo._request('/api/runs', params={'retailer': 'Casino'})
+        method, url = session.request.call_args[0]
+        assert url == 'https://spider-vision.test/api/runs'
+        assert session.request.call_args[1]['headers']['Authorization'] == 'Bearer token'
+
+
+class TestTokenCache:
+    """Test JWT reuse across runs and refresh on expiry."""
+
+    @pytest.fixture
+    def credentials_env(self, spider_vision_env, monkeypatch):
+        monkeypatch.delenv('SPIDER_VISION_JWT_TOKEN')
+        monkeypatch.setenv('SPIDER_VISION_EMAIL', 'ops@example.com')
+        monkeypatch.setenv('SPIDER_VISION_PASSWORD', 'secret')
+
+    def test_store_is_private_and_respects_expiry(self, tmp_path):
+        """Test the 0600 cache file and the refresh margin."""
+        cache = TokenCache(str(tmp_path / 'token.json'), refresh_margin=300)
+        fresh = _jwt(time.time() + 3600)
+        cache.store(fresh, 'ops@example.com')
+
+        assert stat.S_IMODE(os.stat(cache.path).st_mode) == 0o600
+        assert token_expiry(fresh) == pytest.approx(time.time() + 3600, abs=5)
+        assert cache.load('ops@example.com') == fresh
+        assert cache.load('other@example.com') is None
+        assert cache.load() is None
+
+        cache.store(_jwt(time.time() + 60), 'ops@example.com')
+        assert cache.load('ops@example.com') is None
+
+    def test_token_without_user_is_never_reused(self, tmp_path):
+        """Test that the cache fails closed when no email is configured."""
+        cache = TokenCache(str(tmp_path / 'token.json'))
+        cache.store(_jwt(time.time() + 3600))
+
+        assert cache.load() is None
+        assert cache.load('ops@example.com') is None
+
+    def test_login_reuses_cached_token_across_instances(self, credentials_env, tmp_path):
+        """Test that a second process reuses the token instead of signing in again."""
+        token = _jwt(time.time() + 3600)
+        session = Mock()
+        session.post.return_value = _response(201, {'token': token})
+
+        first = SpiderVisionAuth(session=session)
+        assert first.login() == token
+        second = SpiderVisionAuth(session=session)
+        assert second.login() == token
+        assert session.post.call_count == 1
+
+    def test_expired_env_token_triggers_sign_in(self, credentials_env, monkeypatch):
+        """Test that a pre-configured token close to expiry is replaced."""
+        monkeypatch.setenv('SPIDER_VISION_JWT_TOKEN', _jwt(time.time() - 10))
+        token = _jwt(time.time() + 3600)
+        session = Mock()
+        session.post.return_value = _response(201, {'token': token})
+
+        assert SpiderVisionAuth(session=session).login() == token
+        session.post.assert_called_once()
+
+    def test_data_service_refreshes_once_on_401(self, credentials_env):
+        """Test that a rejected token is refreshed and the call replayed."""
+        token = _jwt(time.time() + 3600)
+        session = Mock()
+        session.post.return_value = _response(201, {'token': token})
+        session.get.side_effect = [_response(401), _response(200, [{'domainDealerName': 'Casino'}])]
+
+        data_service = SpiderVisionData(session=session, auth=SpiderVisionAuth(session=session))
+        assert data_service.get_overview('revoked') == [{'domainDealerName': 'Casino'}]
+        assert session.get.call_args[1]['headers']['Authorization'] == f'Bearer {token}'
+        assert session.post.call_count == 1
+
+
+def _http_response(status_code, payload=None, headers=None):
+    """Build a real requests.Response (the response cache stores its raw body)."""
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode() if payload is not None else b''
+    response.headers.update(headers or {})
+    return response
+
+
+class TestResponseCache:
+    """Test the on-disk cache of Spider Vision responses."""
+
+    OVERVIEW = [{'domainDealerName': 'Casino', 'crawlProgress': 80.0}]
+
+    def test_etag_revalidation_reuses_cached_body(self, spider_vision_env, tmp_path):
+        """Test that a 304 answer is served from the compressed cached body."""
+        session = Mock()
+        session.get.side_effect = [_http_response(200, self.OVERVIEW, {'ETag': '"v1"'}),
+                                   _http_response(304)]
+        cache = ResponseCache(str(tmp_path / 'responses'), max_age=0)
+        data_service = SpiderVisionData(session=session, response_cache=cache, use_cache=True)
+
+        assert data_service.get_overview('token') == self.OVERVIEW
+        assert data_service.get_overview('token') == self.OVERVIEW
+        assert session.get.call_args[1]['headers']['If-None-Match'] == '"v1"'
+        assert list((tmp_path / 'responses').glob('*.json.gz'))
+
+    def test_freshness_window_without_validators(self, spider_vision_env, tmp_path):
+        """Test that a response without ETag/Last-Modified is reused within max_age."""
+        session = Mock()
+        session.get.return_value = _http_response(200, self.OVERVIEW)
+        cache = ResponseCache(str(tmp_path / 'responses'), max_age=60)
+
+        SpiderVisionData(session=session, response_cache=cache, use_cache=True).get_overview('token')
+        assert SpiderVisionData(session=session, response_cache=cache, use_cache=True).get_overview('token') == self.OVERVIEW
+        assert session.get.call_count == 1
+
+        SpiderVisionData(session=session, response_cache=cache, use_cache=False).get_overview('token')
+        assert session.get.call_count == 2
+
+    def test_entries_are_per_user(self, spider_vision_env, tmp_path):
+        """Test that another user's token never reads a cached response."""
+        session = Mock()
+        session.get.return_value = _http_response(200, self.OVERVIEW)
+        cache = ResponseCache(str(tmp_path / 'responses'), max_age=60)
+        data_service = SpiderVisionData(session=session, response_cache=cache, use_cache=True)
+
+        def token_for(sub):
+            payload = base64.urlsafe_b64encode(json.dumps({'sub': sub}).encode()).decode().rstrip('=')
+            return f"header.{payload}.signature"
+
+        data_service.get_overview(token_for('alice'))
+        data_service.get_overview(token_for('bob'))
+        assert session.get.call_count == 2
+
+    def test_repository_can_bypass_the_cache(self, spider_vision_env, monkeypatch):
+        """Test that use_cache=False (--no-cache) reaches the repository's data service."""
+        monkeypatch.setenv('SPIDER_VISION_RESPONSE_CACHE', '1')
+
+        assert WebDataRepository(session=Mock()).data_service.response_cache is not None
+        assert WebDataRepository(session=Mock(), use_cache=False).data_service.response_cache is None
+
+
+class TestReportServiceOnWebRepository:
+    """Test rule evaluation against the Spider Vision repository."""
+
+    def test_progress_rule_with_a_report_date(self, spider_vision_env, tmp_path):
+        """Test that the 09:30 progress rule accepts the date passed by ReportService."""
+        repository = WebDataRepository(session=Mock())
+        repository._probe_endpoints = Mock(return_value=None)
+        repository.overview_index.progress = Mock(return_value=20.0)
+        rules = [{'retailer_name': 'Casino', 'min_progress_0930': 15.0}]
+
+        service = ReportService(repository, str(tmp_path), 'Europe/Paris', True)
+        items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 2))
+
+        assert [(item.rule_type, item.actual_value, item.status) for item in items] == [
+            ('progress_0930', 20.0, 'success')
+        ]
+        params = repository._probe_endpoints.call_args[1]['params']
+        assert params['date'] == '2024-01-02'
+        assert params['start_time'] == '2024-01-02T09:00:00'
+
+    def test_success_rule_reads_dict_counters(self, spider_vision_env, tmp_path):
+        """Test that the {'success_count', 'total_count'} counters of the web repository are evaluated."""
+        repository = WebDataRepository(session=Mock())
+        repository._probe_endpoints = Mock(return_value={'success_count': 45, 'total_count': 50})
+        rules = [{'retailer_name': 'Casino', 'min_success_rate': 95.0, 'min_success_rate_warning': 85.0}]
+
+        service = ReportService(repository, str(tmp_path), 'Europe/Paris', True)
+        items = service._generate_report_items(rules, date(2024, 1, 1), date(2024, 1, 2))
+
+        assert [(item.rule_type, item.actual_value, item.status) for item in items] == [
+            ('success_rate', 90.0, 'warning')
+        ]
+        assert items[0].details['success_count'] == 45
+
+    def test_get_rules_filters_on_the_dealer(self, spider_vision_env):
+        """Test that the web repository provides the get_rules used by ReportService."""
+        repository = WebDataRepository(session=Mock())
+        repository._probe_endpoints = Mock(return_value=None)
+
+        assert [rule['retailer_name'] for rule in repository.get_rules('carre')] == ['Carrefour']
+        assert len(repository.get_rules()) == len(repository._get_default_retailer_rules())